@@ -0,0 +1,118 @@
+"""Benchmark of the free-slot search over a large, busy roster of doctors.
+
+Builds a synthetic hospital in a throwaway test database (in-memory SQLite by
+default; set DATABASE_URL to benchmark PostgreSQL, where a ``test_`` database
+is created and dropped): ``--doctors`` doctors over every specialization,
+each working weekdays 9:00-17:00 in half hours. For the next ``--booked-days``
+working days, each slot is booked with probability ``--occupancy``; at the
+default of 1 every doctor is booked solid, except for one slot of a few
+doctors per specialization on the last of those days. It then times:
+
+- ``doctor_slots``: a week of one doctor's free slots (/api/doctors/{id}/slots/)
+- ``earliest_slots``: the earliest slot of every specialization (/api/doctors/earliest-slots/)
+- ``earliest_slots_one``: the same for one specialization
+
+Usage (from the backend directory):
+    python benchmarks/availability.py [--doctors 3000] [--booked-days 3] [--occupancy 1] [--output results.json]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import environment, setup_django, summarize, time_calls, write_report
+
+
+def populate(doctors, booked_days, occupancy=1.0, free_doctors=3, seed=0):
+    """Create the synthetic roster; returns the search start and a doctor"""
+    from django.utils import timezone
+    from hospital_app.models import User, Patient, Doctor, DoctorSchedule, Appointment
+
+    rng = random.Random(seed)
+    batch_size = 5000
+    specializations = [name for name, _ in Doctor.SPECIALIZATION_CHOICES]
+    users = User.objects.bulk_create(
+        [User(username=f'doctor{i}', role='doctor', password='!') for i in range(doctors)], batch_size=batch_size
+    )
+    roster = Doctor.objects.bulk_create([
+        Doctor(user=user, license_number=f'DOC{i:06d}', specialization=specializations[i % len(specializations)])
+        for i, user in enumerate(users)
+    ], batch_size=batch_size)
+    DoctorSchedule.objects.bulk_create([
+        DoctorSchedule(doctor=doctor, weekday=weekday, start_time=datetime.min.time().replace(hour=9),
+                       end_time=datetime.min.time().replace(hour=17))
+        for doctor in roster for weekday in range(5)
+    ], batch_size=batch_size)
+    patient = Patient.objects.create(user=User.objects.create_user(username='patient', role='patient'))
+
+    # Start the search at the next Monday, so booked days are working days
+    today = timezone.localdate()
+    start = timezone.make_aware(datetime.combine(today + timedelta(days=7 - today.weekday()), datetime.min.time()))
+    slots = [
+        start + timedelta(days=day, hours=9, minutes=30 * slot)
+        for day in range(booked_days) for slot in range(16)
+    ]
+    free = set(roster[:free_doctors * len(specializations)])
+    for first in range(0, len(roster), 100):
+        Appointment.objects.bulk_create(
+            [Appointment(patient=patient, doctor=doctor, appointment_date=moment, reason='Checkup')
+             for doctor in roster[first:first + 100]
+             # The free doctors keep their last slot open
+             for moment in (slots[:-1] if doctor in free else slots) if rng.random() < occupancy],
+            batch_size=batch_size,
+        )
+    return start, roster[0]
+
+
+def run(doctors, booked_days, occupancy, iterations):
+    from django.db import connection
+    from hospital_app import availability
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        started = time.perf_counter()
+        start, doctor = populate(doctors, booked_days, occupancy)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        print(f"Populated in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+
+        end = start + timedelta(days=availability.DEFAULT_SEARCH_DAYS)
+        scenarios = {
+            'doctor_slots': lambda: availability.doctor_free_slots(doctor, start, end),
+            'earliest_slots': lambda: availability.earliest_slots(start, end),
+            'earliest_slots_one': lambda: availability.earliest_slots(start, end, specialization='neurology'),
+        }
+        results = {}
+        for name, function in scenarios.items():
+            results[name] = summarize(time_calls(function, [()], repeat=iterations, warmup=1))
+            print(f"{name:<20} p50 {results[name]['p50_us'] / 1000:>9.2f} ms", file=sys.stderr)
+        return results, connection.vendor
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--doctors', type=int, default=3000)
+    parser.add_argument('--booked-days', type=int, default=3, help='working days booked from the search start')
+    parser.add_argument('--occupancy', type=float, default=1.0, help='share of those days\' slots booked')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    setup_django()
+    results, vendor = run(args.doctors, args.booked_days, args.occupancy, args.iterations)
+    write_report({
+        'suite': 'availability',
+        'environment': {**environment(), 'database': vendor},
+        'parameters': {
+            'doctors': args.doctors, 'booked_days': args.booked_days, 'occupancy': args.occupancy,
+            'iterations': args.iterations,
+        },
+        'results': results,
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
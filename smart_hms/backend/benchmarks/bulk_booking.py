@@ -0,0 +1,113 @@
+"""Benchmark of booking many appointments one request at a time against one bulk request.
+
+Builds a throwaway test database (in-memory SQLite by default; set
+DATABASE_URL to benchmark PostgreSQL, where a ``test_`` database is created
+and dropped) with ``--doctors`` doctors working weekdays 9:00-17:00 and one
+patient, then books ``--appointments`` half-hour appointments spread over the
+doctors, each iteration on fresh days:
+
+- ``single``: one POST /api/appointments/ per appointment
+- ``bulk``: one POST /api/appointments/bulk/ with all of them
+
+Usage (from the backend directory):
+    python benchmarks/bulk_booking.py [--doctors 10] [--appointments 200] [--output results.json]
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+
+from common import environment, setup_django, summarize, time_calls, write_report
+
+
+def populate(doctors):
+    """Create the doctors and the patient; returns the patient's user and the doctors"""
+    from hospital_app.models import User, Patient, Doctor, DoctorSchedule
+
+    roster = [
+        Doctor.objects.create(user=User.objects.create_user(username=f'doctor{i}', role='doctor'), license_number=f'DOC{i:06d}')
+        for i in range(doctors)
+    ]
+    DoctorSchedule.objects.bulk_create([
+        DoctorSchedule(doctor=doctor, weekday=weekday, start_time=datetime.min.time().replace(hour=9),
+                       end_time=datetime.min.time().replace(hour=17))
+        for doctor in roster for weekday in range(5)
+    ])
+    patient = Patient.objects.create(user=User.objects.create_user(username='patient', role='patient'))
+    return patient.user, roster
+
+
+def booking_days(start, appointments, doctors):
+    """Items for ``appointments`` bookings from ``start`` on, filling each doctor's working days in turn"""
+    items, day = [], start
+    while len(items) < appointments:
+        if day.weekday() < 5:
+            items += [
+                {'doctor': doctor.id, 'appointment_date': (day + timedelta(hours=9, minutes=30 * slot)).isoformat(),
+                 'reason': 'Follow-up'}
+                for doctor in doctors for slot in range(16)
+            ]
+        day += timedelta(days=1)
+    return items[:appointments], day
+
+
+def run(doctors, appointments, iterations):
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+
+    # Lets the test client's host through ALLOWED_HOSTS
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        user, roster = populate(doctors)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        today = timezone.localdate()
+        next_day = timezone.make_aware(datetime.combine(today + timedelta(days=1), datetime.min.time()))
+
+        def batches():
+            nonlocal next_day
+            # Fresh days every call, so that no booking conflicts with an earlier one
+            items, next_day = booking_days(next_day, appointments, roster)
+            return items
+
+        def single():
+            for item in batches():
+                assert client.post('/api/appointments/', item, format='json').status_code == 201
+
+        def bulk():
+            assert client.post('/api/appointments/bulk/', batches(), format='json').status_code == 201
+
+        results = {}
+        for name, function in {'single': single, 'bulk': bulk}.items():
+            started = time.perf_counter()
+            results[name] = summarize(time_calls(function, [()], repeat=iterations, warmup=1), items_per_call=appointments)
+            print(f"{name:<8} p50 {results[name]['p50_us'] / 1000:>9.2f} ms "
+                  f"({time.perf_counter() - started:.1f} s in all)", file=sys.stderr)
+        return results, connection.vendor
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--doctors', type=int, default=10)
+    parser.add_argument('--appointments', type=int, default=200, help='appointments booked per call')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    setup_django()
+    results, vendor = run(args.doctors, args.appointments, args.iterations)
+    write_report({
+        'suite': 'bulk_booking',
+        'environment': {**environment(), 'database': vendor},
+        'parameters': {'doctors': args.doctors, 'appointments': args.appointments, 'iterations': args.iterations},
+        'results': results,
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Shared helpers for the benchmark scripts: Django setup, timing, statistics and JSON reports"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    """Make the backend importable and configure Django"""
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital.settings')
+    import django
+
+    django.setup()
+
+
+def time_calls(function, args_list, repeat=1, warmup=0):
+    """Call ``function(*args)`` for every args tuple, ``repeat`` times; return durations in ns"""
+    for args in args_list[:warmup]:
+        function(*args)
+    samples = []
+    perf_counter_ns = time.perf_counter_ns
+    for _ in range(repeat):
+        for args in args_list:
+            start = perf_counter_ns()
+            function(*args)
+            samples.append(perf_counter_ns() - start)
+    return samples
+
+
+def summarize(samples_ns, items_per_call=1):
+    """Latency percentiles (microseconds) and throughput (items per second) of timing samples"""
+    samples_us = sorted(sample / 1000 for sample in samples_ns)
+    if len(samples_us) > 1:
+        quantiles = statistics.quantiles(samples_us, n=100, method='inclusive')
+        p50, p95, p99 = quantiles[49], quantiles[94], quantiles[98]
+    else:
+        p50 = p95 = p99 = samples_us[0]
+    total_seconds = sum(samples_ns) / 1e9
+    return {
+        'calls': len(samples_us),
+        'p50_us': p50,
+        'p95_us': p95,
+        'p99_us': p99,
+        'mean_us': statistics.fmean(samples_us),
+        'min_us': samples_us[0],
+        'max_us': samples_us[-1],
+        'throughput_per_s': len(samples_us) * items_per_call / total_seconds if total_seconds else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Where and on what a benchmark ran, recorded with its results"""
+    import numpy
+    import sklearn
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'scikit_learn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def write_report(report, output=None):
+    """Write a JSON report to ``output`` (a path) or stdout"""
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+def compare_reports(baseline, current, metric='p50_us'):
+    """Rows of ``(benchmark, baseline, current, change)`` for benchmarks present in both reports"""
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None or not before.get(metric) or result.get(metric) is None:
+            continue
+        rows.append((name, before[metric], result[metric], result[metric] / before[metric] - 1))
+    return rows
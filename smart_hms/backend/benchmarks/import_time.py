@@ -0,0 +1,104 @@
+"""Import-time benchmark for the Django app.
+
+Each scenario runs in a fresh interpreter and times what a process pays before
+it can serve a request: ``django.setup()`` plus importing the URLconf (and so
+every view). The ``eager`` scenario first imports pandas and scikit-learn the
+way the symptom checker module used to at import time, which gives the
+baseline the lazy imports are measured against. ``first_prediction`` shows
+where that cost went: to the first symptom check.
+
+Usage (from the backend directory):
+    python benchmarks/import_time.py [--runs N] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('pandas', 'sklearn', 'scipy', 'numpy')
+
+EAGER_IMPORTS = """
+import pandas
+import sklearn.feature_extraction.text
+import sklearn.model_selection
+import sklearn.naive_bayes
+"""
+
+STARTUP = """
+import django
+django.setup()
+import hospital.urls
+"""
+
+FIRST_PREDICTION = """
+from hospital_app.ai_model.registry import get_symptom_checker
+get_symptom_checker().predict('fever headache fatigue')
+"""
+
+SCENARIOS = {
+    'startup': STARTUP,
+    'eager': EAGER_IMPORTS + STARTUP,
+    'first_prediction': STARTUP + FIRST_PREDICTION,
+}
+
+RUNNER = """
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital.settings')
+start = time.perf_counter()
+exec(compile({code!r}, '<scenario>', 'exec'))
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': seconds,
+    'heavy_modules': [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def run_scenario(code):
+    """Run ``code`` in a fresh interpreter; return its timing and loaded heavy modules"""
+    completed = subprocess.run(
+        [sys.executable, '-c', RUNNER.format(code=code, heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def benchmark(runs=5):
+    """Return ``{scenario: {median_seconds, min_seconds, heavy_modules}}``"""
+    results = {}
+    for name, code in SCENARIOS.items():
+        samples = [run_scenario(code) for _ in range(runs)]
+        seconds = [sample['seconds'] for sample in samples]
+        results[name] = {
+            'median_seconds': statistics.median(seconds),
+            'min_seconds': min(seconds),
+            'heavy_modules': samples[-1]['heavy_modules'],
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per scenario')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    results = benchmark(args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, result in results.items():
+        modules = ', '.join(result['heavy_modules']) or 'none'
+        print(f"{name:<18} median {result['median_seconds'] * 1000:8.1f} ms   "
+              f"min {result['min_seconds'] * 1000:8.1f} ms   heavy modules: {modules}")
+    saved = results['eager']['median_seconds'] - results['startup']['median_seconds']
+    print(f"\nLazy imports save {saved * 1000:.1f} ms "
+          f"({saved / results['eager']['median_seconds']:.0%}) of startup per process")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""Benchmark of doctor role scoping: DISTINCT joins / IN lists, EXISTS and the link table.
+
+Builds a synthetic hospital in a throwaway test database (in-memory SQLite by
+default; set DATABASE_URL to benchmark PostgreSQL, where a ``test_`` database
+is created and dropped): one long-tenured doctor with ``--appointments``
+appointments over ``--doctor-patients`` patients, plus as many patients again
+seeing other doctors, each with a symptom check. It then times what the doctor's
+requests run, with the role scoping of earlier releases (``legacy.*``), with
+EXISTS probes of the Appointment table (``exists.*``) and with
+``hospital_app.scoping``, which joins the DoctorPatient table (``links.*``):
+
+- ``patients_page``: count plus first page of /api/patients/
+- ``users_page``: count plus first page of /api/users/
+- ``symptom_checks_page``: first keyset page of /api/symptom-checker/
+- ``dashboard_patients``: the doctor dashboard's five patients
+
+Usage (from the backend directory):
+    python benchmarks/role_scoping.py [--appointments 100000] [--output results.json]
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import timedelta
+
+from common import environment, setup_django, summarize, time_calls, write_report
+
+PAGE_SIZE = 20
+
+
+def populate(appointments, doctor_patients, other_doctors=20, seed=0):
+    """Create the synthetic data set; returns the long-tenured doctor's user"""
+    from django.utils import timezone
+    from hospital_app.models import User, Patient, Doctor, Appointment, SymptomChecker
+    from hospital_app.relationships import backfill_links
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    batch_size = 5000
+
+    doctor_users = User.objects.bulk_create(
+        [User(username=f'doctor{i}', role='doctor', password='!') for i in range(other_doctors + 1)]
+    )
+    doctors = Doctor.objects.bulk_create(
+        [Doctor(user=user, license_number=f'DOC{i:06d}') for i, user in enumerate(doctor_users)]
+    )
+    target, others = doctors[0], doctors[1:]
+
+    patient_count = doctor_patients * 2
+    patient_users = User.objects.bulk_create(
+        [User(username=f'patient{i}', role='patient', password='!') for i in range(patient_count)],
+        batch_size=batch_size,
+    )
+    patients = Patient.objects.bulk_create([Patient(user=user) for user in patient_users], batch_size=batch_size)
+    seen, unseen = patients[:doctor_patients], patients[doctor_patients:]
+
+    rows = [
+        Appointment(
+            patient=seen[i % doctor_patients], doctor=target, reason='Follow-up', status='completed',
+            appointment_date=now - timedelta(minutes=15 * i),
+        )
+        for i in range(appointments)
+    ]
+    # Random times, made distinct by the microseconds as a doctor can't be double-booked
+    rows += [
+        Appointment(
+            patient=patient, doctor=rng.choice(others), reason='Checkup',
+            appointment_date=now - timedelta(minutes=rng.randrange(10 ** 6), microseconds=i),
+        )
+        for i, patient in enumerate(patient for patient in unseen for _ in range(2))
+    ]
+    Appointment.objects.bulk_create(rows, batch_size=batch_size)
+
+    checks = SymptomChecker.objects.bulk_create(
+        [SymptomChecker(patient=patient, symptoms='fever headache') for patient in rng.sample(patients, len(patients))],
+        batch_size=batch_size,
+    )
+    # Interleave seen and unseen patients' checks in time
+    for offset, check in enumerate(checks):
+        check.created_at = now - timedelta(seconds=offset)
+    SymptomChecker.objects.bulk_update(checks, ['created_at'], batch_size=batch_size)
+    # bulk_create bypasses the signals that maintain the links
+    backfill_links()
+    return target.user
+
+
+def legacy_querysets(user):
+    """The doctor's querysets as role-scoped before hospital_app.scoping"""
+    from hospital_app.models import User, Patient, Appointment, SymptomChecker
+
+    patient_user_ids = Appointment.objects.filter(doctor__user=user).values_list('patient__user_id', flat=True)
+    return {
+        'patients': Patient.objects.filter(appointments__doctor__user=user).distinct().select_related('user'),
+        'users': User.objects.filter(id__in=patient_user_ids),
+        'symptom_checks': SymptomChecker.objects.filter(patient__user_id__in=patient_user_ids),
+    }
+
+
+def exists_querysets(user):
+    """The doctor's querysets filtered by correlated EXISTS over Appointment"""
+    from django.db.models import Exists, OuterRef
+    from hospital_app.models import User, Patient, Appointment, SymptomChecker
+
+    def seen(outer, lookup='patient'):
+        return Exists(Appointment.objects.filter(doctor__user=user, **{lookup: OuterRef(outer)}))
+
+    return {
+        'patients': Patient.objects.filter(seen('pk')).select_related('user'),
+        'users': User.objects.filter(seen('pk', 'patient__user')),
+        'symptom_checks': SymptomChecker.objects.filter(seen('patient')),
+    }
+
+
+def link_querysets(user):
+    from hospital_app.models import User, Patient, SymptomChecker
+    from hospital_app.views import PatientViewSet, SymptomCheckerViewSet, UserViewSet
+
+    return {
+        'patients': PatientViewSet.scope_queryset(Patient.objects.all(), user).select_related('user'),
+        'users': UserViewSet.scope_queryset(User.objects.all(), user),
+        'symptom_checks': SymptomCheckerViewSet.scope_queryset(SymptomChecker.objects.all(), user),
+    }
+
+
+def scenarios(querysets):
+    """Request-shaped calls over one scoping's querysets; each returns a result to cross-check"""
+    def page(queryset):
+        return queryset.count(), [row.pk for row in queryset.order_by('pk')[:PAGE_SIZE]]
+
+    def keyset_page():
+        return [row.pk for row in querysets['symptom_checks'].order_by('-created_at', '-id')[:PAGE_SIZE + 1]]
+
+    return {
+        'patients_page': lambda: page(querysets['patients']),
+        'users_page': lambda: page(querysets['users']),
+        'symptom_checks_page': keyset_page,
+        'dashboard_patients': lambda: sorted(row.pk for row in querysets['patients'][:5]),
+    }
+
+
+def run(appointments, doctor_patients, iterations):
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        start = time.perf_counter()
+        user = populate(appointments, doctor_patients)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        print(f"Populated in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+        variants = {
+            'legacy': scenarios(legacy_querysets(user)),
+            'exists': scenarios(exists_querysets(user)),
+            'links': scenarios(link_querysets(user)),
+        }
+        results = {}
+        for name in variants['legacy']:
+            expected = variants['legacy'][name]()
+            line = f"{name:<22}"
+            for label, calls in variants.items():
+                got = calls[name]()
+                if name != 'dashboard_patients' and got != expected:  # dashboard rows are unordered
+                    raise AssertionError(f"{name}: {label} scoping disagrees ({got!r} != {expected!r})")
+                results[f'{label}.{name}'] = summarize(time_calls(calls[name], [()], repeat=iterations, warmup=1))
+                line += f"   {label} p50 {results[f'{label}.{name}']['p50_us'] / 1000:>8.2f} ms"
+            print(line, file=sys.stderr)
+        return results, connection.vendor
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--appointments', type=int, default=100_000, help="the doctor's appointments")
+    parser.add_argument('--doctor-patients', type=int, default=10_000, help='distinct patients the doctor has seen')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    setup_django()
+    results, vendor = run(args.appointments, args.doctor_patients, args.iterations)
+    write_report({
+        'suite': 'role_scoping',
+        'environment': {**environment(), 'database': vendor},
+        'parameters': {
+            'appointments': args.appointments, 'doctor_patients': args.doctor_patients, 'iterations': args.iterations,
+        },
+        'results': results,
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
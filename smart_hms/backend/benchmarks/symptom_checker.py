@@ -0,0 +1,183 @@
+"""Latency and throughput benchmarks for hospital_app.ai_model.
+
+Benchmarks, each reported with p50/p95/p99 latency and throughput:
+
+- ``predict.<inputs>``: full ``SymptomCheckerAI.predict`` with the prediction cache bypassed
+- ``predict_cached.typical``: ``predict`` answered from the prediction cache
+- ``predict_batch.typical``: ``predict_batch`` over batches of typical inputs
+- ``keyword.<inputs>``: keyword-only scoring of normalized text
+- ``ml.<inputs>``: ML-only scoring with the NumPy inference engine
+- ``ml_sklearn.<inputs>``: ML-only scoring through scikit-learn, for reference
+- ``model_load``: loading the published model artifact
+- ``training``: training and publishing a model
+
+Input sets are ``short``, ``typical``, ``long`` and ``adversarial`` symptom
+strings. The model is trained into a temporary directory first, so results do
+not depend on (or change) the model published in the repository.
+
+Usage (from the backend directory):
+    python benchmarks/symptom_checker.py [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+from common import compare_reports, environment, setup_django, summarize, time_calls, write_report
+
+SHORT_INPUTS = ['fever', 'cough', 'rash', 'headache', 'back pain', 'insomnia']
+
+TYPICAL_INPUTS = [
+    'fever headache fatigue',
+    'cough chest pain shortness of breath',
+    'nausea vomiting diarrhea',
+    'chest pain shortness of breath sweating',
+    'joint pain swelling stiffness',
+    'rash itching redness',
+    'sore throat fever swollen glands',
+    'runny nose, sneezing, itchy eyes',
+]
+
+FILLER_WORDS = (
+    'i', 'have', 'had', 'been', 'feeling', 'since', 'yesterday', 'and', 'the', 'my', 'also', 'really',
+    'for', 'three', 'days', 'morning', 'night', 'worse', 'after', 'eating', 'a', 'bit', 'of',
+)
+
+
+def long_inputs(keywords, count=5, words=300, seed=0):
+    """Free-text descriptions of about ``words`` words mixing filler and keywords"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        parts = [rng.choice(keywords) if rng.random() < 0.2 else rng.choice(FILLER_WORDS) for _ in range(words)]
+        texts.append(' '.join(parts).capitalize() + '.')
+    return texts
+
+
+def adversarial_inputs(keywords):
+    """Inputs that stress normalization, the keyword matcher and the vectorizer"""
+    return [
+        'a' * 20000,                                # one huge token, no separators
+        ',' * 5000 + ' fever',                      # separators only, then one phrase
+        'pain ' * 2000,                             # one keyword repeated
+        'fevers headaches coughing ' * 500,         # near-miss substrings of keywords
+        'fièvre 头痛 😷 douleur ' * 500,             # non-ASCII text
+        ', '.join(keywords * 3),                    # every keyword, many phrases
+        ' \t\n '.join(keywords),                    # whitespace-heavy
+    ]
+
+
+def input_sets():
+    from hospital_app.ai_model.symptom_checker import KEYWORD_CONDITIONS
+
+    keywords = sorted({keyword for config in KEYWORD_CONDITIONS.values() for keyword in config['keywords']})
+    return {
+        'short': SHORT_INPUTS,
+        'typical': TYPICAL_INPUTS,
+        'long': long_inputs(keywords),
+        'adversarial': adversarial_inputs(keywords),
+    }
+
+
+def run(iterations=50, load_runs=20, train_runs=3, only=None):
+    """Run the benchmarks; return ``{name: summary}``"""
+    from django.test.utils import override_settings
+
+    results = {}
+
+    def record(name, samples, items_per_call=1):
+        results[name] = summarize(samples, items_per_call)
+        print(f"{name:<28} p50 {results[name]['p50_us']:>10.1f} us", file=sys.stderr)
+
+    def wanted(name):
+        return only is None or any(part in name for part in only)
+
+    with tempfile.TemporaryDirectory() as base_dir, override_settings(BASE_DIR=base_dir):
+        from hospital_app.ai_model.prediction_cache import PredictionCache, normalize_symptoms
+        from hospital_app.ai_model.symptom_checker import SymptomCheckerAI
+
+        os.makedirs(os.path.join(base_dir, 'hospital_app', 'ai_model'))
+        cwd = os.getcwd()
+        os.chdir(base_dir)  # training writes a debug trace to the working directory
+        try:
+            trainer = SymptomCheckerAI(load_model=False)
+            if wanted('training'):
+                record('training', time_calls(trainer._train_model, [()], repeat=train_runs))
+            else:
+                trainer._train_model()
+        finally:
+            os.chdir(cwd)
+
+        if wanted('model_load'):
+            record('model_load', time_calls(SymptomCheckerAI.from_published_model, [()], repeat=load_runs))
+
+        checker = SymptomCheckerAI.from_published_model()
+        engine = checker._get_inference_engine()
+        uncached = SymptomCheckerAI.from_published_model()
+        uncached._cache_version = lambda: None
+
+        for set_name, texts in input_sets().items():
+            normalized = [(normalize_symptoms(text),) for text in texts]
+            raw = [(text,) for text in texts]
+            benchmarks = {
+                f'predict.{set_name}': (uncached.predict, raw),
+                f'keyword.{set_name}': (checker._predict_keyword_matching, normalized),
+                f'ml.{set_name}': (engine.predict_proba, normalized),
+                f'ml_sklearn.{set_name}': (
+                    lambda text: checker.model.predict_proba(checker.vectorizer.transform([text])), normalized,
+                ),
+            }
+            for name, (function, args_list) in benchmarks.items():
+                if wanted(name):
+                    record(name, time_calls(function, args_list, repeat=iterations, warmup=len(args_list)))
+
+        if wanted('predict_cached'):
+            checker._prediction_cache = PredictionCache()
+            args_list = [(text,) for text in TYPICAL_INPUTS]
+            record('predict_cached.typical', time_calls(checker.predict, args_list, repeat=iterations, warmup=len(args_list)))
+
+        if wanted('predict_batch'):
+            uncached._prediction_cache = PredictionCache()
+            batch = [TYPICAL_INPUTS[i % len(TYPICAL_INPUTS)] + f' day {i}' for i in range(100)]
+            record(
+                'predict_batch.typical',
+                time_calls(uncached.predict_batch, [(batch,)], repeat=max(iterations // 5, 2)),
+                items_per_call=len(batch),
+            )
+
+        model_version = checker.model_version
+    return results, model_version
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50, help='passes over each input set')
+    parser.add_argument('--load-runs', type=int, default=20)
+    parser.add_argument('--train-runs', type=int, default=3)
+    parser.add_argument('--only', nargs='+', help='run only benchmarks whose name contains one of these')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='JSON report of an earlier run to compare p50 latencies with')
+    args = parser.parse_args()
+
+    setup_django()
+    results, model_version = run(args.iterations, args.load_runs, args.train_runs, args.only)
+    report = {
+        'suite': 'symptom_checker',
+        'environment': {**environment(), 'model_version': model_version},
+        'parameters': {'iterations': args.iterations, 'load_runs': args.load_runs, 'train_runs': args.train_runs},
+        'results': results,
+    }
+    write_report(report, args.output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\n{'benchmark':<28}{'before p50 us':>15}{'after p50 us':>15}{'change':>10}", file=sys.stderr)
+        for name, before, after, change in compare_reports(baseline, report):
+            print(f"{name:<28}{before:>15.1f}{after:>15.1f}{change:>+10.1%}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
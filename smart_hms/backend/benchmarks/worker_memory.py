@@ -0,0 +1,156 @@
+"""Per-worker memory of the symptom checker, with and without pre-fork warmup.
+
+Mimics gunicorn's process model: a master process (optionally) loads and warms
+the symptom model, freezes the garbage collector and forks workers; every
+worker then serves N symptom checks and reports its memory from
+``/proc/self/smaps_rollup`` while all workers are still alive:
+
+- ``rss``: resident memory, counting shared pages in full
+- ``pss``: proportional share, shared pages divided between their users
+- ``private``: pages only this worker uses, i.e. what it really costs
+
+The memory of a running gunicorn can be read the same way with
+``--gunicorn-pid MASTER_PID``. Linux only.
+
+Usage (from the backend directory):
+    python benchmarks/worker_memory.py [--workers 4] [--requests 200] [--no-preload] [--json]
+    python benchmarks/worker_memory.py --gunicorn-pid 12345
+"""
+import argparse
+import gc
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SMAPS_FIELDS = {
+    'Rss': 'rss',
+    'Pss': 'pss',
+    'Private_Clean': 'private',
+    'Private_Dirty': 'private',
+}
+
+
+def read_memory(pid='self'):
+    """Return ``{rss, pss, private}`` in kB for a process"""
+    memory = {'rss': 0, 'pss': 0, 'private': 0}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            field, _, value = line.partition(':')
+            if field in SMAPS_FIELDS:
+                memory[SMAPS_FIELDS[field]] += int(value.split()[0])
+    return memory
+
+
+def child_pids(pid):
+    """PIDs of the direct children of a process"""
+    children = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as f:
+            children.extend(int(child) for child in f.read().split())
+    return children
+
+
+def synthetic_symptoms(count, seed=0):
+    """Distinct symptom descriptions built from the keyword catalog"""
+    from hospital_app.ai_model.symptom_checker import KEYWORD_CONDITIONS
+
+    keywords = sorted({keyword for config in KEYWORD_CONDITIONS.values() for keyword in config['keywords']})
+    rng = random.Random(seed)
+    return [', '.join(rng.sample(keywords, rng.randint(1, 4))) for _ in range(count)]
+
+
+def worker(symptoms_list, done, measure, results):
+    """Serve the symptom checks, then report memory once every worker is done"""
+    from hospital_app.ai_model.registry import get_symptom_checker
+
+    checker = get_symptom_checker()
+    for symptoms in symptoms_list:
+        checker.predict(symptoms)
+    done.wait()
+    results.put({'pid': os.getpid(), **read_memory()})
+    measure.wait()
+
+
+def simulate(workers, requests, preload):
+    """Fork ``workers`` processes from a (pre)loaded master and measure them"""
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital.settings')
+    import django
+
+    django.setup()
+    symptoms_list = synthetic_symptoms(requests)
+    if preload:
+        from hospital_app.ai_model.registry import warm_up_symptom_checker
+
+        warm_up_symptom_checker()
+        gc.collect()
+        gc.freeze()
+
+    context = multiprocessing.get_context('fork')
+    done = context.Barrier(workers + 1)
+    measure = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(symptoms_list, done, measure, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    done.wait()
+    measured = sorted((results.get() for _ in processes), key=lambda result: result['pid'])
+    master = read_memory()
+    measure.wait()
+    for process in processes:
+        process.join()
+    return {'preload': preload, 'requests': requests, 'master': master, 'workers': measured}
+
+
+def inspect_gunicorn(master_pid):
+    """Memory of a running gunicorn master and its workers"""
+    return {
+        'master': read_memory(master_pid),
+        'workers': [{'pid': pid, **read_memory(pid)} for pid in sorted(child_pids(master_pid))],
+    }
+
+
+def summarize(report):
+    """Add per-worker averages and the total memory of all processes"""
+    workers = report['workers']
+    for field in ('rss', 'pss', 'private'):
+        report[f'mean_worker_{field}'] = sum(worker[field] for worker in workers) / len(workers) if workers else 0
+    report['total_pss'] = report['master']['pss'] + sum(worker['pss'] for worker in workers)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=200, help='symptom checks per worker')
+    parser.add_argument('--no-preload', action='store_true', help='load the model in every worker instead')
+    parser.add_argument('--gunicorn-pid', type=int, help='measure a running gunicorn master instead')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    if args.gunicorn_pid:
+        report = summarize(inspect_gunicorn(args.gunicorn_pid))
+    else:
+        report = summarize(simulate(args.workers, args.requests, not args.no_preload))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'process':<10}{'pid':>8}{'rss MB':>10}{'pss MB':>10}{'private MB':>12}")
+    rows = itertools.chain([('master', report['master'])], (('worker', worker) for worker in report['workers']))
+    for name, memory in rows:
+        print(f"{name:<10}{memory.get('pid', ''):>8}{memory['rss'] / 1024:>10.1f}"
+              f"{memory['pss'] / 1024:>10.1f}{memory['private'] / 1024:>12.1f}")
+    print(f"\nmean worker private {report['mean_worker_private'] / 1024:.1f} MB, "
+          f"total PSS {report['total_pss'] / 1024:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
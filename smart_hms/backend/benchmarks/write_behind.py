@@ -0,0 +1,116 @@
+"""Benchmark of saving symptom checks before the response against write-behind queueing.
+
+Times what a symptom check request spends persisting its record, from
+``--threads`` concurrent request threads saving ``--checks`` records each:
+
+- ``sync``: ``SymptomChecker.objects.create``-equivalent INSERT per check (the default)
+- ``write_behind``: queueing the check (and spilling it to disk) for the background writer
+
+then reports how long the writer took to save the whole queue afterwards.
+Runs on a throwaway test database: a file-backed SQLite one by default, so
+commits cost what they do in production; set DATABASE_URL to benchmark
+PostgreSQL, where a ``test_`` database is created and dropped.
+
+Usage (from the backend directory):
+    python benchmarks/write_behind.py [--threads 4] [--checks 200] [--output results.json]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from common import environment, setup_django, summarize, write_report
+
+CHECK = {
+    'symptoms': 'fever headache fatigue',
+    'predicted_conditions': ['influenza', 'common_cold', 'migraine'],
+    'confidence_scores': {'influenza': 0.62, 'common_cold': 0.21, 'migraine': 0.08},
+    'recommendations': 'Rest, drink fluids and see a doctor if the fever persists for more than three days.',
+}
+
+
+def timed_threads(save, threads, checks):
+    """Per-call durations (ns) of ``save(record)`` called ``checks`` times by each of ``threads`` threads"""
+    from django.db import connection
+
+    samples = []
+    barrier = threading.Barrier(threads)
+
+    def work():
+        durations = []
+        try:
+            barrier.wait()
+            for _ in range(checks):
+                started = time.perf_counter_ns()
+                save({**CHECK, 'patient_id': None})
+                durations.append(time.perf_counter_ns() - started)
+        finally:
+            connection.close()
+        samples.extend(durations)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return samples
+
+
+def run(threads, checks):
+    from django.db import connection
+    from hospital_app.models import SymptomChecker
+    from hospital_app.write_behind import SymptomCheckWriter, save_symptom_checks
+
+    directory = tempfile.mkdtemp()
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        # Wait for the write lock like production would, instead of failing at once
+        connection.settings_dict['OPTIONS']['timeout'] = 30
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        results = {}
+        samples = timed_threads(lambda record: save_symptom_checks([record]), threads, checks)
+        results['sync'] = summarize(samples)
+
+        writer = SymptomCheckWriter(os.path.join(directory, 'spill'), flush_interval=0.2, batch_size=200,
+                                    max_queue=threads * checks)
+        samples = timed_threads(writer.submit, threads, checks)
+        results['write_behind'] = summarize(samples)
+        started = time.perf_counter()
+        writer.close()
+        drained = time.perf_counter() - started
+        results['write_behind']['drain_s'] = drained
+        assert SymptomChecker.objects.count() == 2 * threads * checks
+
+        for name, result in results.items():
+            print(f"{name:<14} p50 {result['p50_us'] / 1000:>8.3f} ms  p99 {result['p99_us'] / 1000:>8.3f} ms",
+                  file=sys.stderr)
+        print(f"queue drained {drained * 1000:.1f} ms after the last check", file=sys.stderr)
+        return results, connection.vendor
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=4, help='concurrent request threads')
+    parser.add_argument('--checks', type=int, default=200, help='symptom checks saved by each thread')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    setup_django()
+    results, vendor = run(args.threads, args.checks)
+    write_report({
+        'suite': 'write_behind',
+        'environment': {**environment(), 'database': vendor},
+        'parameters': {'threads': args.threads, 'checks': args.checks},
+        'results': results,
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
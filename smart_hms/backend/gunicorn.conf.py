@@ -0,0 +1,46 @@
+"""Gunicorn configuration for the Smart HMS backend.
+
+The application is preloaded in the master process, where HospitalAppConfig.ready
+loads and warms the symptom checker model once. Workers are forked from that
+master and share its memory copy-on-write instead of each loading the model.
+"""
+import gc
+import os
+
+# Tells HospitalAppConfig.ready to load and warm the model in the master
+os.environ.setdefault('SYMPTOM_CHECKER_PRELOAD', 'true')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+preload_app = True
+
+# Recycle workers now and then; replacements are forked from the warm master
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+accesslog = '-'
+
+
+def pre_fork(server, worker):
+    """Freeze the master's objects before forking a worker.
+
+    Frozen objects are moved to the collector's permanent generation, so the
+    workers' garbage collection never touches them and never writes to (and
+    so copies) the pages holding Django, the model and the warmup state.
+    """
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master"""
+    from django.db import connections
+
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    """Save the symptom checks still queued for write-behind"""
+    from hospital_app.write_behind import reset_writer
+
+    reset_writer()
@@ -89,6 +89,79 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# 'symptom_predictions' is the shared tier of the symptom checker's prediction
+# cache. Point SYMPTOM_CACHE_URL at Redis (needs the redis package) to share it
+# between workers and nodes; without it a local-memory cache stands in for local
+# testing when SYMPTOM_CACHE_SHARED_ALIAS=symptom_predictions is set.
+
+SYMPTOM_CACHE_URL = config('SYMPTOM_CACHE_URL', default='')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'symptom_predictions': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': SYMPTOM_CACHE_URL,
+    } if SYMPTOM_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'symptom-predictions',
+    },
+}
+
+# Symptom checker prediction cache: an in-process LRU tier in front of an
+# optional shared tier (a CACHES alias, or None to disable it)
+SYMPTOM_CHECKER_CACHE = {
+    'LOCAL_MAX_SIZE': config('SYMPTOM_CACHE_LOCAL_MAX_SIZE', default=1024, cast=int),
+    'LOCAL_TTL': config('SYMPTOM_CACHE_LOCAL_TTL', default=300, cast=int),
+    'SHARED_ALIAS': config(
+        'SYMPTOM_CACHE_SHARED_ALIAS', default='symptom_predictions' if SYMPTOM_CACHE_URL else ''
+    ) or None,
+    'SHARED_TTL': config('SYMPTOM_CACHE_SHARED_TTL', default=3600, cast=int),
+}
+
+# Admin dashboard statistics snapshot: recomputed by one caller at most every
+# TTL seconds, while others are served the previous snapshot for up to STALE_TTL
+# more seconds. Use a shared cache alias to refresh once for all workers.
+ADMIN_DASHBOARD_CACHE = {
+    'ALIAS': config('ADMIN_DASHBOARD_CACHE_ALIAS', default='default'),
+    'TTL': config('ADMIN_DASHBOARD_CACHE_TTL', default=10, cast=int),
+    'STALE_TTL': config('ADMIN_DASHBOARD_CACHE_STALE_TTL', default=120, cast=int),
+    'REFRESH_TIMEOUT': 30,
+}
+
+# Load and warm the symptom checker model when the app starts (AppConfig.ready).
+# Enabled by gunicorn.conf.py, so the preloading master does it once for all workers.
+SYMPTOM_CHECKER_PRELOAD = config('SYMPTOM_CHECKER_PRELOAD', default=False, cast=bool)
+
+# How often (seconds) workers check for a symptom model published by
+# `manage.py retrain_symptom_model` and swap it in without a restart
+SYMPTOM_MODEL_RELOAD_INTERVAL = config('SYMPTOM_MODEL_RELOAD_INTERVAL', default=5.0, cast=float)
+
+# Labeled examples exported from medical records by `manage.py export_training_data`,
+# which the symptom model is trained on along with its built-in examples
+SYMPTOM_TRAINING_STORE = config('SYMPTOM_TRAINING_STORE', default=os.path.join(BASE_DIR, 'var', 'training_data'))
+
+
+# Write-behind persistence of AI symptom checks (hospital_app/write_behind.py):
+# when enabled, checks are queued and saved in batches by a background thread
+# every FLUSH_INTERVAL seconds or BATCH_SIZE checks, so responses do not wait for
+# the INSERT. Queued checks are spilled to files in SPILL_DIR until saved.
+SYMPTOM_CHECK_WRITE_BEHIND = {
+    'ENABLED': config('SYMPTOM_CHECK_WRITE_BEHIND', default=False, cast=bool),
+    'FLUSH_INTERVAL': config('SYMPTOM_CHECK_FLUSH_INTERVAL', default=0.2, cast=float),
+    'BATCH_SIZE': config('SYMPTOM_CHECK_BATCH_SIZE', default=200, cast=int),
+    'MAX_QUEUE': config('SYMPTOM_CHECK_MAX_QUEUE', default=10000, cast=int),
+    'SPILL_DIR': config('SYMPTOM_CHECK_SPILL_DIR', default=os.path.join(BASE_DIR, 'var', 'symptom_checks')),
+    # fsync every spilled check, to survive power loss as well as crashes
+    'FSYNC': config('SYMPTOM_CHECK_FSYNC', default=False, cast=bool),
+    # Failed saves of a batch before it is saved check by check, moving bad checks to a rejected file
+    'MAX_ATTEMPTS': config('SYMPTOM_CHECK_MAX_ATTEMPTS', default=3, cast=int),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,189 @@
+"""Versioned, memory-mappable on-disk format for the symptom model.
+
+An artifact is a directory holding the fitted arrays as ``.npy`` files and a
+``manifest.json`` describing them. Loading maps the arrays read-only
+(``mmap_mode='r'``), so every worker process on a node shares the same pages
+and startup does no unpickling.
+
+Models trained incrementally (``incremental.py``) use a HashingVectorizer,
+which has no vocabulary or idf to store, and keep their Naive Bayes counts so
+the next update can continue from them; they are written as format 2.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+ARTIFACT_FORMAT_VERSION = 1
+HASHING_FORMAT_VERSION = 2
+SUPPORTED_FORMAT_VERSIONS = (ARTIFACT_FORMAT_VERSION, HASHING_FORMAT_VERSION)
+MANIFEST_NAME = 'manifest.json'
+VOCABULARY_FILE = 'vocabulary.npy'
+IDF_FILE = 'idf.npy'
+FEATURE_LOG_PROB_FILE = 'feature_log_prob.npy'  # (n_features, n_classes)
+CLASS_LOG_PRIOR_FILE = 'class_log_prior.npy'
+FEATURE_COUNT_FILE = 'feature_count.npy'  # (n_features, n_classes), hashing models only
+CLASS_COUNT_FILE = 'class_count.npy'
+ARRAY_FILES = (VOCABULARY_FILE, IDF_FILE, FEATURE_LOG_PROB_FILE, CLASS_LOG_PRIOR_FILE, FEATURE_COUNT_FILE, CLASS_COUNT_FILE)
+
+# Constructor parameters needed to rebuild an equivalent analyzer / classifier
+VECTORIZER_PARAMS = (
+    'analyzer', 'binary', 'lowercase', 'max_df', 'max_features', 'min_df', 'ngram_range',
+    'norm', 'smooth_idf', 'stop_words', 'strip_accents', 'sublinear_tf', 'token_pattern', 'use_idf',
+)
+HASHING_VECTORIZER_PARAMS = (
+    'alternate_sign', 'analyzer', 'binary', 'lowercase', 'n_features', 'ngram_range', 'norm',
+    'stop_words', 'strip_accents', 'token_pattern',
+)
+MODEL_PARAMS = ('alpha', 'fit_prior', 'force_alpha')
+
+
+class ModelArtifact:
+    """Manifest and (memory-mapped) arrays of a saved symptom model"""
+
+    def __init__(self, manifest, vocabulary, idf, feature_log_prob, class_log_prior, feature_count=None, class_count=None):
+        self.manifest = manifest
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.feature_log_prob = feature_log_prob
+        self.class_log_prior = class_log_prior
+        self.feature_count = feature_count
+        self.class_count = class_count
+
+    @property
+    def classes(self):
+        return self.manifest['classes']
+
+    @property
+    def conditions(self):
+        return self.manifest['conditions']
+
+    @property
+    def model_version(self):
+        return self.manifest.get('model_version') or self.manifest['created_at']
+
+    @property
+    def hashing(self):
+        return self.manifest['format_version'] == HASHING_FORMAT_VERSION
+
+    def build_vectorizer(self):
+        """Rebuild a fitted TfidfVectorizer around the stored vocabulary and idf, or the HashingVectorizer"""
+        from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+
+        params = dict(self.manifest['vectorizer'])
+        params['ngram_range'] = tuple(params['ngram_range'])
+        if self.hashing:
+            return HashingVectorizer(**params)
+        vectorizer = TfidfVectorizer(**params)
+        vectorizer.vocabulary_ = {term: index for index, term in enumerate(self.vocabulary.tolist())}
+        if vectorizer.use_idf:
+            vectorizer.idf_ = self.idf
+        return vectorizer
+
+    def build_model(self):
+        """Rebuild a fitted MultinomialNB whose arrays are views of the stored ones"""
+        from sklearn.naive_bayes import MultinomialNB
+
+        model = MultinomialNB(**self.manifest['model'])
+        model.classes_ = np.array(self.classes)
+        # Stored feature-major; the transpose is a view, so no pages are copied
+        model.feature_log_prob_ = self.feature_log_prob.T
+        model.class_log_prior_ = self.class_log_prior
+        model.n_features_in_ = self.feature_log_prob.shape[0]
+        if self.feature_count is not None:
+            # What partial_fit adds to
+            model.feature_count_ = self.feature_count.T
+            model.class_count_ = self.class_count
+        return model
+
+
+def vectorizer_manifest(vectorizer):
+    """The constructor parameters of ``vectorizer`` recorded in a manifest"""
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    params = vectorizer.get_params()
+    names = HASHING_VECTORIZER_PARAMS if isinstance(vectorizer, HashingVectorizer) else VECTORIZER_PARAMS
+    return {name: list(params[name]) if name == 'ngram_range' else params[name] for name in names}
+
+
+def save_artifact(directory, vectorizer, model, conditions, **metadata):
+    """Write ``vectorizer``/``model`` to ``directory`` in the artifact format.
+
+    The manifest is written last, so a directory without one is never loaded.
+    Extra keyword arguments are recorded under ``metadata`` in the manifest.
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    os.makedirs(directory, exist_ok=True)
+
+    hashing = isinstance(vectorizer, HashingVectorizer)
+    arrays = {
+        FEATURE_LOG_PROB_FILE: np.ascontiguousarray(model.feature_log_prob_.T, dtype=np.float64),
+        CLASS_LOG_PRIOR_FILE: np.asarray(model.class_log_prior_, dtype=np.float64),
+    }
+    if hashing:
+        n_features = vectorizer.n_features
+        arrays[FEATURE_COUNT_FILE] = np.ascontiguousarray(model.feature_count_.T, dtype=np.float64)
+        arrays[CLASS_COUNT_FILE] = np.asarray(model.class_count_, dtype=np.float64)
+    else:
+        vocabulary = sorted(vectorizer.vocabulary_.items(), key=lambda item: item[1])
+        n_features = len(vocabulary)
+        arrays[VOCABULARY_FILE] = np.array([term for term, _ in vocabulary], dtype=str)
+        if vectorizer.use_idf:
+            arrays[IDF_FILE] = np.asarray(vectorizer.idf_, dtype=np.float64)
+
+    # The model version is a digest of the fitted arrays, so the same model
+    # always gets the same version wherever and whenever it is saved
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        np.save(os.path.join(directory, name), arrays[name])
+        digest.update(name.encode())
+        digest.update(arrays[name].tobytes())
+    digest.update(json.dumps([str(label) for label in model.classes_]).encode())
+
+    manifest = {
+        'format_version': HASHING_FORMAT_VERSION if hashing else ARTIFACT_FORMAT_VERSION,
+        'model_version': digest.hexdigest()[:16],
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'n_features': n_features,
+        'classes': [str(label) for label in model.classes_],
+        'conditions': list(conditions),
+        'vectorizer': vectorizer_manifest(vectorizer),
+        'model': {name: model.get_params()[name] for name in MODEL_PARAMS},
+        'metadata': metadata,
+    }
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+
+def read_manifest(directory):
+    """Read and validate the manifest of the artifact in ``directory``"""
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') not in SUPPORTED_FORMAT_VERSIONS:
+        raise ValueError(f"Unsupported model artifact format: {manifest.get('format_version')!r}")
+    return manifest
+
+
+def load_artifact(directory, mmap_mode='r'):
+    """Load the artifact in ``directory``, memory-mapping its arrays by default"""
+    manifest = read_manifest(directory)
+
+    def load(name):
+        return np.load(os.path.join(directory, name), mmap_mode=mmap_mode, allow_pickle=False)
+
+    feature_log_prob = load(FEATURE_LOG_PROB_FILE)
+    class_log_prior = load(CLASS_LOG_PRIOR_FILE)
+    if feature_log_prob.shape != (manifest['n_features'], len(manifest['classes'])):
+        raise ValueError(f"Model artifact arrays do not match its manifest: {feature_log_prob.shape}")
+    if manifest['format_version'] == HASHING_FORMAT_VERSION:
+        return ModelArtifact(manifest, None, None, feature_log_prob, class_log_prior,
+                             feature_count=load(FEATURE_COUNT_FILE), class_count=load(CLASS_COUNT_FILE))
+    vocabulary = load(VOCABULARY_FILE)
+    idf = load(IDF_FILE) if manifest['vectorizer']['use_idf'] else None
+    return ModelArtifact(manifest, vocabulary, idf, feature_log_prob, class_log_prior)
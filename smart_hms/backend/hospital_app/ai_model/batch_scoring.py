@@ -0,0 +1,44 @@
+"""Scoring chunks of symptom texts for offline backfills, in this process or in pool workers.
+
+Free of Django models, so pool workers can import it under any start method.
+Each process loads one published model version once (``load_scorer``, the
+pool initializer) and then scores a chunk with a single ``predict_batch``
+call. A backfill resolves the live version once and pins every process to it,
+so all of its chunks are scored by the same model even if a new one is
+published meanwhile; nothing is ever trained here.
+"""
+import logging
+
+from .prediction_cache import PredictionCache
+from .symptom_checker import SymptomCheckerAI
+
+logger = logging.getLogger(__name__)
+
+# Historical records repeat a lot of symptom texts, but millions of one-off
+# predictions would only churn a shared cache that serves live requests
+SCORER_CACHE_SIZE = 4096
+
+_checker = None
+
+
+def load_scorer(version=None):
+    """Load this process's symptom checker from published model ``version``, the live one by default.
+
+    The checker gets a private prediction cache. Raises FileNotFoundError if
+    no such model is published.
+    """
+    global _checker
+    if version is None or _checker is None or _checker.artifact_version != version:
+        checker = SymptomCheckerAI.from_published_model(version)
+        checker._prediction_cache = PredictionCache(max_size=SCORER_CACHE_SIZE)
+        _checker = checker
+        logger.info(f"Loaded symptom model {checker.artifact_version} for batch scoring")
+    return _checker
+
+
+def score_chunk(chunk):
+    """(model version, [(key, prediction)]) for a list of (key, symptoms) pairs, with the model ``load_scorer`` loaded"""
+    checker = _checker
+    keys = [key for key, _ in chunk]
+    predictions = checker.predict_batch([symptoms for _, symptoms in chunk])
+    return checker.artifact_version, list(zip(keys, predictions))
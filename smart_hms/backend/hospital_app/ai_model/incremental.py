@@ -0,0 +1,104 @@
+"""Incremental updates of the symptom model from new labeled examples, without a full retrain.
+
+The incremental model pairs a HashingVectorizer, which maps text to a fixed
+number of feature columns with no vocabulary to fit, with MultinomialNB, whose
+``partial_fit`` adds the feature counts of new examples to those it already
+has. An update reads the training store from the position recorded in the
+live model's manifest, folds the new examples into the live model's counts in
+mini-batches and publishes the result as a new version, so its cost grows
+with the new examples only.
+
+When the live model is not an incremental one (the first update, or after a
+full ``retrain_symptom_model``), an update starts a new model from the
+built-in examples and the whole store.
+"""
+import logging
+from itertools import islice
+
+from .model_store import current_artifact_path, publish_artifact, trainer_lock
+from .symptom_checker import FALLBACK_CONDITIONS, SymptomCheckerAI, model_store_path
+from .training_store import TrainingStore
+
+logger = logging.getLogger(__name__)
+
+HASH_FEATURES = 2 ** 16
+BATCH_SIZE = 1000
+# Fixed up front, as partial_fit cannot add classes later
+CLASSES = tuple(sorted(FALLBACK_CONDITIONS))
+
+
+def build_vectorizer(n_features=HASH_FEATURES):
+    """The fixed featurizer of incremental models: the full retrain's terms, hashed"""
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    # Non-negative counts, as Naive Bayes needs
+    return HashingVectorizer(
+        n_features=n_features, alternate_sign=False, stop_words='english', ngram_range=(1, 2), norm='l2'
+    )
+
+
+def update_model(store_root, model_root=None, batch_size=BATCH_SIZE, min_examples=1, blocking=True):
+    """Fold the examples added to the training store since the live model into it; returns (examples, version).
+
+    The new version is published unless fewer than ``min_examples`` examples
+    were new, when ``version`` is None and they are left for the next update.
+    Holds the model store's trainer lock; with ``blocking=False``, raises
+    TrainingInProgress if another process holds it.
+    """
+    model_root = model_root or model_store_path()
+    store = TrainingStore(store_root)
+    with trainer_lock(model_root, blocking=blocking):
+        vectorizer, model, position = _live_model(model_root, store)
+        rebuilt = model is None
+        folded = 0
+        if rebuilt:
+            from sklearn.naive_bayes import MultinomialNB
+
+            vectorizer, model, position = build_vectorizer(), MultinomialNB(alpha=1.0), 0
+            df = SymptomCheckerAI(load_model=False)._built_in_examples()
+            folded += _fold(vectorizer, model, zip(df['symptoms'], df['condition']), batch_size)
+        examples, position = store.read(after=position)
+        folded += _fold(vectorizer, model, examples, batch_size)
+        if not rebuilt and folded < min_examples:
+            logger.info(f"{folded} new training examples, not publishing a new symptom model")
+            return folded, None
+        version, _ = publish_artifact(
+            model_root, vectorizer, model, list(model.classes_), incremental=True,
+            training_store_position=position, new_examples=folded, examples=int(model.class_count_.sum()),
+        )
+    logger.info(f"Folded {folded} training examples into symptom model {version}")
+    return folded, version
+
+
+def _live_model(model_root, store):
+    """(vectorizer, model, store position) of the live model if updates can continue it, else (None, None, 0)"""
+    from .artifacts import load_artifact, vectorizer_manifest
+
+    artifact_dir = current_artifact_path(model_root)
+    if artifact_dir is None:
+        return None, None, 0
+    # Copied into memory, as partial_fit adds to the counts in place
+    artifact = load_artifact(artifact_dir, mmap_mode=None)
+    position = artifact.manifest['metadata'].get('training_store_position')
+    if (
+        not artifact.hashing or position is None or tuple(artifact.classes) != CLASSES
+        or artifact.manifest['vectorizer'] != vectorizer_manifest(build_vectorizer())
+        # The store was replaced since
+        or position > len(store.manifest()['segments'])
+    ):
+        return None, None, 0
+    return artifact.build_vectorizer(), artifact.build_model(), position
+
+
+def _fold(vectorizer, model, examples, batch_size):
+    """``partial_fit`` ``model`` with (symptoms, condition) ``examples``, ``batch_size`` at a time; returns their number"""
+    examples = iter(examples)
+    folded = 0
+    for batch in iter(lambda: list(islice(examples, batch_size)), []):
+        batch = [(symptoms, condition) for symptoms, condition in batch if condition in CLASSES]
+        if not batch:
+            continue
+        texts, labels = zip(*batch)
+        model.partial_fit(vectorizer.transform(texts), labels, classes=CLASSES)
+        folded += len(batch)
+    return folded
@@ -0,0 +1,154 @@
+"""Pure-NumPy inference for the TF-IDF (or hashed) + Multinomial Naive Bayes symptom model"""
+import math
+
+import numpy as np
+
+
+def log_sum_exp(values):
+    """``log(sum(exp(values)))`` for a 1-D array, as computed by ``scipy.special.logsumexp``.
+
+    The maximal terms are masked out of the sum and added back with ``log1p``,
+    the accurate formulation scipy uses, without scipy's per-call dispatch
+    overhead (which dominates sklearn's ``predict_proba`` for a single row).
+    """
+    value_max = values.max()
+    is_max = values == value_max
+    max_count = np.count_nonzero(is_max)
+    shifted = values - value_max
+    shifted[is_max] = -np.inf
+    rest = np.exp(shifted).sum() / max_count
+    return np.log1p(rest) + np.log(max_count) + value_max
+
+
+def top_k_indices(probabilities, k):
+    """Return the indices of the ``k`` largest probabilities, highest first.
+
+    Uses ``argpartition`` so only the selected entries are sorted. Exact ties
+    are ordered by class index, so the result does not depend on the sort
+    algorithm (``np.argsort`` leaves the order of ties unspecified).
+    """
+    probabilities = np.asarray(probabilities)
+    size = probabilities.shape[0]
+    if k >= size:
+        candidates = np.arange(size)
+    else:
+        candidates = np.argpartition(probabilities, size - k)[size - k:]
+    order = np.lexsort((candidates, -probabilities[candidates]))
+    return candidates[order]
+
+
+class NaiveBayesInference:
+    """Scores symptom text without going through sklearn's estimator machinery.
+
+    The vectorizer's vocabulary and idf weights and the classifier's
+    ``feature_log_prob_`` and ``class_log_prior_`` are copied into flat arrays
+    once. A text is then turned into its sparse tf-idf row in plain Python and
+    scored with a direct dot product over its non-zero features, in the same
+    order and with the same arithmetic as sklearn, so the probabilities are
+    identical to ``model.predict_proba(vectorizer.transform([text]))[0]``.
+
+    A HashingVectorizer has no vocabulary to copy; its rows are hashed by the
+    vectorizer itself and scored the same way.
+    """
+
+    def __init__(self, vectorizer, model):
+        self.vectorizer = vectorizer
+        self.model = model
+        self.analyzer = vectorizer.build_analyzer()
+        self.hashing = not hasattr(vectorizer, 'vocabulary_')
+        self.vocabulary = None if self.hashing else dict(vectorizer.vocabulary_)
+        self.use_idf = getattr(vectorizer, 'use_idf', False)
+        self.idf = np.ascontiguousarray(vectorizer.idf_, dtype=np.float64) if self.use_idf else None
+        self.idf_list = self.idf.tolist() if self.use_idf else None
+        self.norm = vectorizer.norm
+        self.sublinear_tf = getattr(vectorizer, 'sublinear_tf', False)
+        # (n_features, n_classes) so one feature's class scores are a contiguous row
+        self.feature_log_prob = np.ascontiguousarray(model.feature_log_prob_.T, dtype=np.float64)
+        self.class_log_prior = np.ascontiguousarray(model.class_log_prior_, dtype=np.float64)
+        self.classes = tuple(model.classes_)
+
+    @classmethod
+    def supports(cls, vectorizer, model):
+        """Whether this engine can reproduce the given vectorizer/model pair"""
+        from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+        from sklearn.naive_bayes import MultinomialNB
+
+        if isinstance(vectorizer, HashingVectorizer):
+            # Negative features are meaningless to Naive Bayes
+            fitted = not vectorizer.alternate_sign
+        else:
+            fitted = isinstance(vectorizer, TfidfVectorizer) and hasattr(vectorizer, 'vocabulary_')
+        return (
+            fitted
+            and isinstance(model, MultinomialNB)
+            and vectorizer.norm in (None, 'l1', 'l2')
+            and not vectorizer.binary
+            and hasattr(model, 'feature_log_prob_')
+        )
+
+    def transform(self, text):
+        """Return ``(feature_indices, weights)`` of the tf-idf row for ``text``"""
+        if self.hashing:
+            row = self.vectorizer.transform([text])
+            return row.indices.astype(np.intp), row.data.astype(np.float64)
+        vocabulary = self.vocabulary
+        counts = {}
+        for term in self.analyzer(text):
+            index = vocabulary.get(term)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+
+        # scipy's ``X @ idf_diag`` emits each row's columns in descending order;
+        # keeping that order makes every later sum bit-identical to sklearn's
+        indices = sorted(counts, reverse=True)
+        weights = [float(counts[index]) for index in indices]
+        if self.sublinear_tf:
+            weights = [math.log(weight) + 1 for weight in weights]
+        if self.use_idf:
+            idf = self.idf_list
+            weights = [weight * idf[index] for index, weight in zip(indices, weights)]
+        if self.norm == 'l2':
+            # Sequential sum of squares, matching sklearn's row normalization loop
+            norm = math.sqrt(sum(weight * weight for weight in weights))
+            if norm != 0.0:
+                weights = [weight / norm for weight in weights]
+        elif self.norm == 'l1':
+            norm = sum(abs(weight) for weight in weights)
+            if norm != 0.0:
+                weights = [weight / norm for weight in weights]
+        return np.array(indices, dtype=np.intp), np.array(weights, dtype=np.float64)
+
+    def joint_log_likelihood(self, indices, weights):
+        """Unnormalized class log-likelihoods for one sparse tf-idf row"""
+        if not len(indices):
+            return self.class_log_prior.copy()
+        # Summing the weighted rows along axis 0 accumulates them one after the
+        # other in row order, exactly like scipy's CSR-times-dense product
+        jll = (weights[:, np.newaxis] * self.feature_log_prob[indices]).sum(axis=0)
+        jll += self.class_log_prior
+        return jll
+
+    def predict_proba(self, text):
+        """Class probabilities for ``text``, ordered like ``classes``"""
+        jll = self.joint_log_likelihood(*self.transform(text))
+        return np.exp(jll - log_sum_exp(jll))
+
+    def predict_proba_batch(self, texts):
+        """Class probabilities for many texts, one row per text.
+
+        The texts are vectorized with one ``transform`` call into a sparse
+        matrix, which is multiplied by ``feature_log_prob`` once, as sklearn's
+        ``predict_proba`` does, without its per-call validation.
+        """
+        if not texts:
+            return np.empty((0, len(self.classes)))
+        jll = np.asarray(self.vectorizer.transform(texts) @ self.feature_log_prob)
+        jll += self.class_log_prior
+        jll_max = jll.max(axis=1, keepdims=True)
+        log_prob_x = np.log(np.exp(jll - jll_max).sum(axis=1, keepdims=True)) + jll_max
+        return np.exp(jll - log_prob_x)
+
+    def top_k(self, text, k=3):
+        """Return ``[(class, probability), ...]`` for the ``k`` most likely classes"""
+        probabilities = self.predict_proba(text)
+        return [(self.classes[i], float(probabilities[i])) for i in top_k_indices(probabilities, k)]
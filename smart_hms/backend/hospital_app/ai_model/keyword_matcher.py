@@ -0,0 +1,124 @@
+"""Compiled multi-pattern keyword matching for the symptom checker catalog"""
+from collections import deque
+
+# Below this many distinct keywords, probing each one with C-level ``in`` beats a
+# per-character automaton walk in Python; above it the automaton's single pass wins.
+AUTOMATON_MIN_PATTERNS = 150
+
+
+class KeywordMatcher:
+    """Keyword catalog compiled into a deduplicated pattern table and an Aho-Corasick automaton.
+
+    Each distinct keyword is looked for once per text, whichever conditions share
+    it, and the resulting hit set is turned into per-condition hit counts through
+    precomputed owner tables. Large catalogs are scanned with the automaton in a
+    single left-to-right pass, so cost grows with the text length rather than with
+    the number of keywords. Matching keeps the substring semantics of
+    ``keyword in text``.
+    """
+
+    def __init__(self, catalog, use_automaton=None):
+        self.catalog = catalog
+        self.conditions = tuple(catalog.keys())
+        self.patterns = []
+        self._keyword_owners = []   # pattern id -> condition indices (one per occurrence)
+        self._required_owners = []  # pattern id -> condition indices (deduplicated)
+        self._required_counts = []  # condition index -> number of distinct required keywords
+
+        pattern_ids = {}
+
+        def pattern_id(pattern):
+            if pattern not in pattern_ids:
+                pattern_ids[pattern] = len(self.patterns)
+                self.patterns.append(pattern)
+                self._keyword_owners.append([])
+                self._required_owners.append([])
+            return pattern_ids[pattern]
+
+        for index, condition in enumerate(self.conditions):
+            config = catalog[condition]
+            for keyword in config['keywords']:
+                self._keyword_owners[pattern_id(keyword)].append(index)
+            required = set(config.get('required', ()))
+            for keyword in required:
+                self._required_owners[pattern_id(keyword)].append(index)
+            self._required_counts.append(len(required))
+
+        self._keyword_owners = tuple(tuple(owners) for owners in self._keyword_owners)
+        self._required_owners = tuple(tuple(owners) for owners in self._required_owners)
+        self._required_counts = tuple(self._required_counts)
+        self._indexed_patterns = tuple(enumerate(self.patterns))
+        if use_automaton is None:
+            use_automaton = len(self.patterns) >= AUTOMATON_MIN_PATTERNS
+        self.use_automaton = use_automaton
+        if use_automaton:
+            self._build_automaton()
+
+    def _build_automaton(self):
+        """Build the goto/fail trie and fold it into a deterministic transition table"""
+        goto = [{}]
+        outputs = [set()]
+        for pid, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(pid)
+
+        # Breadth-first so every failure target is complete before it is copied
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            transitions = dict(delta[fail[state]])
+            for char, next_state in goto[state].items():
+                fail[next_state] = delta[fail[state]].get(char, 0)
+                outputs[next_state] |= outputs[fail[next_state]]
+                transitions[char] = next_state
+                queue.append(next_state)
+            delta[state] = transitions
+
+        self._delta = tuple(delta)
+        self._outputs = tuple(tuple(sorted(found)) for found in outputs)
+
+    def find(self, text):
+        """Return the set of pattern ids that occur anywhere in ``text``"""
+        if not self.use_automaton:
+            return {pid for pid, pattern in self._indexed_patterns if pattern in text}
+        delta = self._delta
+        outputs = self._outputs
+        hits = set()
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            found = outputs[state]
+            if found:
+                hits.update(found)
+        return hits
+
+    def match_counts(self, text):
+        """Return ``{condition: matched keyword count}`` in catalog order.
+
+        Only conditions whose required keywords are all present and that match
+        at least one keyword are included.
+        """
+        keyword_hits = {}
+        required_hits = {}
+        for pid in self.find(text):
+            for index in self._keyword_owners[pid]:
+                keyword_hits[index] = keyword_hits.get(index, 0) + 1
+            for index in self._required_owners[pid]:
+                required_hits[index] = required_hits.get(index, 0) + 1
+
+        return {
+            self.conditions[index]: keyword_hits[index]
+            for index in sorted(keyword_hits)
+            if required_hits.get(index, 0) == self._required_counts[index]
+        }
@@ -0,0 +1,150 @@
+"""Versioned on-disk store of symptom model artifacts.
+
+Layout of the store directory::
+
+    symptom_model/
+        CURRENT                 name of the live version
+        train.lock              held while a trainer runs
+        20261018T101500-3f2a.../  one artifact directory per version
+
+A new version is written to a temporary directory, renamed into place and only
+then published by atomically replacing ``CURRENT``. Readers therefore always
+see a complete artifact, and running processes notice a new version by
+``stat``-ing ``CURRENT``.
+"""
+import contextlib
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CURRENT_NAME = 'CURRENT'
+LOCK_NAME = 'train.lock'
+TEMP_PREFIX = '.tmp-'
+KEEP_VERSIONS = 3
+# Same as artifacts.MANIFEST_NAME; not imported from there so that checking
+# for a new version (on every request) does not import NumPy
+MANIFEST_NAME = 'manifest.json'
+
+
+class TrainingInProgress(Exception):
+    """Another process holds the trainer lock"""
+
+
+def current_version(root):
+    """Name of the published version, or None"""
+    try:
+        with open(os.path.join(root, CURRENT_NAME)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def current_artifact_path(root):
+    """Directory of the live artifact, or None if nothing has been published.
+
+    A store without ``CURRENT`` but with a manifest at its root is a single,
+    unversioned artifact as written by earlier releases.
+    """
+    if not os.path.exists(root):
+        return None
+    version = current_version(root)
+    if version is not None:
+        return os.path.join(root, version)
+    if os.path.isfile(os.path.join(root, MANIFEST_NAME)):
+        return root
+    return None
+
+
+def marker_state(root):
+    """Cheap fingerprint of ``CURRENT``; it changes whenever a version is published"""
+    try:
+        stat = os.stat(os.path.join(root, CURRENT_NAME))
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def publish_artifact(root, vectorizer, model, conditions, keep=KEEP_VERSIONS, **metadata):
+    """Save a new artifact version and make it the live one.
+
+    Returns ``(version, manifest)``. Only the ``keep`` most recent versions are
+    kept; processes still mapping a removed version keep their open pages.
+    """
+    from .artifacts import ARRAY_FILES, save_artifact
+
+    os.makedirs(root, exist_ok=True)
+    temp_path = os.path.join(root, f'{TEMP_PREFIX}{uuid.uuid4().hex}')
+    try:
+        manifest = save_artifact(temp_path, vectorizer, model, conditions, **metadata)
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        version = f"{timestamp}-{manifest['model_version']}"
+        os.replace(temp_path, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(temp_path, ignore_errors=True)
+        raise
+
+    marker_path = os.path.join(root, CURRENT_NAME)
+    with open(marker_path + '.tmp', 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(marker_path + '.tmp', marker_path)
+    logger.info(f"Published symptom model version {version}")
+
+    prune_versions(root, keep)
+
+    # A single unversioned artifact from an earlier release is superseded now;
+    # the manifest goes first so it is never seen without its arrays
+    for name in (MANIFEST_NAME, *ARRAY_FILES):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(root, name))
+    return version, manifest
+
+
+def list_versions(root):
+    """Published version directories, oldest first"""
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return []
+    return sorted(
+        name for name in names
+        if not name.startswith(TEMP_PREFIX) and os.path.isfile(os.path.join(root, name, MANIFEST_NAME))
+    )
+
+
+def prune_versions(root, keep=KEEP_VERSIONS):
+    """Remove all but the ``keep`` newest versions, never the live one"""
+    live = current_version(root)
+    for name in list_versions(root)[:-keep or None]:
+        if name != live:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+@contextlib.contextmanager
+def trainer_lock(root, blocking=True):
+    """Hold the store's trainer lock, so only one process per node trains.
+
+    With ``blocking=False``, raises TrainingInProgress if another process
+    holds it.
+    """
+    os.makedirs(root, exist_ok=True)
+    fd = os.open(os.path.join(root, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                raise TrainingInProgress(f"Another process is training the model in {root}") from None
+        yield
+    finally:
+        os.close(fd)
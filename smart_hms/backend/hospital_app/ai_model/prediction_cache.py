@@ -0,0 +1,174 @@
+"""Two-tier cache for symptom checker predictions"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Symptom descriptions are lists of phrases separated by commas, semicolons or lines
+_PHRASE_SEPARATORS = re.compile(r'[,;\n]+')
+
+
+def normalize_symptoms(symptoms):
+    """Return the canonical form of a symptom description.
+
+    The text is lowercased and split into phrases; each phrase is
+    whitespace-collapsed, and empty and duplicate phrases are dropped before
+    the rest are sorted. Word order inside a phrase is kept, since keywords
+    such as "shortness of breath" depend on it.
+    """
+    phrases = {' '.join(phrase.split()) for phrase in _PHRASE_SEPARATORS.split(symptoms.lower())}
+    phrases.discard('')
+    return ', '.join(sorted(phrases))
+
+
+def copy_prediction(prediction):
+    """Copy a prediction dict so callers cannot modify a cached entry"""
+    return {
+        **prediction,
+        'conditions': list(prediction['conditions']),
+        'confidence': dict(prediction['confidence']),
+    }
+
+
+class LRUCache:
+    """Bounded least-recently-used mapping whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, max_size, ttl, timer=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.timer = timer
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self.timer():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (self.timer() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class PredictionCache:
+    """Prediction cache with an in-process LRU tier and an optional shared tier.
+
+    The shared tier is any Django cache (``django.core.cache.caches[alias]``),
+    so entries can be shared between workers and nodes. Entries are keyed on
+    the model version and the normalized symptom text: when the version
+    changes, the local tier is flushed and the old shared entries are simply
+    never looked up again until they expire.
+    """
+
+    key_prefix = 'symptom-prediction'
+
+    def __init__(self, max_size=1024, ttl=300, shared_cache=None, shared_ttl=3600):
+        self.local = LRUCache(max_size, ttl)
+        self.shared_cache = shared_cache
+        self.shared_ttl = shared_ttl
+        self.version = None
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        """Build the cache from the ``SYMPTOM_CHECKER_CACHE`` setting"""
+        from django.conf import settings
+        from django.core.cache import caches
+
+        options = getattr(settings, 'SYMPTOM_CHECKER_CACHE', {})
+        alias = options.get('SHARED_ALIAS')
+        return cls(
+            max_size=options.get('LOCAL_MAX_SIZE', 1024),
+            ttl=options.get('LOCAL_TTL', 300),
+            shared_cache=caches[alias] if alias else None,
+            shared_ttl=options.get('SHARED_TTL', 3600),
+        )
+
+    def shared_key(self, version, symptoms_key):
+        """Django cache key for an entry; hashed to stay within backend key limits"""
+        digest = hashlib.sha256(symptoms_key.encode()).hexdigest()
+        return f'{self.key_prefix}:{version}:{digest}'
+
+    def _check_version(self, version):
+        if version != self.version:
+            self.local.clear()
+            self.version = version
+
+    def get(self, version, symptoms_key):
+        """Return a copy of the cached prediction, or None on a miss"""
+        with self._lock:
+            self._check_version(version)
+            prediction = self.local.get(symptoms_key)
+            if prediction is not None:
+                self.local_hits += 1
+                return copy_prediction(prediction)
+
+        prediction = None
+        if self.shared_cache is not None:
+            try:
+                prediction = self.shared_cache.get(self.shared_key(version, symptoms_key))
+            except Exception as e:
+                logger.warning(f"Shared prediction cache unavailable: {e}")
+
+        with self._lock:
+            if prediction is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            if version == self.version:
+                self.local.set(symptoms_key, prediction)
+        return copy_prediction(prediction)
+
+    def set(self, version, symptoms_key, prediction):
+        """Store a prediction in both tiers"""
+        prediction = copy_prediction(prediction)
+        with self._lock:
+            self._check_version(version)
+            self.local.set(symptoms_key, prediction)
+
+        if self.shared_cache is not None:
+            try:
+                self.shared_cache.set(self.shared_key(version, symptoms_key), prediction, self.shared_ttl)
+            except Exception as e:
+                logger.warning(f"Shared prediction cache unavailable: {e}")
+
+    def clear(self):
+        """Drop the local tier and reset the counters"""
+        with self._lock:
+            self.local.clear()
+            self.local_hits = self.shared_hits = self.misses = 0
+
+    def stats(self):
+        """Hit/miss counters and current size of the local tier"""
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            return {
+                'version': self.version,
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': (self.local_hits + self.shared_hits) / lookups if lookups else 0.0,
+                'local_size': len(self.local),
+                'local_max_size': self.local.max_size,
+                'shared': self.shared_cache is not None,
+            }
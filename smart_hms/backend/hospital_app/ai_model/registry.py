@@ -0,0 +1,116 @@
+"""Process-wide registry for the shared SymptomCheckerAI instance"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .model_store import current_version, marker_state
+from .symptom_checker import SymptomCheckerAI, model_store_path
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_symptom_checker = None
+_marker_state = None  # model store version marker when the checker was loaded
+_next_check = 0.0
+
+
+def _reload_interval():
+    return getattr(settings, 'SYMPTOM_MODEL_RELOAD_INTERVAL', 5.0)
+
+
+def get_symptom_checker():
+    """Return the shared symptom checker, loading the model on first use.
+
+    Loading maps the model artifact (or retrains the model), so it is done
+    once per process under a lock; every later call is a plain attribute read,
+    plus, at most every ``SYMPTOM_MODEL_RELOAD_INTERVAL`` seconds, a ``stat``
+    of the model store's version marker to pick up newly published models.
+    """
+    global _symptom_checker, _marker_state, _next_check
+    checker = _symptom_checker
+    if checker is None:
+        with _lock:
+            checker = _symptom_checker
+            if checker is None:
+                logger.info("Loading shared symptom checker model")
+                # Read before loading, so a version published meanwhile is still picked up
+                state = marker_state(model_store_path())
+                checker = SymptomCheckerAI()
+                _symptom_checker = checker
+                _marker_state = state
+                _next_check = time.monotonic() + _reload_interval()
+    elif time.monotonic() >= _next_check:
+        checker = _swap_if_published(checker)
+    return checker
+
+
+def _swap_if_published(checker):
+    """Replace ``checker`` with the published model if a new version appeared.
+
+    Runs between requests: requests already holding the old instance finish
+    with it, later ones get the new one. If the new model cannot be loaded the
+    old one stays in service.
+    """
+    global _symptom_checker, _marker_state, _next_check
+    with _lock:
+        if _symptom_checker is not checker:
+            return _symptom_checker
+        _next_check = time.monotonic() + _reload_interval()
+        state = marker_state(checker.artifact_path)
+        if state == _marker_state:
+            return checker
+        _marker_state = state
+        if current_version(checker.artifact_path) == checker.artifact_version:
+            return checker
+        try:
+            replacement = SymptomCheckerAI.from_published_model()
+            _warm_up(replacement)
+        except Exception as e:
+            logger.error(f"Could not load the newly published symptom model: {e}")
+            return checker
+        logger.info(f"Swapped in symptom model {replacement.artifact_version}")
+        _symptom_checker = replacement
+        return replacement
+
+
+def reset_symptom_checker():
+    """Drop the shared instance so the next access reloads the model"""
+    global _symptom_checker, _marker_state, _next_check
+    with _lock:
+        _symptom_checker = None
+        _marker_state = None
+        _next_check = 0.0
+
+
+# Synthetic inputs that exercise keyword matching and the ML path during warmup
+WARMUP_SYMPTOMS = (
+    'fever headache fatigue',
+    'cough, sore throat, runny nose',
+    'chest pain shortness of breath',
+    'nausea vomiting diarrhea',
+    'itchy rash',
+)
+
+
+def warm_up_symptom_checker():
+    """Load the shared symptom checker and run a few predictions through it.
+
+    Called in the gunicorn master before forking, so the model, the inference
+    engine and everything they allocate on first use are built once and
+    shared copy-on-write with every worker. The synthetic predictions are
+    dropped from the cache afterwards.
+    """
+    checker = _warm_up(get_symptom_checker())
+    logger.info("Symptom checker warmed up")
+    return checker
+
+
+def _warm_up(checker):
+    """Run the warmup predictions through ``checker`` and forget their results"""
+    checker.predict_batch(list(WARMUP_SYMPTOMS))
+    for symptoms in WARMUP_SYMPTOMS:
+        checker.predict(symptoms)
+    checker._get_prediction_cache().clear()
+    return checker
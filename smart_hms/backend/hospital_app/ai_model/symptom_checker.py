@@ -1,35 +1,235 @@
-import pandas as pd
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.model_selection import train_test_split
 import pickle
 import os
+import hashlib
+import importlib
+import json
 import logging
+from types import MappingProxyType
 from django.conf import settings
+from .keyword_matcher import KeywordMatcher
+from .prediction_cache import PredictionCache, copy_prediction, normalize_symptoms
 
 logger = logging.getLogger(__name__)
 
+# pandas, scikit-learn and the NumPy-based model modules are imported on first
+# use rather than with this module, so importing the views (and every manage.py
+# command, migration and worker boot) does not pay for them. Names resolve as
+# module attributes (PEP 562), so they can still be patched as before.
+_LAZY_IMPORTS = {
+    'pd': ('pandas', None),
+    'TfidfVectorizer': ('sklearn.feature_extraction.text', 'TfidfVectorizer'),
+    'MultinomialNB': ('sklearn.naive_bayes', 'MultinomialNB'),
+    'train_test_split': ('sklearn.model_selection', 'train_test_split'),
+    'load_artifact': ('.artifacts', 'load_artifact'),
+    'current_artifact_path': ('.model_store', 'current_artifact_path'),
+    'publish_artifact': ('.model_store', 'publish_artifact'),
+    'trainer_lock': ('.model_store', 'trainer_lock'),
+    'TrainingInProgress': ('.model_store', 'TrainingInProgress'),
+    'TrainingStore': ('.training_store', 'TrainingStore'),
+    'NaiveBayesInference': ('.inference', 'NaiveBayesInference'),
+    'top_k_indices': ('.inference', 'top_k_indices'),
+}
+
+
+def __getattr__(name):
+    """Import a lazily loaded dependency on first access"""
+    try:
+        module_name, attribute = _LAZY_IMPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = importlib.import_module(module_name, __package__)
+    if attribute is not None:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def _require(*names):
+    """Make lazily loaded dependencies available as module globals"""
+    for name in names:
+        if name not in globals():
+            __getattr__(name)
+
+
+# Conditions covered by the keyword matcher, in catalog order
+FALLBACK_CONDITIONS = (
+    'flu', 'common_cold', 'covid_19', 'allergies', 'sinusitis',
+    'pneumonia', 'gastroenteritis', 'arthritis', 'dermatitis',
+    'heart_attack', 'migraine', 'asthma', 'strep_throat', 'diabetes',
+    'food_poisoning', 'back_problems', 'hypertension', 'depression', 'insomnia', 'ibs'
+)
+
+# Improved keyword-based conditions with better matching
+_KEYWORD_CATALOG = {
+    'flu': {
+        'keywords': ['fever', 'headache', 'fatigue', 'body aches', 'chills', 'muscle aches', 'cough', 'sore throat'],
+        'required': ['fever'],  # Fever is required for flu
+        'weight': 1.0
+    },
+    'common_cold': {
+        'keywords': ['runny nose', 'sneezing', 'sore throat', 'congestion', 'cough', 'mild fever'],
+        'required': ['runny nose', 'sneezing'],
+        'weight': 1.0
+    },
+    'covid_19': {
+        'keywords': ['fever', 'dry cough', 'loss of taste', 'loss of smell', 'fatigue', 'shortness of breath'],
+        'required': ['fever', 'cough'],
+        'weight': 1.05  # Slightly reduced weight to prevent over-prediction
+    },
+    'allergies': {
+        'keywords': ['sneezing', 'itchy eyes', 'runny nose', 'watery eyes', 'congestion', 'itchy nose'],
+        'required': ['sneezing', 'itchy eyes'],
+        'weight': 1.0
+    },
+    'sinusitis': {
+        'keywords': ['facial pain', 'sinus pressure', 'headache', 'congestion', 'runny nose', 'thick mucus'],
+        'required': ['facial pain', 'congestion'],
+        'weight': 1.0
+    },
+    'pneumonia': {
+        'keywords': ['cough', 'chest pain', 'shortness of breath', 'difficulty breathing', 'breathing problems'],
+        'required': ['cough', 'chest pain'],
+        'weight': 1.0
+    },
+    'gastroenteritis': {
+        'keywords': ['nausea', 'vomiting', 'diarrhea', 'stomach pain', 'abdominal pain', 'cramps'],
+        'required': ['nausea', 'vomiting'],
+        'weight': 1.0
+    },
+    'arthritis': {
+        'keywords': ['joint pain', 'swelling', 'stiffness', 'limited movement', 'inflammation'],
+        'required': ['joint pain'],
+        'weight': 1.0
+    },
+    'dermatitis': {
+        'keywords': ['rash', 'itching', 'redness', 'skin', 'irritation', 'dry skin'],
+        'required': ['rash'],
+        'weight': 1.0
+    },
+    'heart_attack': {
+        'keywords': ['chest pain', 'shortness of breath', 'sweating', 'left arm pain', 'jaw pain', 'pressure', 'radiating'],
+        'required': ['chest pain', 'shortness of breath'],  # Both required
+        'weight': 1.2  # Higher weight for serious condition
+    },
+    'migraine': {
+        'keywords': ['headache', 'blurred vision', 'nausea', 'sensitivity', 'throbbing', 'visual disturbances'],
+        'required': ['headache'],
+        'weight': 1.0
+    },
+    'asthma': {
+        'keywords': ['difficulty breathing', 'wheezing', 'cough', 'chest tightness', 'breathing problems'],
+        'required': ['wheezing', 'difficulty breathing'],
+        'weight': 1.0
+    },
+    'strep_throat': {
+        'keywords': ['sore throat', 'fever', 'swollen glands', 'difficulty swallowing', 'white patches'],
+        'required': ['sore throat', 'fever'],
+        'weight': 1.0
+    },
+    'diabetes': {
+        'keywords': ['frequent urination', 'thirst', 'fatigue', 'weight loss', 'excessive thirst', 'blurred vision'],
+        'required': ['frequent urination', 'thirst'],
+        'weight': 1.0
+    },
+    'food_poisoning': {
+        'keywords': ['stomach pain', 'nausea', 'vomiting', 'diarrhea', 'cramps', 'abdominal pain'],
+        'required': ['nausea', 'vomiting'],
+        'weight': 1.0
+    },
+    'back_problems': {
+        'keywords': ['back pain', 'stiffness', 'limited movement', 'difficulty moving', 'muscle spasms'],
+        'required': ['back pain'],
+        'weight': 1.0
+    },
+    'hypertension': {
+        'keywords': ['high blood pressure', 'chest pain', 'headache', 'dizziness', 'elevated blood pressure'],
+        'required': ['high blood pressure'],
+        'weight': 1.0
+    },
+    'depression': {
+        'keywords': ['anxiety', 'depression', 'mood changes', 'loss of interest', 'sleep problems'],
+        'required': ['depression'],
+        'weight': 1.0
+    },
+    'insomnia': {
+        'keywords': ['sleep problems', 'fatigue', 'irritability', 'difficulty sleeping', 'difficulty concentrating'],
+        'required': ['sleep problems'],
+        'weight': 1.0
+    },
+    'ibs': {
+        'keywords': ['abdominal pain', 'bloating', 'nausea', 'diarrhea', 'constipation', 'cramping'],
+        'required': ['abdominal pain', 'bloating'],
+        'weight': 1.0
+    },
+}
+
+
+def _freeze_catalog(catalog):
+    """Return a read-only copy of a keyword catalog safe to share between instances and threads"""
+    return MappingProxyType({
+        condition: MappingProxyType({
+            'keywords': tuple(config['keywords']),
+            'required': tuple(config.get('required', ())),
+            'weight': config.get('weight', 1.0),
+        })
+        for condition, config in catalog.items()
+    })
+
+
+KEYWORD_CONDITIONS = _freeze_catalog(_KEYWORD_CATALOG)
+KEYWORD_MATCHER = KeywordMatcher(KEYWORD_CONDITIONS)
+# Part of every prediction cache version, so catalog edits invalidate cached predictions
+KEYWORD_CATALOG_VERSION = hashlib.sha256(json.dumps(_KEYWORD_CATALOG, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def model_store_path():
+    """Directory holding the published symptom model versions"""
+    return os.path.join(settings.BASE_DIR, 'hospital_app', 'ai_model', 'symptom_model')
+
 
 class SymptomCheckerAI:
     """AI-powered symptom checker using scikit-learn with improved accuracy"""
     
-    def __init__(self):
+    # Number of ML predictions considered per input
+    top_k = 3
+    
+    def __init__(self, load_model=True):
         self.model = None
         self.vectorizer = None
         self.conditions = []
         self.keyword_conditions = {}  # Initialize keyword conditions
-        self.model_path = os.path.join(settings.BASE_DIR, 'hospital_app', 'ai_model', 'symptom_model.pkl')
+        self.model_version = None
+        self.artifact_version = None  # published version directory the model came from
+        self.artifact_path = model_store_path()
+        self.model_path = os.path.join(settings.BASE_DIR, 'hospital_app', 'ai_model', 'symptom_model.pkl')  # legacy pickle
         self.data_path = os.path.join(settings.BASE_DIR, 'hospital_app', 'ai_model', 'symptom_data.csv')
         
         # Always initialize keyword matching (used as fallback/primary method)
         self._create_fallback_model()
         
         # Initialize with improved data if no model exists
-        self._initialize_model()
+        if load_model:
+            self._initialize_model()
+    
+    @classmethod
+    def from_published_model(cls, version=None):
+        """Build a checker from the live published model, or published ``version``, without ever training"""
+        _require('current_artifact_path')
+        checker = cls(load_model=False)
+        if version is None:
+            artifact_dir = current_artifact_path(checker.artifact_path)
+        else:
+            artifact_dir = os.path.join(checker.artifact_path, version)
+            if not os.path.isdir(artifact_dir):
+                raise FileNotFoundError(f"No published symptom model version {version} in {checker.artifact_path}")
+        if artifact_dir is None:
+            raise FileNotFoundError(f"No published symptom model in {checker.artifact_path}")
+        checker._load_artifact(artifact_dir)
+        return checker
     
     def _create_improved_data(self):
         """Create improved symptom-disease data with more examples"""
+        _require('pd')
         # Expanded dataset with more examples per condition
         improved_data = {
             'symptoms': [
@@ -260,23 +460,94 @@ class SymptomCheckerAI:
     def _initialize_model(self):
         """Initialize or load the symptom checker model"""
         try:
+            if self._load_published_model():
+                return
+            
             if os.path.exists(self.model_path):
+                # Legacy pickle: load it once and migrate it to the artifact format
                 with open(self.model_path, 'rb') as f:
                     model_data = pickle.load(f)
                     self.model = model_data['model']
                     self.vectorizer = model_data['vectorizer']
                     self.conditions = model_data['conditions']
                     logger.info(f"Loaded existing model with {len(self.conditions)} conditions")
+                self._migrate_legacy_model()
             else:
                 logger.info("No existing model found, training new model")
-                self._train_model()
+                self._train_model_exclusively()
         except Exception as e:
             logger.error(f"Error loading model: {e}")
+            self._train_model_exclusively()
+    
+    def _load_published_model(self):
+        """Load the live model from the model store; return whether one was loaded"""
+        _require('current_artifact_path')
+        artifact_dir = current_artifact_path(self.artifact_path)
+        if artifact_dir is None:
+            return False
+        try:
+            self._load_artifact(artifact_dir)
+            return True
+        except Exception as e:
+            logger.error(f"Error loading model artifact: {e}")
+            return False
+    
+    def _train_model_exclusively(self):
+        """Train the model unless another process on this node already is.
+        
+        A process that finds the trainer lock taken keeps using keyword matching;
+        the registry swaps in the other process's model once it is published.
+        """
+        _require('trainer_lock', 'TrainingInProgress')
+        try:
+            with trainer_lock(self.artifact_path, blocking=False):
+                # The lock holder may have published just before we got the lock
+                if not self._load_published_model():
+                    self._train_model()
+        except TrainingInProgress:
+            logger.warning("Symptom model is being trained by another process, using keyword matching meanwhile")
+        except OSError as e:
+            logger.error(f"Could not take the model trainer lock: {e}")
             self._train_model()
     
+    def _load_artifact(self, artifact_dir):
+        """Load the model from a memory-mapped artifact directory"""
+        _require('load_artifact')
+        artifact = load_artifact(artifact_dir)
+        self.vectorizer = artifact.build_vectorizer()
+        self.model = artifact.build_model()
+        self.conditions = list(artifact.conditions)
+        self._set_model_version(artifact.model_version)
+        self.artifact_version = os.path.basename(artifact_dir) if artifact_dir != self.artifact_path else None
+        logger.info(f"Loaded model artifact {self.model_version} with {len(self.conditions)} conditions")
+    
+    def _save_artifact(self, **metadata):
+        """Publish the current model as a new version in the model store"""
+        _require('NaiveBayesInference', 'publish_artifact')
+        if not NaiveBayesInference.supports(self.vectorizer, self.model):
+            logger.warning("Model type not supported by the artifact format, not saving")
+            return
+        version, manifest = publish_artifact(self.artifact_path, self.vectorizer, self.model, self.conditions, **metadata)
+        self._set_model_version(manifest['model_version'])
+        self.artifact_version = version
+        logger.info(f"Model {self.model_version} published as {version} in {self.artifact_path}")
+    
+    def _set_model_version(self, version):
+        """Record the version of the currently loaded model/vectorizer pair"""
+        self.model_version = version
+        self._versioned_model = (self.model, self.vectorizer)
+    
+    def _migrate_legacy_model(self):
+        """Convert a loaded legacy pickle model to the artifact format"""
+        try:
+            self._save_artifact(migrated_from=os.path.basename(self.model_path))
+        except Exception as e:
+            logger.error(f"Error migrating legacy model: {e}")
+    
     def _train_model(self):
         """Train the symptom checker model with improved data"""
         try:
+            _require('pd', 'TfidfVectorizer', 'MultinomialNB', 'train_test_split')
             import os
             try:
                 fd = os.open('debug_trace.txt', os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
@@ -285,20 +556,16 @@ class SymptomCheckerAI:
                 fd = None
 
             # Load or create data
-            if os.path.exists(self.data_path):
-                if fd: os.write(fd, b"Loading existing data\n")
-                df = pd.read_csv(self.data_path)
-                logger.info(f"Loaded existing data with {len(df)} examples")
-            else:
-                if fd: os.write(fd, b"Creating improved data\n")
-                df = self._create_improved_data()
+            if fd: os.write(fd, b"Loading built-in data\n")
+            df = self._built_in_examples()
             
-            # Prepare data
-            X = df['symptoms']
-            y = df['condition']
+            # Prepare data: the built-in examples, then those exported from medical records
+            X = list(df['symptoms'])
+            y = list(df['condition'])
+            stored = self._read_training_store(X, y)
             
             # Get unique conditions
-            self.conditions = sorted(y.unique().tolist())
+            self.conditions = sorted(set(y))
             if fd: os.write(fd, f"Conditions: {self.conditions}\n".encode())
             logger.info(f"Training model for {len(self.conditions)} conditions: {self.conditions}")
             
@@ -330,16 +597,7 @@ class SymptomCheckerAI:
             
             # Save model
             if fd: os.write(fd, b"Saving model\n")
-            model_data = {
-                'model': self.model,
-                'vectorizer': self.vectorizer,
-                'conditions': self.conditions
-            }
-            
-            os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(model_data, f)
-            logger.info(f"Model saved to {self.model_path}")
+            self._save_artifact(accuracy=accuracy, training_examples=len(X), stored_examples=stored)
             
             if fd: 
                 os.write(fd, b"Finished _train_model success\n")
@@ -357,211 +615,266 @@ class SymptomCheckerAI:
             # Fallback to improved keyword matching
             self._create_fallback_model()
     
+    def _built_in_examples(self):
+        """DataFrame of the built-in examples, read from data_path or created there"""
+        _require('pd')
+        if os.path.exists(self.data_path):
+            df = pd.read_csv(self.data_path)
+            logger.info(f"Loaded existing data with {len(df)} examples")
+            return df
+        return self._create_improved_data()
+    
+    def _read_training_store(self, texts, labels):
+        """Append the examples of the training store (settings.SYMPTOM_TRAINING_STORE) to ``texts`` and ``labels``; returns their number"""
+        root = getattr(settings, 'SYMPTOM_TRAINING_STORE', None)
+        if not root:
+            return 0
+        _require('TrainingStore')
+        try:
+            examples, _ = TrainingStore(root).read()
+            stored = list(examples)
+        except (OSError, ValueError) as e:
+            # Still better than no model at all
+            logger.error(f"Could not read the training store, training on the built-in examples only: {e}")
+            return 0
+        texts.extend(symptoms for symptoms, _ in stored)
+        labels.extend(condition for _, condition in stored)
+        if stored:
+            logger.info(f"Read {len(stored)} training examples from {root}")
+        return len(stored)
+    
     def _create_fallback_model(self):
         """Create an improved fallback model based on keyword matching"""
-        self.conditions = [
-            'flu', 'common_cold', 'covid_19', 'allergies', 'sinusitis',
-            'pneumonia', 'gastroenteritis', 'arthritis', 'dermatitis',
-            'heart_attack', 'migraine', 'asthma', 'strep_throat', 'diabetes',
-            'food_poisoning', 'back_problems', 'hypertension', 'depression', 'insomnia', 'ibs'
-        ]
+        # The catalog is built once at import time and shared read-only
+        self.conditions = list(FALLBACK_CONDITIONS)
+        self.keyword_conditions = KEYWORD_CONDITIONS
+    
+    def _get_inference_engine(self):
+        """Return the NumPy inference engine for the loaded model, or None if unsupported"""
+        engine = getattr(self, '_inference_engine', None)
+        if engine is not None and engine.model is self.model and engine.vectorizer is self.vectorizer:
+            return engine
+        _require('NaiveBayesInference')
+        engine = None
+        if NaiveBayesInference.supports(self.vectorizer, self.model):
+            engine = NaiveBayesInference(self.vectorizer, self.model)
+        self._inference_engine = engine
+        return engine
+    
+    def _get_prediction_cache(self):
+        """Return this instance's prediction cache, creating it on first use"""
+        cache = getattr(self, '_prediction_cache', None)
+        if cache is None:
+            cache = PredictionCache.from_settings()
+            self._prediction_cache = cache
+        return cache
+    
+    def _cache_version(self):
+        """Version that cached predictions are keyed on, or None if they can't be cached.
         
-        # Improved keyword-based conditions with better matching
-        self.keyword_conditions = {
-            'flu': {
-                'keywords': ['fever', 'headache', 'fatigue', 'body aches', 'chills', 'muscle aches', 'cough', 'sore throat'],
-                'required': ['fever'],  # Fever is required for flu
-                'weight': 1.0
-            },
-            'common_cold': {
-                'keywords': ['runny nose', 'sneezing', 'sore throat', 'congestion', 'cough', 'mild fever'],
-                'required': ['runny nose', 'sneezing'],
-                'weight': 1.0
-            },
-            'covid_19': {
-                'keywords': ['fever', 'dry cough', 'loss of taste', 'loss of smell', 'fatigue', 'shortness of breath'],
-                'required': ['fever', 'cough'],
-                'weight': 1.05  # Slightly reduced weight to prevent over-prediction
-            },
-            'allergies': {
-                'keywords': ['sneezing', 'itchy eyes', 'runny nose', 'watery eyes', 'congestion', 'itchy nose'],
-                'required': ['sneezing', 'itchy eyes'],
-                'weight': 1.0
-            },
-            'sinusitis': {
-                'keywords': ['facial pain', 'sinus pressure', 'headache', 'congestion', 'runny nose', 'thick mucus'],
-                'required': ['facial pain', 'congestion'],
-                'weight': 1.0
-            },
-            'pneumonia': {
-                'keywords': ['cough', 'chest pain', 'shortness of breath', 'difficulty breathing', 'breathing problems'],
-                'required': ['cough', 'chest pain'],
-                'weight': 1.0
-            },
-            'gastroenteritis': {
-                'keywords': ['nausea', 'vomiting', 'diarrhea', 'stomach pain', 'abdominal pain', 'cramps'],
-                'required': ['nausea', 'vomiting'],
-                'weight': 1.0
-            },
-            'arthritis': {
-                'keywords': ['joint pain', 'swelling', 'stiffness', 'limited movement', 'inflammation'],
-                'required': ['joint pain'],
-                'weight': 1.0
-            },
-            'dermatitis': {
-                'keywords': ['rash', 'itching', 'redness', 'skin', 'irritation', 'dry skin'],
-                'required': ['rash'],
-                'weight': 1.0
-            },
-            'heart_attack': {
-                'keywords': ['chest pain', 'shortness of breath', 'sweating', 'left arm pain', 'jaw pain', 'pressure', 'radiating'],
-                'required': ['chest pain', 'shortness of breath'],  # Both required
-                'weight': 1.2  # Higher weight for serious condition
-            },
-            'migraine': {
-                'keywords': ['headache', 'blurred vision', 'nausea', 'sensitivity', 'throbbing', 'visual disturbances'],
-                'required': ['headache'],
-                'weight': 1.0
-            },
-            'asthma': {
-                'keywords': ['difficulty breathing', 'wheezing', 'cough', 'chest tightness', 'breathing problems'],
-                'required': ['wheezing', 'difficulty breathing'],
-                'weight': 1.0
-            },
-            'strep_throat': {
-                'keywords': ['sore throat', 'fever', 'swollen glands', 'difficulty swallowing', 'white patches'],
-                'required': ['sore throat', 'fever'],
-                'weight': 1.0
-            },
-            'diabetes': {
-                'keywords': ['frequent urination', 'thirst', 'fatigue', 'weight loss', 'excessive thirst', 'blurred vision'],
-                'required': ['frequent urination', 'thirst'],
-                'weight': 1.0
-            },
-            'food_poisoning': {
-                'keywords': ['stomach pain', 'nausea', 'vomiting', 'diarrhea', 'cramps', 'abdominal pain'],
-                'required': ['nausea', 'vomiting'],
-                'weight': 1.0
-            },
-            'back_problems': {
-                'keywords': ['back pain', 'stiffness', 'limited movement', 'difficulty moving', 'muscle spasms'],
-                'required': ['back pain'],
-                'weight': 1.0
-            },
-            'hypertension': {
-                'keywords': ['high blood pressure', 'chest pain', 'headache', 'dizziness', 'elevated blood pressure'],
-                'required': ['high blood pressure'],
-                'weight': 1.0
-            },
-            'depression': {
-                'keywords': ['anxiety', 'depression', 'mood changes', 'loss of interest', 'sleep problems'],
-                'required': ['depression'],
-                'weight': 1.0
-            },
-            'insomnia': {
-                'keywords': ['sleep problems', 'fatigue', 'irritability', 'difficulty sleeping', 'difficulty concentrating'],
-                'required': ['sleep problems'],
-                'weight': 1.0
-            },
-            'ibs': {
-                'keywords': ['abdominal pain', 'bloating', 'nausea', 'diarrhea', 'constipation', 'cramping'],
-                'required': ['abdominal pain', 'bloating'],
-                'weight': 1.0
-            },
-        }
+        Predictions are only cached for the built-in keyword catalog combined with
+        no model or with the versioned model that was loaded or saved.
+        """
+        if self.keyword_conditions is not KEYWORD_CONDITIONS:
+            return None
+        if not (self.model and self.vectorizer):
+            return f"keywords-{KEYWORD_CATALOG_VERSION}"
+        versioned_model = getattr(self, '_versioned_model', (None, None))
+        if getattr(self, 'model_version', None) is None or versioned_model[0] is not self.model or versioned_model[1] is not self.vectorizer:
+            return None
+        return f"{self.model_version}-{KEYWORD_CATALOG_VERSION}"
+    
+    def cache_stats(self):
+        """Hit/miss counters of the prediction cache"""
+        return self._get_prediction_cache().stats()
+    
+    def _get_keyword_matcher(self):
+        """Return the compiled keyword matcher for the current keyword catalog"""
+        if self.keyword_conditions is KEYWORD_CONDITIONS:
+            return KEYWORD_MATCHER
+        matcher = getattr(self, '_keyword_matcher', None)
+        if matcher is None or matcher.catalog is not self.keyword_conditions:
+            matcher = KeywordMatcher(self.keyword_conditions)
+            self._keyword_matcher = matcher
+        return matcher
     
     def predict(self, symptoms):
         """Predict conditions based on symptoms with improved accuracy"""
         if not symptoms or not symptoms.strip():
-            return {
-                'conditions': ['general_consultation'],
-                'confidence': {'general_consultation': 0.0},
-                'recommendations': 'Please provide symptom details for analysis.'
-            }
+            return self._empty_prediction()
         
-        symptoms_lower = symptoms.lower().strip()
+        # Predictions are made on the normalized text, so they can be cached under it
+        symptoms_lower = normalize_symptoms(symptoms)
+        if not symptoms_lower:
+            return self._empty_prediction()
+        
+        cache_version = self._cache_version()
+        if cache_version is not None:
+            cached = self._get_prediction_cache().get(cache_version, symptoms_lower)
+            if cached is not None:
+                return cached
         
         # Always use keyword matching first (more reliable with small dataset)
         # Then use ML model if available and confidence is high
         keyword_result = self._predict_keyword_matching(symptoms_lower)
         
         try:
+            probabilities = None
             if self.model and self.vectorizer:
-                # Get ML model prediction
-                symptoms_vectorized = self.vectorizer.transform([symptoms_lower])
-                probabilities = self.model.predict_proba(symptoms_vectorized)[0]
-                
-                class_indices = np.argsort(probabilities)[::-1]
-                top_3_indices = class_indices[:3]
-                ml_conditions = [self.conditions[i] for i in top_3_indices]
-                ml_confidence = {self.conditions[i]: float(probabilities[i]) for i in top_3_indices}
-                
-                # Use ML model if top prediction has high confidence (>0.3)
-                # Otherwise prefer keyword matching
-                top_ml_confidence = ml_confidence.get(ml_conditions[0], 0) if ml_conditions else 0
-                top_keyword_confidence = keyword_result['confidence'].get(keyword_result['conditions'][0], 0) if keyword_result['conditions'] else 0
-                
-                # Require ML confidence to be at least 10% higher than keyword confidence to override
-                if top_ml_confidence > 0.3 and top_ml_confidence > (top_keyword_confidence + 0.1):
-                    # Use ML model result
-                    predicted_conditions = ml_conditions
-                    confidence_scores = ml_confidence
-                    logger.info(f"Using ML model: {predicted_conditions[0]} ({top_ml_confidence:.2%})")
+                # Get ML model prediction, through the NumPy fast path when possible
+                engine = self._get_inference_engine()
+                if engine is not None:
+                    probabilities = engine.predict_proba(symptoms_lower)
                 else:
-                    # Use keyword matching (more reliable)
-                    predicted_conditions = keyword_result['conditions']
-                    confidence_scores = keyword_result['confidence']
-                    logger.info(f"Using keyword matching: {predicted_conditions[0]} ({top_keyword_confidence:.2%})")
-            else:
-                # Use keyword matching
-                predicted_conditions = keyword_result['conditions']
-                confidence_scores = keyword_result['confidence']
-                logger.info(f"Using keyword matching (no model): {predicted_conditions[0] if predicted_conditions else 'none'}")
-            
-            # Ensure we have at least one prediction
-            if not predicted_conditions:
-                predicted_conditions = ['general_consultation']
-                confidence_scores = {'general_consultation': 0.3}
+                    symptoms_vectorized = self.vectorizer.transform([symptoms_lower])
+                    probabilities = self.model.predict_proba(symptoms_vectorized)[0]
             
-            # Generate recommendations
-            recommendations = self._generate_recommendations(predicted_conditions, confidence_scores)
-            
-            return {
-                'conditions': predicted_conditions,
-                'confidence': confidence_scores,
-                'recommendations': recommendations
-            }
+            prediction = self._combine_predictions(keyword_result, probabilities)
             
         except Exception as e:
             logger.error(f"Error in prediction: {e}", exc_info=True)
             # Use keyword matching on error
             return keyword_result
+        
+        if cache_version is not None:
+            self._get_prediction_cache().set(cache_version, symptoms_lower, prediction)
+        return prediction
+    
+    def predict_batch(self, symptoms_list):
+        """Predict conditions for many symptom descriptions at once.
+        
+        Inputs found in the prediction cache are answered from it; the remaining
+        distinct inputs are scored together with a single ``transform`` and a
+        single product with the model's log probabilities: by the NumPy
+        inference engine when the model supports it, otherwise by sklearn's
+        ``predict_proba``. Results are returned in input order, each in the
+        same format as ``predict``.
+        """
+        cache_version = self._cache_version()
+        cache = self._get_prediction_cache() if cache_version is not None else None
+        results = [None] * len(symptoms_list)
+        pending = {}  # normalized text -> indices of the inputs it answers
+        for index, symptoms in enumerate(symptoms_list):
+            symptoms_lower = normalize_symptoms(symptoms) if symptoms else ''
+            if not symptoms_lower:
+                results[index] = self._empty_prediction()
+            elif symptoms_lower in pending:
+                pending[symptoms_lower].append(index)
+            else:
+                cached = cache.get(cache_version, symptoms_lower) if cache is not None else None
+                if cached is not None:
+                    results[index] = cached
+                else:
+                    pending[symptoms_lower] = [index]
+        
+        if not pending:
+            return results
+        
+        texts = list(pending)
+        keyword_results = [self._predict_keyword_matching(symptoms_lower) for symptoms_lower in texts]
+        
+        try:
+            probabilities = [None] * len(texts)
+            if self.model and self.vectorizer:
+                engine = self._get_inference_engine()
+                if engine is not None:
+                    probabilities = engine.predict_proba_batch(texts)
+                else:
+                    probabilities = self.model.predict_proba(self.vectorizer.transform(texts))
+        except Exception as e:
+            logger.error(f"Error in batch prediction: {e}", exc_info=True)
+            # Use keyword matching on error
+            for indices, keyword_result in zip(pending.values(), keyword_results):
+                for index in indices:
+                    results[index] = copy_prediction(keyword_result)
+            return results
+        
+        for (symptoms_lower, indices), keyword_result, row in zip(pending.items(), keyword_results, probabilities):
+            try:
+                prediction = self._combine_predictions(keyword_result, row)
+            except Exception as e:
+                logger.error(f"Error in prediction: {e}", exc_info=True)
+                prediction = keyword_result
+            else:
+                if cache is not None:
+                    cache.set(cache_version, symptoms_lower, prediction)
+            results[indices[0]] = prediction
+            for index in indices[1:]:
+                results[index] = copy_prediction(prediction)
+        return results
+    
+    def _empty_prediction(self):
+        """Prediction returned when no symptoms were provided"""
+        return {
+            'conditions': ['general_consultation'],
+            'confidence': {'general_consultation': 0.0},
+            'recommendations': 'Please provide symptom details for analysis.'
+        }
+    
+    def _combine_predictions(self, keyword_result, probabilities):
+        """Pick between keyword matching and ML probabilities and add recommendations"""
+        if probabilities is not None:
+            _require('top_k_indices')
+            top_indices = top_k_indices(probabilities, self.top_k)
+            ml_conditions = [self.conditions[i] for i in top_indices]
+            ml_confidence = {self.conditions[i]: float(probabilities[i]) for i in top_indices}
+            
+            # Use ML model if top prediction has high confidence (>0.3)
+            # Otherwise prefer keyword matching
+            top_ml_confidence = ml_confidence.get(ml_conditions[0], 0) if ml_conditions else 0
+            top_keyword_confidence = keyword_result['confidence'].get(keyword_result['conditions'][0], 0) if keyword_result['conditions'] else 0
+            
+            # Require ML confidence to be at least 10% higher than keyword confidence to override
+            if top_ml_confidence > 0.3 and top_ml_confidence > (top_keyword_confidence + 0.1):
+                # Use ML model result
+                predicted_conditions = ml_conditions
+                confidence_scores = ml_confidence
+                logger.info(f"Using ML model: {predicted_conditions[0]} ({top_ml_confidence:.2%})")
+            else:
+                # Use keyword matching (more reliable)
+                predicted_conditions = keyword_result['conditions']
+                confidence_scores = keyword_result['confidence']
+                logger.info(f"Using keyword matching: {predicted_conditions[0]} ({top_keyword_confidence:.2%})")
+        else:
+            # Use keyword matching
+            predicted_conditions = keyword_result['conditions']
+            confidence_scores = keyword_result['confidence']
+            logger.info(f"Using keyword matching (no model): {predicted_conditions[0] if predicted_conditions else 'none'}")
+        
+        # Ensure we have at least one prediction
+        if not predicted_conditions:
+            predicted_conditions = ['general_consultation']
+            confidence_scores = {'general_consultation': 0.3}
+        
+        # Generate recommendations
+        recommendations = self._generate_recommendations(predicted_conditions, confidence_scores)
+        
+        return {
+            'conditions': predicted_conditions,
+            'confidence': confidence_scores,
+            'recommendations': recommendations
+        }
     
     def _predict_keyword_matching(self, symptoms_lower):
         """Improved keyword matching prediction"""
         scores = {}
         
-        for condition, config in self.keyword_conditions.items():
+        # One pass over the text yields keyword hit counts for every condition
+        # whose required keywords are all present
+        match_counts = self._get_keyword_matcher().match_counts(symptoms_lower)
+        for condition, matches in match_counts.items():
+            config = self.keyword_conditions[condition]
             keywords = config['keywords']
-            required = config.get('required', [])
             weight = config.get('weight', 1.0)
             
-            # Check if all required keywords are present
-            has_required = all(req in symptoms_lower for req in required)
-            if not has_required:
-                continue  # Skip if required keywords missing
-            
-            # Count matching keywords
-            matches = sum(1 for keyword in keywords if keyword in symptoms_lower)
-            if matches > 0:
-                # Score = (matches / total keywords) * weight
-                # Higher score for more matches
-                base_score = matches / len(keywords)
-                # Bonus for matching all keywords
-                if matches == len(keywords):
-                    base_score = 1.0
-                score = base_score * weight
-                scores[condition] = score
+            # Score = (matches / total keywords) * weight
+            # Higher score for more matches
+            base_score = matches / len(keywords)
+            # Bonus for matching all keywords
+            if matches == len(keywords):
+                base_score = 1.0
+            score = base_score * weight
+            scores[condition] = score
         
         # Sort by score and get top 3
         sorted_conditions = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:3]
@@ -7,6 +7,7 @@ import pickle
 import os
 import logging
 from django.conf import settings
+from .keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -392,25 +393,7 @@ class SymptomCheckerAI:
                 
             else:
                 # Use improved fallback keyword matching
-                scores = {}
-                
-                for condition, config in self.keyword_conditions.items():
-                    keywords = config['keywords']
-                    required = config.get('required', [])
-                    weight = config.get('weight', 1.0)
-                    
-                    # Check if all required keywords are present
-                    has_required = all(req in symptoms_lower for req in required)
-                    
-                    if not has_required:
-                        continue  # Skip if required keywords missing
-                    
-                    # Count matching keywords
-                    matches = sum(1 for keyword in keywords if keyword in symptoms_lower)
-                    if matches > 0:
-                        # Score = (matches / total keywords) * weight
-                        score = (matches / len(keywords)) * weight
-                        scores[condition] = score
+                scores = self._keyword_scores(symptoms_lower)
                 
                 # Sort by score and get top 3
                 sorted_conditions = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:3]
@@ -444,23 +427,23 @@ class SymptomCheckerAI:
             # Use fallback keyword matching on error
             return self._predict_fallback(symptoms_lower)
     
+    def _keyword_scores(self, symptoms_lower):
+        """Score conditions from keyword hit counts found in one pass over the text"""
+        matcher = getattr(self, '_keyword_matcher', None)
+        if matcher is None or matcher.catalog is not self.keyword_conditions:
+            matcher = KeywordMatcher(self.keyword_conditions)
+            self._keyword_matcher = matcher
+        
+        scores = {}
+        for condition, matches in matcher.match_counts(symptoms_lower).items():
+            config = self.keyword_conditions[condition]
+            # Score = (matches / total keywords) * weight
+            scores[condition] = (matches / len(config['keywords'])) * config.get('weight', 1.0)
+        return scores
+    
     def _predict_fallback(self, symptoms_lower):
         """Fallback prediction using keyword matching"""
-        scores = {}
-        
-        for condition, config in self.keyword_conditions.items():
-            keywords = config['keywords']
-            required = config.get('required', [])
-            weight = config.get('weight', 1.0)
-            
-            has_required = all(req in symptoms_lower for req in required)
-            if not has_required:
-                continue
-            
-            matches = sum(1 for keyword in keywords if keyword in symptoms_lower)
-            if matches > 0:
-                score = (matches / len(keywords)) * weight
-                scores[condition] = score
+        scores = self._keyword_scores(symptoms_lower)
         
         sorted_conditions = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:3]
         predicted_conditions = [condition for condition, _ in sorted_conditions]
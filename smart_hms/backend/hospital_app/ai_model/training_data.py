@@ -0,0 +1,78 @@
+"""Labeled training examples from clinical records: condition codes and de-identification.
+
+Doctors write diagnoses as free text ("Influenza A", "Acute MI"); ``condition_code``
+maps those naming a condition the symptom model knows to its code and leaves
+the rest out. ``deidentify`` strips what could identify a patient from the
+symptom text before it is kept as a training example.
+"""
+import re
+
+from .symptom_checker import FALLBACK_CONDITIONS
+
+# Diagnoses, as normalized by _normalize, naming a known condition by another name
+DIAGNOSIS_SYNONYMS = {
+    'influenza': 'flu', 'influenza a': 'flu', 'influenza b': 'flu', 'seasonal flu': 'flu',
+    'cold': 'common_cold', 'upper respiratory infection': 'common_cold', 'uri': 'common_cold',
+    'covid': 'covid_19', 'covid19': 'covid_19', 'coronavirus': 'covid_19', 'sars cov 2': 'covid_19',
+    'allergy': 'allergies', 'allergic rhinitis': 'allergies', 'hay fever': 'allergies',
+    'sinus infection': 'sinusitis', 'acute sinusitis': 'sinusitis',
+    'community acquired pneumonia': 'pneumonia',
+    'gastro': 'gastroenteritis', 'stomach flu': 'gastroenteritis', 'viral gastroenteritis': 'gastroenteritis',
+    'osteoarthritis': 'arthritis', 'rheumatoid arthritis': 'arthritis',
+    'eczema': 'dermatitis', 'contact dermatitis': 'dermatitis', 'atopic dermatitis': 'dermatitis',
+    'myocardial infarction': 'heart_attack', 'acute myocardial infarction': 'heart_attack', 'mi': 'heart_attack',
+    'acute mi': 'heart_attack', 'stemi': 'heart_attack', 'nstemi': 'heart_attack',
+    'migraine headache': 'migraine', 'migraine with aura': 'migraine', 'migraine without aura': 'migraine',
+    'bronchial asthma': 'asthma', 'asthma exacerbation': 'asthma',
+    'strep': 'strep_throat', 'streptococcal pharyngitis': 'strep_throat',
+    'diabetes mellitus': 'diabetes', 'type 1 diabetes': 'diabetes', 'type 2 diabetes': 'diabetes', 't2dm': 'diabetes',
+    'back pain': 'back_problems', 'low back pain': 'back_problems', 'lower back pain': 'back_problems',
+    'lumbago': 'back_problems',
+    'high blood pressure': 'hypertension', 'essential hypertension': 'hypertension',
+    'major depressive disorder': 'depression', 'depressive disorder': 'depression',
+    'chronic insomnia': 'insomnia', 'sleep disorder': 'insomnia',
+    'irritable bowel syndrome': 'ibs',
+}
+
+_CODES = {code.replace('_', ' '): code for code in FALLBACK_CONDITIONS}
+
+# Where a diagnosis' first clause ends: "Influenza, advised rest"
+_CLAUSE_END = re.compile(r'[,;:.(\n]|\s-\s')
+_NON_ALPHANUMERIC = re.compile(r'[^a-z0-9]+')
+
+# Replaced before names, so the digits and words inside them go too
+_IDENTIFIERS = (
+    (re.compile(r'\b[\w.+-]+@[\w-]+(\.[\w-]+)+\b'), '[email]'),
+    (re.compile(r'\bhttps?://\S+'), '[url]'),
+    (re.compile(r'\b\d{1,4}[/.-]\d{1,2}[/.-]\d{1,4}\b'), '[date]'),
+    (re.compile(r'(?<!\w)\+?\d[\d ()-]{7,}\d\b'), '[phone]'),
+    # Record, insurance and ID numbers
+    (re.compile(r'\b[a-z-]*\d{5,}[\w-]*\b'), '[id]'),
+)
+
+
+def _normalize(text):
+    return _NON_ALPHANUMERIC.sub(' ', text.lower()).strip()
+
+
+def condition_code(diagnosis):
+    """Code of the known condition ``diagnosis`` names, or None"""
+    if not diagnosis:
+        return None
+    for candidate in (diagnosis, _CLAUSE_END.split(diagnosis, 1)[0]):
+        normalized = _normalize(candidate)
+        code = _CODES.get(normalized) or DIAGNOSIS_SYNONYMS.get(normalized)
+        if code is not None:
+            return code
+    return None
+
+
+def deidentify(text, names=()):
+    """``text`` lowercased on one line, without contact details, dates, ID numbers and the given ``names``"""
+    text = text.lower()
+    for pattern, replacement in _IDENTIFIERS:
+        text = pattern.sub(replacement, text)
+    words = sorted({word for name in names if name for word in name.lower().split() if len(word) > 1}, key=len, reverse=True)
+    if words:
+        text = re.sub(r'\b(?:' + '|'.join(map(re.escape, words)) + r')\b', '[name]', text)
+    return ' '.join(text.split())
@@ -0,0 +1,185 @@
+"""Append-only on-disk store of labeled symptom examples for training.
+
+Layout of the store directory::
+
+    training_data/
+        manifest.json       segments, row counts and the high-water mark
+        append.lock         held while an exporter appends
+        000001.tsv.gz       one gzip-compressed ``condition<TAB>symptoms`` line per example
+
+Segments are never changed once written. An append writes new segments under
+temporary names, renames them into place and only then lists them in the
+manifest, which is replaced atomically. Readers therefore see whole segments
+only, and a reader that remembers the position returned by ``read`` later
+reads just the segments appended since.
+
+The high-water mark is the position of the last source record examined, any
+JSON value the exporter orders its records by, so the next export continues
+after it whether or not that record made an example. An exporter reads it
+inside the append lock (``append`` passes it to a chunk factory), so two
+overlapping exports never append the same records.
+"""
+import contextlib
+import gzip
+import json
+import logging
+import os
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = 'append.lock'
+TEMP_PREFIX = '.tmp-'
+SEGMENT_SUFFIX = '.tsv.gz'
+# Examples per segment; a bigger append is split, so an interrupted one keeps its finished segments
+SEGMENT_ROWS = 100000
+FORMAT_VERSION = 1
+
+
+class TrainingStore:
+    """Labeled (symptoms, condition) examples in immutable gzip segments under ``root``"""
+
+    def __init__(self, root, segment_rows=SEGMENT_ROWS):
+        self.root = root
+        self.segment_rows = segment_rows
+
+    def manifest(self):
+        """The store's manifest; an empty one if nothing has been appended"""
+        try:
+            with open(os.path.join(self.root, MANIFEST_NAME)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'format': FORMAT_VERSION, 'high_water': 0, 'rows': 0, 'segments': []}
+
+    def high_water(self):
+        """Position of the last source record examined by an append, 0 if none"""
+        return self.manifest()['high_water']
+
+    def read(self, after=0):
+        """(examples, position): the (symptoms, condition) pairs of segments past position ``after``.
+
+        Pass the returned position as ``after`` next time to read only what
+        was appended in between. Examples are read lazily, one segment at a
+        time.
+        """
+        segments = self.manifest()['segments']
+        return self._examples(segments[after:]), len(segments)
+
+    def _examples(self, segments):
+        for segment in segments:
+            with gzip.open(os.path.join(self.root, segment['name']), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    condition, symptoms = line.rstrip('\n').split('\t', 1)
+                    yield symptoms, condition
+
+    def append(self, chunks):
+        """Append ``chunks``, (examples, high_water) pairs; returns the number of examples appended.
+
+        Examples are (symptoms, condition) pairs, their text on one line. Each
+        chunk's ``high_water`` is the position of the last source record it
+        examined. ``chunks`` may also be a callable, called with the current
+        high-water mark once the append lock is held, that returns them;
+        exporters pass one so that they continue from a mark no other append
+        can move meanwhile. Segments are published as they fill up, at chunk
+        boundaries, so an interrupted append keeps what it published and the
+        next one resumes after it.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with self._append_lock():
+            self._remove_temporary_files()
+            manifest = self.manifest()
+            saved_high_water = manifest['high_water']
+            if callable(chunks):
+                chunks = chunks(saved_high_water)
+            appended = 0
+            writer = None
+            try:
+                for examples, high_water in chunks:
+                    if examples and writer is None:
+                        writer = _SegmentWriter(self.root)
+                    for symptoms, condition in examples:
+                        writer.write(symptoms, condition)
+                    appended += len(examples)
+                    manifest['high_water'] = high_water
+                    if writer is not None and writer.rows >= self.segment_rows:
+                        self._publish(manifest, writer)
+                        writer, saved_high_water = None, high_water
+                if writer is not None:
+                    self._publish(manifest, writer)
+                    writer = None
+                elif manifest['high_water'] != saved_high_water:
+                    # The last records made no examples; remember that they were examined
+                    self._write_manifest(manifest)
+            finally:
+                if writer is not None:
+                    writer.discard()
+        return appended
+
+    def _publish(self, manifest, writer):
+        name = f"{len(manifest['segments']) + 1:06d}{SEGMENT_SUFFIX}"
+        rows = writer.close(os.path.join(self.root, name))
+        manifest['segments'].append({'name': name, 'rows': rows, 'high_water': manifest['high_water']})
+        manifest['rows'] += rows
+        self._write_manifest(manifest)
+        logger.info(f"Appended {rows} training examples to {self.root} as {name}")
+
+    def _write_manifest(self, manifest):
+        path = os.path.join(self.root, MANIFEST_NAME)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    def _remove_temporary_files(self):
+        # Left behind by an append that crashed
+        for name in os.listdir(self.root):
+            if name.startswith(TEMP_PREFIX):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.root, name))
+
+    @contextlib.contextmanager
+    def _append_lock(self):
+        fd = os.open(os.path.join(self.root, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+
+class _SegmentWriter:
+    """A segment being written under a temporary name"""
+
+    def __init__(self, root):
+        self.path = os.path.join(root, f'{TEMP_PREFIX}{uuid.uuid4().hex}{SEGMENT_SUFFIX}')
+        self.file = gzip.open(self.path, 'wt', encoding='utf-8')
+        self.rows = 0
+
+    def write(self, symptoms, condition):
+        self.file.write(f'{condition}\t{symptoms}\n')
+        self.rows += 1
+
+    def close(self, path):
+        """Finish the segment and rename it to ``path``; returns its number of rows"""
+        self.file.close()
+        # On disk before the manifest lists it
+        fd = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(self.path, path)
+        return self.rows
+
+    def discard(self):
+        self.file.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path)
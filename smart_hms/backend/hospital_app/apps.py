@@ -1,6 +1,29 @@
+import gc
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class HospitalAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hospital_app'
+    
+    def ready(self):
+        # Keep the HospitalStats counters, DoctorPatient links, SymptomPrediction rows
+        # and the MedicalRecord.labeled_at of training data exports up to date
+        from . import predictions, relationships, stats, training_export  # noqa: F401
+        
+        # Set by gunicorn.conf.py: load the symptom model in the master before
+        # it forks, instead of once per worker on its first symptom check
+        if getattr(settings, 'SYMPTOM_CHECKER_PRELOAD', False):
+            from .ai_model.registry import warm_up_symptom_checker
+            
+            try:
+                warm_up_symptom_checker()
+            except Exception as e:
+                logger.error(f"Symptom checker warmup failed: {e}")
+            # Leave no garbage behind to be frozen into the workers
+            gc.collect()
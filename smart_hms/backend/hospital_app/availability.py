@@ -0,0 +1,286 @@
+"""Free appointment slots from doctors' weekly schedules, time off and bookings.
+
+A doctor's slots are their DoctorSchedule shifts cut into ``slot_minutes``
+pieces, in local time. A slot is free unless it overlaps time off or a booked
+(not cancelled) appointment, which occupies the length of the slot it starts
+in. Free slots are found by sweeping the schedule's slots against the merged
+busy intervals in time order, after reading the bookings with one indexed
+range query: per doctor for one doctor's slots, and per search window across
+doctors for the earliest slot of each specialization.
+"""
+import heapq
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from itertools import islice, repeat, takewhile
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Appointment, Doctor, DoctorSchedule, DoctorTimeOff
+
+DEFAULT_SEARCH_DAYS = 7
+MAX_SEARCH_DAYS = 62
+# The earliest-slot search reads two hours of bookings first, then doubles the window
+FIRST_SEARCH_WINDOW = timedelta(hours=2)
+
+DEFAULT_SLOT_MINUTES = DoctorSchedule._meta.get_field('slot_minutes').default
+
+Slot = namedtuple('Slot', ['start', 'end'])
+
+
+def parse_window(params, now=None, max_days=MAX_SEARCH_DAYS):
+    """The ``from`` and ``to`` query parameters as aware datetimes; raises ValueError.
+
+    Either may be an ISO date (midnight local time) or datetime. ``from``
+    defaults to now and is never in the past; ``to`` defaults to a week later.
+    """
+    now = now or timezone.now()
+    start = max(_parse_moment(params.get('from'), 'from') or now, now)
+    end = _parse_moment(params.get('to'), 'to') or start + timedelta(days=DEFAULT_SEARCH_DAYS)
+    if end <= start:
+        raise ValueError("'to' must be in the future and after 'from'")
+    if end - start > timedelta(days=max_days):
+        raise ValueError(f"Search at most {max_days} days at a time")
+    return start, end
+
+
+def _parse_moment(value, name):
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid '{name}': expected an ISO date or datetime")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _shifts_by_weekday(schedules):
+    shifts = defaultdict(list)
+    for schedule in sorted(schedules, key=lambda schedule: (schedule.start_time, schedule.end_time)):
+        shifts[schedule.weekday].append(schedule)
+    return shifts
+
+
+def shifts_between(shifts, start, end, tz):
+    """(start, end, slot length) of the weekly ``shifts`` on the days of [start, end), in time order"""
+    day = start.astimezone(tz).date()
+    last_day = end.astimezone(tz).date()
+    while day <= last_day:
+        for schedule in shifts.get(day.weekday(), ()):
+            yield (
+                timezone.make_aware(datetime.combine(day, schedule.start_time), tz),
+                timezone.make_aware(datetime.combine(day, schedule.end_time), tz),
+                timedelta(minutes=schedule.slot_minutes),
+            )
+        day += timedelta(days=1)
+
+
+def booked_interval(appointment_date, shifts, tz):
+    """Time an appointment occupies: the slot length of the shift it starts in"""
+    local = appointment_date.astimezone(tz)
+    minutes = DEFAULT_SLOT_MINUTES
+    for schedule in shifts.get(local.weekday(), ()):
+        if schedule.start_time <= local.time() < schedule.end_time:
+            minutes = schedule.slot_minutes
+            break
+    return appointment_date, appointment_date + timedelta(minutes=minutes)
+
+
+def merge_intervals(intervals):
+    """Sorted, disjoint intervals covering the same time as ``intervals``"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _first_slot_from(shift_start, length, moment):
+    # Start of the shift's first slot starting at or after ``moment``
+    if moment <= shift_start:
+        return shift_start
+    return shift_start - ((shift_start - moment) // length) * length
+
+
+def free_slots(shifts, busy, start, end):
+    """Slots of ``shifts`` (in time order) within [start, end) overlapping none of the ``busy`` intervals.
+
+    Sweeps the shifts and the merged busy intervals together, jumping over
+    each busy interval rather than testing the slots it covers one by one.
+    Where shifts overlap, a shift's slots start after the last one offered.
+    """
+    busy = merge_intervals(busy)
+    index = 0
+    offered_until = start
+    for shift_start, shift_end, length in shifts:
+        last_start = min(shift_end, end) - length
+        slot_start = _first_slot_from(shift_start, length, offered_until)
+        while slot_start <= last_start:
+            while index < len(busy) and busy[index][1] <= slot_start:
+                index += 1
+            if index < len(busy) and busy[index][0] < slot_start + length:
+                slot_start = _first_slot_from(shift_start, length, busy[index][1])
+                continue
+            yield Slot(slot_start, slot_start + length)
+            slot_start += length
+            offered_until = slot_start
+
+
+def _lookback(schedules):
+    # Bookings starting this long before a slot can still overlap it; off-shift ones take the default length
+    return timedelta(minutes=max([schedule.slot_minutes for schedule in schedules] + [DEFAULT_SLOT_MINUTES]))
+
+
+def _bookings():
+    return Appointment.objects.exclude(status='cancelled').order_by()
+
+
+def doctor_free_slots(doctor, start, end):
+    """Free slots of ``doctor`` within [start, end)"""
+    if not doctor.is_available:
+        return []
+    schedules = list(doctor.schedules.all())
+    if not schedules:
+        return []
+    tz = timezone.get_current_timezone()
+    shifts = _shifts_by_weekday(schedules)
+    lookback = _lookback(schedules)
+    busy = [
+        booked_interval(appointment_date, shifts, tz)
+        for appointment_date in _bookings().filter(
+            doctor=doctor, appointment_date__gte=start - lookback, appointment_date__lt=end
+        ).values_list('appointment_date', flat=True)
+    ]
+    busy += DoctorTimeOff.objects.filter(doctor=doctor, start__lt=end, end__gt=start).values_list('start', 'end')
+    return list(free_slots(shifts_between(shifts, start, end, tz), busy, start, end))
+
+
+def conflicting_appointment(doctor, appointment_date, exclude=None):
+    """An active appointment of ``doctor`` overlapping a new one at ``appointment_date``, or None"""
+    tz = timezone.get_current_timezone()
+    schedules = list(doctor.schedules.all())
+    shifts = _shifts_by_weekday(schedules)
+    start, end = booked_interval(appointment_date, shifts, tz)
+    bookings = _bookings().filter(
+        doctor=doctor, appointment_date__gt=start - _lookback(schedules), appointment_date__lt=end
+    )
+    if exclude is not None:
+        bookings = bookings.exclude(pk=exclude.pk)
+    for appointment in bookings:
+        other_start, other_end = booked_interval(appointment.appointment_date, shifts, tz)
+        if other_start < end and start < other_end:
+            return appointment
+    return None
+
+
+def overlapping_requests(requests):
+    """Indexes of ``requests``, (doctor id, appointment date) pairs, that would double-book their doctor.
+
+    A request overlaps an active appointment of its doctor or an earlier
+    request of the same doctor. The doctors' schedules and their bookings
+    over the requests' span are read with one query each.
+    """
+    if not requests:
+        return set()
+    doctor_ids = {doctor_id for doctor_id, _ in requests}
+    schedules_by_doctor = defaultdict(list)
+    for schedule in DoctorSchedule.objects.filter(doctor_id__in=doctor_ids).order_by().values_list(
+        'doctor_id', 'weekday', 'start_time', 'end_time', 'slot_minutes', named=True
+    ):
+        schedules_by_doctor[schedule.doctor_id].append(schedule)
+    shifts = {doctor_id: _shifts_by_weekday(schedules_by_doctor[doctor_id]) for doctor_id in doctor_ids}
+    lookback = _lookback([schedule for rows in schedules_by_doctor.values() for schedule in rows])
+    dates = [appointment_date for _, appointment_date in requests]
+
+    tz = timezone.get_current_timezone()
+    booked = defaultdict(list)
+    for doctor_id, appointment_date in _bookings().filter(
+        doctor_id__in=doctor_ids, appointment_date__gt=min(dates) - lookback, appointment_date__lt=max(dates) + lookback
+    ).values_list('doctor_id', 'appointment_date'):
+        booked[doctor_id].append(booked_interval(appointment_date, shifts[doctor_id], tz))
+    for intervals in booked.values():
+        intervals.sort()
+
+    overlapping = set()
+    for index, (doctor_id, appointment_date) in enumerate(requests):
+        start, end = booked_interval(appointment_date, shifts[doctor_id], tz)
+        intervals = booked[doctor_id]
+        # No booking is longer than the lookback, so earlier ones end before this starts
+        nearby = takewhile(lambda interval: interval[0] < end, islice(intervals, bisect_left(intervals, (start - lookback,)), None))
+        if any(start < other_end for _, other_end in nearby):
+            overlapping.add(index)
+        else:
+            insort(intervals, (start, end))
+    return overlapping
+
+
+def earliest_slots(start, end, specialization=None):
+    """Earliest free slot of each specialization within [start, end), as {specialization: (doctor, slot)}.
+
+    Searches the available doctors' bookings a window at a time, starting with
+    two hours and doubling, for the specializations still without a slot. Within a
+    window, the doctors' free slots are merged lazily, so only as many are
+    examined as it takes to find the earliest.
+    """
+    schedules = DoctorSchedule.objects.filter(doctor__is_available=True)
+    if specialization:
+        schedules = schedules.filter(doctor__specialization=specialization)
+    specializations, schedules_by_doctor = {}, defaultdict(list)
+    for schedule in schedules.order_by().values_list(
+        'doctor_id', 'doctor__specialization', 'weekday', 'start_time', 'end_time', 'slot_minutes', named=True
+    ):
+        specializations[schedule.doctor_id] = schedule.doctor__specialization
+        schedules_by_doctor[schedule.doctor_id].append(schedule)
+    pending = defaultdict(list)
+    for doctor_id, name in specializations.items():
+        pending[name].append(doctor_id)
+    shifts = {doctor_id: _shifts_by_weekday(rows) for doctor_id, rows in schedules_by_doctor.items()}
+    lookback = _lookback([schedule for rows in schedules_by_doctor.values() for schedule in rows])
+
+    tz = timezone.get_current_timezone()
+    found = {}
+    window_start, window = start, FIRST_SEARCH_WINDOW
+    while pending:
+        # Skip to the first slot any pending doctor works, e.g. past the night
+        window_start = min(
+            (slot.start for doctor_ids in pending.values() for doctor_id in doctor_ids
+             for slot in islice(free_slots(shifts_between(shifts[doctor_id], window_start, end, tz), (), window_start, end), 1)),
+            default=end,
+        )
+        if window_start >= end:
+            break
+        window_end = min(window_start + window, end)
+        doctor_filter = {'doctor__is_available': True, 'doctor__specialization__in': list(pending)}
+        busy = defaultdict(list)
+        # Slots starting in the window may end up to a slot length after it
+        for doctor_id, appointment_date in _bookings().filter(
+            appointment_date__gte=window_start - lookback, appointment_date__lt=window_end + lookback, **doctor_filter
+        ).values_list('doctor_id', 'appointment_date'):
+            if doctor_id in shifts:
+                busy[doctor_id].append(booked_interval(appointment_date, shifts[doctor_id], tz))
+        for doctor_id, off_start, off_end in DoctorTimeOff.objects.filter(
+            start__lt=window_end + lookback, end__gt=window_start, **doctor_filter
+        ).values_list('doctor_id', 'start', 'end'):
+            busy[doctor_id].append((off_start, off_end))
+
+        for name, doctor_ids in list(pending.items()):
+            candidates = heapq.merge(*(
+                zip(takewhile(
+                    lambda slot: slot.start < window_end,
+                    free_slots(shifts_between(shifts[doctor_id], window_start, end, tz), busy[doctor_id], window_start, end),
+                ), repeat(doctor_id))
+                for doctor_id in doctor_ids
+            ))
+            first = next(candidates, None)
+            if first is not None:
+                found[name] = first
+                del pending[name]
+        window_start, window = window_end, window * 2
+
+    doctors = Doctor.objects.select_related('user').in_bulk([doctor_id for _, doctor_id in found.values()])
+    return {name: (doctors[doctor_id], slot) for name, (slot, doctor_id) in found.items()}
@@ -0,0 +1,156 @@
+"""Appointment booking that stays free of double bookings under concurrent requests.
+
+A booking first checks for an overlapping appointment without locking, which
+turns most conflicts away cheaply. It then locks the doctor's row
+(``SELECT ... FOR UPDATE``) and checks again before saving, so concurrent
+bookings of one doctor take turns. A partial unique constraint on scheduled and
+confirmed ``(doctor, appointment_date)`` rows backs this up in the database, for SQLite
+(which has no row locks) and for writes that bypass this module. SQLite
+refuses concurrent writers outright, so there a booking retries a few times.
+
+Bulk bookings (``create_appointments``) do the same for a whole batch: one
+query for the doctors, one for the conflicts of every item, and one
+``bulk_create`` of the valid items in a single transaction.
+"""
+import time
+from django.db import IntegrityError, OperationalError, connection, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from . import relationships, stats
+from .availability import conflicting_appointment, overlapping_requests
+from .models import Appointment, Doctor, Patient
+from .serializers import AppointmentItemSerializer
+
+LOCK_ATTEMPTS = 10
+LOCK_RETRY_DELAY = 0.02  # seconds, growing with each attempt
+
+
+class SlotTaken(APIException):
+    """The doctor already has an appointment overlapping the requested time"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {'error': 'The doctor already has an appointment at this time'}
+    default_code = 'slot_taken'
+
+
+def save_appointment(serializer):
+    """Save a validated appointment ``serializer`` unless its doctor is busy then; raises SlotTaken"""
+    instance = serializer.instance
+    data = serializer.validated_data
+    doctor = data.get('doctor', getattr(instance, 'doctor', None))
+    appointment_date = data.get('appointment_date', getattr(instance, 'appointment_date', None))
+    if data.get('status', getattr(instance, 'status', None)) == 'cancelled':
+        return serializer.save()
+    if (
+        instance is not None and instance.status != 'cancelled'
+        and (doctor.pk, appointment_date) == (instance.doctor_id, instance.appointment_date)
+    ):
+        # Not moving to a new time
+        return serializer.save()
+
+    return _retry_on_lock(_save_unless_taken, serializer, doctor, appointment_date)
+
+
+def _retry_on_lock(function, *args):
+    for attempt in range(1, LOCK_ATTEMPTS + 1):
+        try:
+            return function(*args)
+        except OperationalError as e:
+            if not _is_lock_contention(e) or attempt == LOCK_ATTEMPTS:
+                raise
+            time.sleep(LOCK_RETRY_DELAY * attempt)
+
+
+def _is_lock_contention(error):
+    # SQLite refuses concurrent writers ("database is locked") instead of
+    # queueing them on row locks like PostgreSQL
+    return connection.vendor == 'sqlite' and 'locked' in str(error)
+
+
+def _lock_doctors(doctor_ids):
+    # In id order, so that overlapping batches can't deadlock
+    list(Doctor.objects.select_for_update().filter(pk__in=doctor_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def _save_unless_taken(serializer, doctor, appointment_date):
+    instance = serializer.instance
+    if conflicting_appointment(doctor, appointment_date, exclude=instance):
+        raise SlotTaken()
+    try:
+        with transaction.atomic():
+            _lock_doctors([doctor.pk])
+            if conflicting_appointment(doctor, appointment_date, exclude=instance):
+                raise SlotTaken()
+            return serializer.save()
+    except IntegrityError:
+        # Lost a race to the unique constraint
+        if conflicting_appointment(doctor, appointment_date, exclude=instance) is None:
+            raise
+        raise SlotTaken()
+
+
+def create_appointments(items, patient=None, doctor=None):
+    """Book many appointments at once; returns the created ones and {index: errors} of the rest.
+
+    ``items`` are AppointmentItemSerializer data. ``patient`` or ``doctor``,
+    if given, is that of every appointment (the requesting user's profile),
+    overriding the items; otherwise each item names it. Invalid items and
+    those that would double-book a doctor are left out.
+    """
+    errors, rows = {}, {}
+    for index, item in enumerate(items):
+        serializer = AppointmentItemSerializer(data=item)
+        if serializer.is_valid():
+            rows[index] = serializer.validated_data
+        else:
+            errors[index] = serializer.errors
+
+    doctors = {doctor.pk: doctor} if doctor else Doctor.objects.select_related('user').in_bulk(
+        {row['doctor'] for row in rows.values() if 'doctor' in row}
+    )
+    patients = {patient.pk: patient} if patient else Patient.objects.select_related('user').in_bulk(
+        {row['patient'] for row in rows.values() if 'patient' in row}
+    )
+    appointments = {}
+    for index, row in rows.items():
+        row_doctor = doctor or doctors.get(row.get('doctor'))
+        row_patient = patient or patients.get(row.get('patient'))
+        row_errors = {}
+        if row_doctor is None:
+            row_errors['doctor'] = ['Doctor not found' if 'doctor' in row else 'This field is required.']
+        if row_patient is None:
+            row_errors['patient'] = ['Patient not found' if 'patient' in row else 'This field is required.']
+        if row_errors:
+            errors[index] = row_errors
+            continue
+        appointments[index] = {
+            'doctor': row_doctor, 'patient': row_patient, 'appointment_date': row['appointment_date'],
+            'reason': row['reason'], 'notes': row.get('notes', ''),
+        }
+    if not appointments:
+        return [], errors
+
+    try:
+        created, taken = _retry_on_lock(_insert_unless_taken, appointments)
+    except IntegrityError:
+        # A booking made without the doctor lock got in first; check again
+        created, taken = _retry_on_lock(_insert_unless_taken, appointments)
+    for index in taken:
+        errors[index] = {'appointment_date': [SlotTaken.default_detail['error']]}
+    return created, dict(sorted(errors.items()))
+
+
+def _insert_unless_taken(appointments):
+    # Fresh instances on every attempt, as a failed attempt may have set their ids
+    indexes = list(appointments)
+    with transaction.atomic():
+        _lock_doctors({fields['doctor'].pk for fields in appointments.values()})
+        overlapping = overlapping_requests(
+            [(appointments[index]['doctor'].pk, appointments[index]['appointment_date']) for index in indexes]
+        )
+        created = Appointment.objects.bulk_create([
+            Appointment(**appointments[index]) for position, index in enumerate(indexes) if position not in overlapping
+        ])
+        # bulk_create sends no signals
+        stats.count_new_appointments(created)
+        relationships.record_visits(created)
+    return created, [indexes[position] for position in overlapping]
@@ -0,0 +1,103 @@
+"""Admin dashboard statistics: read from the HospitalStats counters and cached briefly.
+
+Admin dashboards are open on many screens and polled, so the statistics are
+served from a snapshot that at most one caller at a time refreshes.
+"""
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+ADMIN_SNAPSHOT_KEY = 'dashboard:admin'
+
+
+def compute_admin_stats():
+    """Hospital-wide counts and recent appointments shown on the admin dashboard"""
+    from .models import Appointment
+    from .serializers import AppointmentSerializer
+    from .stats import read_stats
+    from .views import AppointmentViewSet
+
+    # Counts come from the HospitalStats counters rather than from the tables
+    stats = read_stats()
+    recent_appointments = Appointment.objects.select_related(
+        *AppointmentViewSet.select_related_fields
+    ).order_by('-appointment_date')[:5]
+    stats['recent_appointments'] = [dict(row) for row in AppointmentSerializer(recent_appointments, many=True).data]
+    return stats
+
+
+class SnapshotCache:
+    """A computed value cached for ``ttl`` seconds with single-flight refresh.
+
+    Once the value is older than ``ttl``, the first caller to take the refresh
+    lock (an atomic ``cache.add``) recomputes it while everyone else keeps
+    getting the previous value, for up to ``stale_ttl`` more seconds. Callers
+    with nothing to serve wait up to ``wait`` seconds for the refresh, then
+    compute the value themselves. With a shared cache (e.g. Redis) this holds
+    across workers and nodes; with a local-memory cache, per process.
+    """
+
+    def __init__(self, key, compute, cache, ttl=10, stale_ttl=120, refresh_timeout=30, wait=5, timer=time.time):
+        self.key = key
+        self.lock_key = f'{key}:refresh'
+        self.compute = compute
+        self.cache = cache
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_timeout = refresh_timeout
+        self.wait = wait
+        self.timer = timer
+
+    def get(self):
+        entry = self.cache.get(self.key)
+        if entry is not None and entry['expires_at'] > self.timer():
+            return entry['value']
+
+        if self.cache.add(self.lock_key, True, timeout=self.refresh_timeout):
+            try:
+                return self.refresh()
+            finally:
+                self.cache.delete(self.lock_key)
+        if entry is not None:
+            return entry['value']
+
+        deadline = time.monotonic() + self.wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self.cache.get(self.key)
+            if entry is not None:
+                return entry['value']
+        logger.warning(f"Timed out waiting for {self.key} to be refreshed; computing it")
+        return self.compute()
+
+    def refresh(self):
+        """Recompute and store the value"""
+        value = self.compute()
+        entry = {'value': value, 'expires_at': self.timer() + self.ttl}
+        self.cache.set(self.key, entry, timeout=self.ttl + self.stale_ttl)
+        return value
+
+    def clear(self):
+        self.cache.delete_many([self.key, self.lock_key])
+
+
+def admin_snapshot_cache():
+    """The admin statistics snapshot, configured by ``ADMIN_DASHBOARD_CACHE``"""
+    from django.conf import settings
+    from django.core.cache import caches
+
+    options = getattr(settings, 'ADMIN_DASHBOARD_CACHE', {})
+    return SnapshotCache(
+        ADMIN_SNAPSHOT_KEY,
+        compute_admin_stats,
+        caches[options.get('ALIAS', 'default')],
+        ttl=options.get('TTL', 10),
+        stale_ttl=options.get('STALE_TTL', 120),
+        refresh_timeout=options.get('REFRESH_TIMEOUT', 30),
+    )
+
+
+def get_admin_stats():
+    """Admin dashboard statistics from the cached snapshot"""
+    return admin_snapshot_cache().get()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from hospital_app.relationships import BACKFILL_CHUNK_SIZE, backfill_links
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DoctorPatient table behind doctors\' patient lists from the appointments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=BACKFILL_CHUNK_SIZE,
+            help=f'Patients per transaction (default {BACKFILL_CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        def report_progress(patients, links):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {patients} patients, {links} links')
+
+        self.stdout.write('Backfilling doctor-patient links...')
+        links = backfill_links(chunk_size=options['chunk_size'], progress=report_progress)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {links} doctor-patient links'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from hospital_app.predictions import BACKFILL_CHUNK_SIZE, backfill_predictions
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SymptomPrediction rows and top conditions of symptom checks from their predictions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=BACKFILL_CHUNK_SIZE,
+            help=f'Symptom checks per transaction (default {BACKFILL_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--after-id', type=int, default=0,
+            help='Start after this symptom check id, to resume an interrupted run'
+        )
+
+    def handle(self, *args, **options):
+        def report_progress(checks, rows, last_id):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {checks} checks, {rows} predictions (up to id {last_id})')
+
+        self.stdout.write('Backfilling symptom check predictions...')
+        rows = backfill_predictions(
+            chunk_size=options['chunk_size'], after_id=options['after_id'], progress=report_progress
+        )
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} symptom check predictions'))
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hospital_app.record_scoring import SCORE_CHUNK_SIZE, resume_after_id, score_medical_records
+
+
+class Command(BaseCommand):
+    help = 'Run the AI symptom checker over the symptoms of medical records and save its predictions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=SCORE_CHUNK_SIZE,
+            help=f'Medical records scored and saved together (default {SCORE_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes scoring chunks in parallel (default 1, scoring in this process)'
+        )
+        start = parser.add_mutually_exclusive_group()
+        start.add_argument(
+            '--after-id', type=int, default=0,
+            help='Start after this medical record id'
+        )
+        start.add_argument(
+            '--resume', action='store_true',
+            help='Start after the last medical record scored, to continue an interrupted run'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--chunk-size and --workers must be at least 1')
+        after_id = resume_after_id() if options['resume'] else options['after_id']
+
+        def report_progress(records, last_id, rate):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {records} records, {rate:.0f} rows/s (up to id {last_id})')
+
+        self.stdout.write(f'Scoring medical records after id {after_id}...')
+        started = time.perf_counter()
+        try:
+            records = score_medical_records(
+                chunk_size=options['chunk_size'], workers=options['workers'], after_id=after_id,
+                progress=report_progress,
+            )
+        except FileNotFoundError as e:
+            raise CommandError(f'{e}; publish one with retrain_symptom_model first')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {records} medical records in {elapsed:.1f} s ({records / elapsed if elapsed else 0:.0f} rows/s)'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from hospital_app.training_export import EXPORT_CHUNK_SIZE, export_training_data, training_store
+
+
+class Command(BaseCommand):
+    help = 'Append de-identified symptom model training examples from new medical records to the training store'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+            help=f'Medical records read and appended together (default {EXPORT_CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        store = training_store()
+
+        def report_progress(examples, records, last_id):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {examples} examples from {records} records (up to id {last_id})')
+
+        self.stdout.write(f'Exporting new and changed medical records to {store.root}...')
+        examples, records = export_training_data(store, chunk_size=options['chunk_size'], progress=report_progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {examples} training examples from {records} medical records "
+            f"({store.manifest()['rows']} in the store)"
+        ))
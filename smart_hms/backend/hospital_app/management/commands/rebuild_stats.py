@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from hospital_app.dashboard import admin_snapshot_cache
+from hospital_app.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the HospitalStats counters behind the admin dashboard from scratch'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding hospital statistics...')
+        counters = rebuild_stats()
+        admin_snapshot_cache().clear()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {counters} counters'))
@@ -0,0 +1,55 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hospital_app.ai_model.model_store import TrainingInProgress, current_version, trainer_lock
+from hospital_app.ai_model.symptom_checker import SymptomCheckerAI
+from hospital_app.training_export import export_training_data
+
+
+class Command(BaseCommand):
+    help = 'Retrain the AI symptom checker model and publish it as a new version'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--regenerate-data',
+            action='store_true',
+            help='Rebuild symptom_data.csv from the built-in examples before training',
+        )
+        parser.add_argument(
+            '--export-data',
+            action='store_true',
+            help='Export training examples from new medical records to the training store before training',
+        )
+        parser.add_argument(
+            '--no-wait',
+            action='store_true',
+            help='Fail instead of waiting if another process is already training',
+        )
+
+    def handle(self, *args, **options):
+        checker = SymptomCheckerAI(load_model=False)
+        previous_version = current_version(checker.artifact_path)
+
+        try:
+            # One trainer per node; running workers keep serving the current model
+            with trainer_lock(checker.artifact_path, blocking=not options['no_wait']):
+                if options['regenerate_data'] and os.path.exists(checker.data_path):
+                    os.remove(checker.data_path)
+                    self.stdout.write(f'Deleted existing data: {checker.data_path}')
+                if options['export_data']:
+                    examples, records = export_training_data()
+                    self.stdout.write(f'Exported {examples} training examples from {records} new medical records')
+
+                self.stdout.write('Training symptom checker model...')
+                checker._train_model()
+        except TrainingInProgress as e:
+            raise CommandError(str(e))
+
+        if checker.artifact_version is None or checker.artifact_version == previous_version:
+            raise CommandError('Training failed, the published model was not changed (see the log)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Published symptom model version {checker.artifact_version} '
+            f'({len(checker.conditions)} conditions) to {checker.artifact_path}'
+        ))
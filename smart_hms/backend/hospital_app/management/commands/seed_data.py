@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from datetime import datetime, timedelta
-from hospital_app.models import User, Patient, Doctor, Admin, Appointment, MedicalRecord, Prescription
+from datetime import datetime, time, timedelta
+from hospital_app.models import User, Patient, Doctor, Admin, Appointment, MedicalRecord, Prescription, DoctorSchedule
 import random
 
 
@@ -108,6 +108,12 @@ class Command(BaseCommand):
                     'consultation_fee': doctor_data['consultation_fee']
                 }
             )
+            if created:
+                # Weekday working hours, 9:00-17:00 in half-hour slots
+                DoctorSchedule.objects.bulk_create([
+                    DoctorSchedule(doctor=doctor, weekday=weekday, start_time=time(9), end_time=time(17))
+                    for weekday in range(5)
+                ])
             doctors.append(doctor)
             self.stdout.write(f'Created doctor: {doctor}')
         
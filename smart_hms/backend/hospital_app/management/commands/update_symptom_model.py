@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from hospital_app.ai_model.incremental import BATCH_SIZE, update_model
+from hospital_app.ai_model.model_store import TrainingInProgress
+from hospital_app.training_export import export_training_data
+
+
+class Command(BaseCommand):
+    help = ('Fold the diagnoses of new medical records into the symptom model incrementally '
+            'and publish it as a new version, without a full retrain')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help=f'Examples per partial_fit mini-batch (default {BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--min-examples', type=int, default=1,
+            help='Publish a new version only once this many new examples are waiting (default 1)'
+        )
+        parser.add_argument(
+            '--every', type=float,
+            help='Keep running, updating the model every this many seconds'
+        )
+        parser.add_argument(
+            '--no-export', action='store_true',
+            help='Only fold in what the training store already holds, without exporting new medical records first'
+        )
+        parser.add_argument(
+            '--no-wait', action='store_true',
+            help='Fail instead of waiting if another process is already training'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        while True:
+            self.update(options)
+            if options['every'] is None:
+                return
+            time.sleep(options['every'])
+
+    def update(self, options):
+        if not options['no_export']:
+            examples, records = export_training_data()
+            self.stdout.write(f'Exported {examples} training examples from {records} new medical records')
+        try:
+            folded, version = update_model(
+                settings.SYMPTOM_TRAINING_STORE, batch_size=options['batch_size'],
+                min_examples=options['min_examples'], blocking=not options['no_wait'],
+            )
+        except TrainingInProgress as e:
+            raise CommandError(str(e))
+        if version is None:
+            self.stdout.write(f'{folded} new training examples, the published model was not changed')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Folded {folded} training examples into symptom model version {version}'))
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:02
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def count_existing_rows(apps, schema_editor):
+    """Start the counters from the rows that exist when the table is created"""
+    User = apps.get_model('hospital_app', 'User')
+    Doctor = apps.get_model('hospital_app', 'Doctor')
+    Patient = apps.get_model('hospital_app', 'Patient')
+    Appointment = apps.get_model('hospital_app', 'Appointment')
+    HospitalStats = apps.get_model('hospital_app', 'HospitalStats')
+
+    counters = [
+        HospitalStats(metric='users_by_role', key=row['role'], count=row['count'])
+        for row in User.objects.order_by().values('role').annotate(count=Count('id'))
+    ]
+    counters += [
+        HospitalStats(metric='profiles', key='doctor', count=Doctor.objects.count()),
+        HospitalStats(metric='profiles', key='patient', count=Patient.objects.count()),
+    ]
+    counters += [
+        HospitalStats(metric='appointments_by_status', key=row['status'], count=row['count'])
+        for row in Appointment.objects.order_by().values('status').annotate(count=Count('id'))
+    ]
+    counters += [
+        HospitalStats(metric='appointments_by_day', key=row['day'].isoformat(), count=row['count'])
+        for row in Appointment.objects.order_by().annotate(
+            day=TruncDate('appointment_date')
+        ).values('day').annotate(count=Count('id'))
+    ]
+    HospitalStats.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital_app', '0002_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HospitalStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('users_by_role', 'Users by role'), ('profiles', 'Doctor and patient profiles'), ('appointments_by_status', 'Appointments by status'), ('appointments_by_day', 'Appointments by day')], max_length=30)),
+                ('key', models.CharField(max_length=30)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'hospital stats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='hospitalstats',
+            constraint=models.UniqueConstraint(fields=('metric', 'key'), name='hospital_stats_metric_key'),
+        ),
+        migrations.RunPython(count_existing_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:14
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+import django.db.models.deletion
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def backfill_links(apps, schema_editor):
+    """One row per doctor-patient pair with appointments, a chunk of patients at a time"""
+    Patient = apps.get_model('hospital_app', 'Patient')
+    Appointment = apps.get_model('hospital_app', 'Appointment')
+    DoctorPatient = apps.get_model('hospital_app', 'DoctorPatient')
+
+    last_id = 0
+    while True:
+        ids = list(Patient.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:BACKFILL_CHUNK_SIZE])
+        if not ids:
+            return
+        DoctorPatient.objects.bulk_create([
+            DoctorPatient(**row)
+            for row in Appointment.objects.filter(patient_id__gte=ids[0], patient_id__lte=ids[-1]).order_by().values(
+                'doctor_id', 'patient_id'
+            ).annotate(first_visit=Min('appointment_date'), last_visit=Max('appointment_date'), visit_count=Count('id'))
+        ])
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital_app', '0005_doctor_patient_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorPatient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_visit', models.DateTimeField()),
+                ('last_visit', models.DateTimeField()),
+                ('visit_count', models.PositiveIntegerField(default=0)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='patient_links', to='hospital_app.doctor')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='doctor_links', to='hospital_app.patient')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='doctorpatient',
+            constraint=models.UniqueConstraint(fields=('doctor', 'patient'), name='doctor_patient_unique'),
+        ),
+        migrations.RunPython(backfill_links, migrations.RunPython.noop),
+    ]
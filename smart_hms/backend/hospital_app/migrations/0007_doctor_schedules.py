@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:19
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital_app', '0006_doctor_patient'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('slot_minutes', models.PositiveSmallIntegerField(default=30, validators=[django.core.validators.MinValueValidator(5)])),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='hospital_app.doctor')),
+            ],
+            options={
+                'ordering': ['weekday', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DoctorTimeOff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('reason', models.CharField(blank=True, max_length=200)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='time_off', to='hospital_app.doctor')),
+            ],
+            options={
+                'verbose_name_plural': 'doctor time off',
+                'ordering': ['start'],
+                'indexes': [models.Index(fields=['doctor', 'end'], name='time_off_doctor_end_idx'), models.Index(fields=['end'], name='time_off_end_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='doctortimeoff',
+            constraint=models.CheckConstraint(check=models.Q(('start__lt', models.F('end'))), name='time_off_start_before_end'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorschedule',
+            index=models.Index(fields=['doctor', 'weekday', 'start_time'], name='schedule_doctor_weekday_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='doctorschedule',
+            constraint=models.CheckConstraint(check=models.Q(('start_time__lt', models.F('end_time'))), name='schedule_start_before_end'),
+        ),
+    ]
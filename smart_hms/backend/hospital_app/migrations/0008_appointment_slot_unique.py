@@ -0,0 +1,82 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:32
+
+import logging
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BOOKED_STATUSES = ('scheduled', 'confirmed')
+
+
+def cancel_double_bookings(apps, schema_editor):
+    """Cancel the stale double bookings the constraint would refuse; abort on upcoming ones.
+
+    Only scheduled and confirmed appointments are looked at, so completed and
+    other visits stay as they are. Of each doctor's booked appointments at the
+    same past time, all but the first-made are cancelled and listed in the
+    log. Upcoming double bookings need someone to decide which patient keeps
+    the slot, so they are listed and the migration stops without changing
+    anything.
+    """
+    Appointment = apps.get_model('hospital_app', 'Appointment')
+    booked = Appointment.objects.filter(status__in=BOOKED_STATUSES).order_by()
+    slots = list(
+        booked.values('doctor_id', 'appointment_date').annotate(count=Count('id')).filter(count__gt=1)
+        .order_by('doctor_id', 'appointment_date')
+    )
+    now = timezone.now()
+    upcoming = [slot for slot in slots if slot['appointment_date'] >= now]
+    if upcoming:
+        lines = [
+            f"  doctor {slot['doctor_id']} at {slot['appointment_date'].isoformat()}: appointments "
+            + ', '.join(str(pk) for pk in booked.filter(
+                doctor_id=slot['doctor_id'], appointment_date=slot['appointment_date']
+            ).order_by('created_at', 'id').values_list('id', flat=True))
+            for slot in upcoming
+        ]
+        raise RuntimeError(
+            'Upcoming appointments are double-booked; cancel or move all but one of each group, then migrate again:\n'
+            + '\n'.join(lines)
+        )
+
+    cancelled = []
+    for slot in slots:
+        duplicates = booked.filter(doctor_id=slot['doctor_id'], appointment_date=slot['appointment_date'])
+        ids = list(duplicates.order_by('created_at', 'id').values_list('id', flat=True))
+        Appointment.objects.filter(id__in=ids[1:]).update(status='cancelled')
+        logger.warning(
+            f"Cancelled past double bookings of doctor {slot['doctor_id']} at "
+            f"{slot['appointment_date'].isoformat()}: appointments {', '.join(map(str, ids[1:]))} (kept {ids[0]})"
+        )
+        cancelled += ids[1:]
+    if cancelled:
+        # update() bypasses the signals that keep the status counters current
+        recount_appointment_statuses(apps)
+
+
+def recount_appointment_statuses(apps):
+    Appointment = apps.get_model('hospital_app', 'Appointment')
+    HospitalStats = apps.get_model('hospital_app', 'HospitalStats')
+    HospitalStats.objects.filter(metric='appointments_by_status').delete()
+    HospitalStats.objects.bulk_create([
+        HospitalStats(metric='appointments_by_status', key=row['status'], count=row['count'])
+        for row in Appointment.objects.order_by().values('status').annotate(count=Count('id'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital_app', '0007_doctor_schedules'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_double_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['scheduled', 'confirmed'])), fields=('doctor', 'appointment_date'), name='appt_doctor_slot_unique'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_predictions(apps, schema_editor):
+    from hospital_app.predictions import backfill_predictions
+
+    backfill_predictions(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital_app', '0008_appointment_slot_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SymptomPrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('condition', models.CharField(max_length=100)),
+                ('confidence', models.FloatField(null=True)),
+            ],
+            options={
+                'ordering': ['symptom_check', 'rank'],
+            },
+        ),
+        migrations.AddField(
+            model_name='symptomchecker',
+            name='top_condition',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='symptomchecker',
+            index=models.Index(fields=['top_condition', '-created_at'], name='symptom_top_condition_idx'),
+        ),
+        migrations.AddField(
+            model_name='symptomprediction',
+            name='symptom_check',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='predictions', to='hospital_app.symptomchecker'),
+        ),
+        migrations.AddIndex(
+            model_name='symptomprediction',
+            index=models.Index(fields=['condition', '-confidence'], name='prediction_condition_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='symptomprediction',
+            constraint=models.UniqueConstraint(fields=('symptom_check', 'rank'), name='prediction_check_rank_unique'),
+        ),
+        migrations.RunPython(backfill_predictions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital_app', '0009_symptom_predictions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicalRecordPrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_version', models.CharField(blank=True, max_length=100)),
+                ('predicted_conditions', models.JSONField(default=list)),
+                ('confidence_scores', models.JSONField(default=dict)),
+                ('top_condition', models.CharField(blank=True, default='', max_length=100)),
+                ('scored_at', models.DateTimeField(auto_now=True)),
+                ('medical_record', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ai_prediction', to='hospital_app.medicalrecord')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['top_condition'], name='record_prediction_top_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_labeled_at(apps, schema_editor):
+    # The last change of an existing record is the best guess at when it was diagnosed
+    MedicalRecord = apps.get_model('hospital_app', 'MedicalRecord')
+    MedicalRecord.objects.update(labeled_at=models.F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital_app', '0010_medical_record_predictions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalrecord',
+            name='labeled_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(backfill_labeled_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='medicalrecord',
+            index=models.Index(fields=['labeled_at', 'id'], name='record_labeled_idx'),
+        ),
+    ]
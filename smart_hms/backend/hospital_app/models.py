@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractUser
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils import timezone
 
@@ -79,6 +80,60 @@ class Admin(models.Model):
         return f"Admin: {self.user.get_full_name() or self.user.username}"
 
 
+class DoctorSchedule(models.Model):
+    """Weekly working hours of a doctor, divided into appointment slots"""
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+    
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='schedules')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()  # Local time (settings.TIME_ZONE)
+    end_time = models.TimeField()
+    slot_minutes = models.PositiveSmallIntegerField(default=30, validators=[MinValueValidator(5)])
+    
+    class Meta:
+        ordering = ['weekday', 'start_time']
+        constraints = [
+            models.CheckConstraint(check=models.Q(start_time__lt=models.F('end_time')), name='schedule_start_before_end'),
+        ]
+        indexes = [
+            models.Index(fields=['doctor', 'weekday', 'start_time'], name='schedule_doctor_weekday_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Dr. {self.doctor.user.username}: {self.get_weekday_display()} {self.start_time}-{self.end_time}"
+
+
+class DoctorTimeOff(models.Model):
+    """A period a doctor takes no appointments, e.g. leave or a conference"""
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='time_off')
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    reason = models.CharField(max_length=200, blank=True)
+    
+    class Meta:
+        ordering = ['start']
+        verbose_name_plural = 'doctor time off'
+        constraints = [
+            models.CheckConstraint(check=models.Q(start__lt=models.F('end')), name='time_off_start_before_end'),
+        ]
+        indexes = [
+            # Time off overlapping a search window: end after its start
+            models.Index(fields=['doctor', 'end'], name='time_off_doctor_end_idx'),
+            models.Index(fields=['end'], name='time_off_end_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Dr. {self.doctor.user.username} off {self.start} - {self.end}"
+
+
 class Appointment(models.Model):
     """Appointment scheduling"""
     STATUS_CHOICES = [
@@ -100,6 +155,23 @@ class Appointment(models.Model):
     
     class Meta:
         ordering = ['-appointment_date']
+        indexes = [
+            # Role-scoped lists, newest first
+            models.Index(fields=['doctor', '-appointment_date', '-id'], name='appt_doctor_date_idx'),
+            models.Index(fields=['patient', '-appointment_date', '-id'], name='appt_patient_date_idx'),
+            models.Index(fields=['-appointment_date', '-id'], name='appt_date_idx'),
+            # Admin dashboard counts by status
+            models.Index(fields=['status', 'appointment_date'], name='appt_status_date_idx'),
+            # Visit aggregates of one doctor-patient pair (relationships.refresh_link)
+            models.Index(fields=['doctor', 'patient'], name='appt_doctor_patient_idx'),
+        ]
+        constraints = [
+            # No double booking of upcoming visits, even by concurrent requests (booking.py)
+            models.UniqueConstraint(
+                fields=['doctor', 'appointment_date'], condition=models.Q(status__in=['scheduled', 'confirmed']),
+                name='appt_doctor_slot_unique'
+            ),
+        ]
     
     def __str__(self):
         return f"Appointment: {self.patient.user.username} with Dr. {self.doctor.user.username} on {self.appointment_date}"
@@ -116,9 +188,18 @@ class MedicalRecord(models.Model):
     vital_signs = models.JSONField(default=dict, blank=True)  # Store BP, temperature, etc.
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # When the symptoms or diagnosis last changed, kept up to date by signals in training_export.py
+    labeled_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['doctor', '-created_at', '-id'], name='record_doctor_created_idx'),
+            models.Index(fields=['patient', '-created_at', '-id'], name='record_patient_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='record_created_idx'),
+            # Training data export of new and changed records
+            models.Index(fields=['labeled_at', 'id'], name='record_labeled_idx'),
+        ]
     
     def __str__(self):
         return f"Medical Record: {self.patient.user.username} - {self.created_at.date()}"
@@ -139,6 +220,13 @@ class Prescription(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['doctor', '-created_at', '-id'], name='rx_doctor_created_idx'),
+            models.Index(fields=['patient', '-created_at', '-id'], name='rx_patient_created_idx'),
+            # Active prescriptions on the patient dashboard
+            models.Index(fields=['patient', 'is_active', '-created_at', '-id'], name='rx_patient_active_idx'),
+            models.Index(fields=['-created_at', '-id'], name='rx_created_idx'),
+        ]
     
     def __str__(self):
         return f"Prescription: {self.medication_name} for {self.patient.user.username}"
@@ -151,10 +239,100 @@ class SymptomChecker(models.Model):
     predicted_conditions = models.JSONField(default=list)
     confidence_scores = models.JSONField(default=dict)
     recommendations = models.TextField(blank=True)
+    # First of predicted_conditions, kept by predictions.py
+    top_condition = models.CharField(max_length=100, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['patient', '-created_at', '-id'], name='symptom_patient_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='symptom_created_idx'),
+            # Checks with a given top prediction in a time range
+            models.Index(fields=['top_condition', '-created_at'], name='symptom_top_condition_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Symptom Check: {self.symptoms[:50]}... - {self.created_at.date()}"
+
+
+class SymptomPrediction(models.Model):
+    """One ranked condition of a symptom check's predictions, kept by predictions.py"""
+    # Indexed by the unique constraint
+    symptom_check = models.ForeignKey(SymptomChecker, on_delete=models.CASCADE, related_name='predictions', db_index=False)
+    rank = models.PositiveSmallIntegerField()
+    condition = models.CharField(max_length=100)
+    confidence = models.FloatField(null=True)
+    
+    class Meta:
+        ordering = ['symptom_check', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['symptom_check', 'rank'], name='prediction_check_rank_unique'),
+        ]
+        indexes = [
+            # Checks predicting a condition, by confidence
+            models.Index(fields=['condition', '-confidence'], name='prediction_condition_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.rank}. {self.condition} ({self.confidence})"
+
+
+class MedicalRecordPrediction(models.Model):
+    """AI symptom checker predictions for a medical record's symptoms, written by record_scoring.py"""
+    medical_record = models.OneToOneField(MedicalRecord, on_delete=models.CASCADE, related_name='ai_prediction')
+    # Published symptom model version that scored the record
+    model_version = models.CharField(max_length=100, blank=True)
+    predicted_conditions = models.JSONField(default=list)
+    confidence_scores = models.JSONField(default=dict)
+    top_condition = models.CharField(max_length=100, blank=True, default='')
+    scored_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['top_condition'], name='record_prediction_top_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Prediction for record {self.medical_record_id}: {self.top_condition}"
+
+
+class HospitalStats(models.Model):
+    """Running counts behind the admin dashboard, kept up to date by signals in stats.py"""
+    METRIC_CHOICES = [
+        ('users_by_role', 'Users by role'),
+        ('profiles', 'Doctor and patient profiles'),
+        ('appointments_by_status', 'Appointments by status'),
+        ('appointments_by_day', 'Appointments by day'),
+    ]
+    
+    metric = models.CharField(max_length=30, choices=METRIC_CHOICES)
+    key = models.CharField(max_length=30)  # role, profile type, status or ISO date
+    count = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = 'hospital stats'
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'key'], name='hospital_stats_metric_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.metric}[{self.key}]: {self.count}"
+
+
+class DoctorPatient(models.Model):
+    """Doctors and the patients they have appointments with, kept up to date by signals in relationships.py"""
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='patient_links')
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='doctor_links')
+    first_visit = models.DateTimeField()
+    last_visit = models.DateTimeField()
+    visit_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            # Also the index behind a doctor's patient lists
+            models.UniqueConstraint(fields=['doctor', 'patient'], name='doctor_patient_unique'),
+        ]
     
     def __str__(self):
-        return f"Symptom Check: {self.symptoms[:50]}... - {self.created_at.date()}"
\ No newline at end of file
+        return f"Dr. {self.doctor.user.username} - {self.patient.user.username} ({self.visit_count} visits)"
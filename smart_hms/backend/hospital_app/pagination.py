@@ -0,0 +1,152 @@
+"""Keyset (cursor) pagination for large, append-mostly lists.
+
+Page-number pagination costs a ``COUNT(*)`` plus an ``OFFSET`` scan that grows
+with the page number. Keyset pagination instead remembers the sort key of the
+last row served and asks for the rows after it, which an index on the ordering
+answers directly however deep the page, and which neither skips nor repeats
+rows when new ones are inserted between requests.
+"""
+import base64
+import json
+from collections import OrderedDict
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination keyed on the model's default ordering plus ``id``.
+
+    Responses have ``next``, ``previous`` and ``results``; the cursors are
+    opaque. Requests with a ``page`` parameter get page-number pagination
+    instead, for clients that need page numbers or a total ``count``.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    # Defaults to the model's Meta.ordering; fields must not be nullable
+    ordering = None
+    page_number_pagination_class = PageNumberPagination
+
+    def __init__(self):
+        self.page_number_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_number_pagination_class.page_query_param in request.query_params:
+            self.page_number_paginator = self.page_number_pagination_class()
+            return self.page_number_paginator.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        self.fields = self.get_ordering_fields(queryset)
+        values, reverse = self.decode_cursor(request)
+
+        rows = list(self.keyset_queryset(queryset, values, reverse)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        # Going back, there is always a next page (the one we came from);
+        # going forward, a previous page whenever a cursor was given
+        has_next = has_more if not reverse else True
+        has_previous = has_more if reverse else values is not None
+        self.next_values = self.key(self.page[-1]) if has_next and self.page else None
+        self.previous_values = self.key(self.page[0]) if has_previous and self.page else None
+        return self.page
+
+    def get_paginated_response(self, data):
+        if self.page_number_paginator is not None:
+            return self.page_number_paginator.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def get_ordering_fields(self, queryset):
+        """``[(field name, descending)]`` of the ordering, ending with ``id``"""
+        ordering = list(self.ordering or queryset.model._meta.ordering)
+        fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        if not any(name in ('id', 'pk') for name, _ in fields):
+            # The tiebreaker follows the direction of the main ordering
+            fields.append(('id', fields[0][1] if fields else False))
+        return fields
+
+    def keyset_queryset(self, queryset, values=None, reverse=False):
+        """``queryset`` in keyset order, from just after ``values``"""
+        # Reading backwards (for a previous page) flips every direction
+        order_by = [('-' if descending != reverse else '') + name for name, descending in self.fields]
+        queryset = queryset.order_by(*order_by)
+        if values is not None:
+            queryset = queryset.filter(self.after(values, reverse))
+        return queryset
+
+    def after(self, values, reverse):
+        """Rows strictly after ``values`` in the (possibly reversed) ordering"""
+        condition = Q()
+        for index, (name, descending) in enumerate(self.fields):
+            lookup = 'gt' if descending == reverse else 'lt'
+            equal = {prefix: value for (prefix, _), value in zip(self.fields[:index], values[:index])}
+            condition |= Q(**equal, **{f'{name}__{lookup}': values[index]})
+        return condition
+
+    def key(self, instance):
+        return [getattr(instance, name) for name, _ in self.fields]
+
+    def encode_cursor(self, values, reverse=False):
+        # str() keeps full datetime precision (DjangoJSONEncoder drops microseconds)
+        payload = json.dumps({'k': values, 'r': int(reverse)}, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        """``(key values, reverse)`` of the request's cursor; ``(None, False)`` for the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            raw_values = payload['k']
+            if len(raw_values) != len(self.fields):
+                raise ValueError(encoded)
+            values = [
+                self.model._meta.get_field(name).to_python(value) for (name, _), value in zip(self.fields, raw_values)
+            ]
+            return values, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_values is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    def get_previous_link(self):
+        if self.previous_values is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.previous_values, reverse=True))
@@ -0,0 +1,111 @@
+"""Queryable symptom check predictions: the SymptomPrediction table and SymptomChecker.top_condition.
+
+``predicted_conditions`` and ``confidence_scores`` stay the JSON of record;
+this module mirrors them into a row per ranked condition and a top condition
+column, both indexed, so questions like "checks whose top prediction was
+heart_attack this week" or "condition frequency by day" are answered by the
+database. Signals on SymptomChecker keep them current on ``save``; code that
+creates checks with ``bulk_create`` goes through ``create_symptom_checks``.
+``manage.py backfill_symptom_check_predictions`` rebuilds them.
+"""
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from .models import SymptomChecker, SymptomPrediction
+
+BACKFILL_CHUNK_SIZE = 1000
+
+PREDICTION_FIELDS = {'predicted_conditions', 'confidence_scores'}
+
+CONDITION_LENGTH = SymptomPrediction._meta.get_field('condition').max_length
+
+
+def _conditions(predicted_conditions):
+    if not isinstance(predicted_conditions, list):
+        return []
+    return [condition[:CONDITION_LENGTH] for condition in predicted_conditions if isinstance(condition, str)]
+
+
+def top_condition(predicted_conditions):
+    """The first-ranked condition of ``predicted_conditions``, or ''"""
+    conditions = _conditions(predicted_conditions)
+    return conditions[0] if conditions else ''
+
+
+def prediction_rows(check, model=SymptomPrediction):
+    """Unsaved prediction rows of a saved ``check``, ranked from 1; ``model`` may be a historical one"""
+    scores = check.confidence_scores if isinstance(check.confidence_scores, dict) else {}
+    rows = []
+    for rank, condition in enumerate(_conditions(check.predicted_conditions), 1):
+        confidence = scores.get(condition)
+        rows.append(model(
+            symptom_check_id=check.pk, rank=rank, condition=condition,
+            confidence=float(confidence) if isinstance(confidence, (int, float)) else None,
+        ))
+    return rows
+
+
+def create_symptom_checks(checks):
+    """``bulk_create`` unsaved SymptomChecker instances along with their top condition and prediction rows"""
+    for check in checks:
+        check.top_condition = top_condition(check.predicted_conditions)
+    # Without a savepoint: inside a caller's transaction, a failure rolls that back anyway
+    with transaction.atomic(savepoint=False):
+        created = SymptomChecker.objects.bulk_create(checks, batch_size=500)
+        SymptomPrediction.objects.bulk_create(
+            [row for check in created for row in prediction_rows(check)], batch_size=1000
+        )
+    return created
+
+
+@receiver(pre_save, sender=SymptomChecker)
+def set_top_condition(sender, instance, **kwargs):
+    instance.top_condition = top_condition(instance.predicted_conditions)
+
+
+@receiver(post_save, sender=SymptomChecker)
+def write_predictions(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not PREDICTION_FIELDS & set(update_fields):
+        return
+    if not created:
+        instance.predictions.all().delete()
+    SymptomPrediction.objects.bulk_create(prediction_rows(instance))
+
+
+def backfill_predictions(apps=global_apps, chunk_size=BACKFILL_CHUNK_SIZE, after_id=0, progress=None):
+    """Rebuild top conditions and prediction rows, ``chunk_size`` checks per transaction; returns the number of rows.
+
+    Starts after check ``after_id``, to resume an interrupted run. ``apps``
+    is the app registry to take models from, so migrations can pass their
+    historical one. ``progress``, if given, is called after every chunk with
+    the numbers of checks and rows done so far and the last check id.
+    """
+    SymptomChecker = apps.get_model('hospital_app', 'SymptomChecker')
+    SymptomPrediction = apps.get_model('hospital_app', 'SymptomPrediction')
+
+    checks = rows = 0
+    last_id = after_id
+    while True:
+        chunk = list(
+            SymptomChecker.objects.filter(pk__gt=last_id).order_by('pk')
+            .only('pk', 'predicted_conditions', 'confidence_scores', 'top_condition')[:chunk_size]
+        )
+        if not chunk:
+            return rows
+        new_rows = [row for check in chunk for row in prediction_rows(check, model=SymptomPrediction)]
+        changed = []
+        for check in chunk:
+            top = top_condition(check.predicted_conditions)
+            if check.top_condition != top:
+                check.top_condition = top
+                changed.append(check)
+        with transaction.atomic():
+            SymptomChecker.objects.bulk_update(changed, ['top_condition'], batch_size=500)
+            SymptomPrediction.objects.filter(symptom_check_id__gte=chunk[0].pk, symptom_check_id__lte=chunk[-1].pk).delete()
+            SymptomPrediction.objects.bulk_create(new_rows, batch_size=1000)
+        checks += len(chunk)
+        rows += len(new_rows)
+        last_id = chunk[-1].pk
+        if progress:
+            progress(checks, rows, last_id)
@@ -0,0 +1,86 @@
+"""Backfill of AI symptom checker predictions over historical medical records.
+
+``MedicalRecord.symptoms`` is streamed in id order with ``.iterator()`` and
+cut into chunks. Each chunk is scored with one ``predict_batch`` call, in this
+process or, with ``workers`` > 1, in a process pool that keeps a few chunks
+in flight per worker. Every chunk is scored by the published model version
+that was live when the backfill started. Results are saved in id order, one bulk upsert of
+MedicalRecordPrediction rows per chunk, so the highest scored record id is a
+checkpoint to resume from (``resume_after_id``).
+"""
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from django.db import transaction
+from .ai_model.batch_scoring import load_scorer, score_chunk
+from .models import MedicalRecord, MedicalRecordPrediction
+from .predictions import top_condition
+
+SCORE_CHUNK_SIZE = 500
+
+# Chunks queued per pool worker, so workers never wait on the database reader
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+UPDATED_FIELDS = ['model_version', 'predicted_conditions', 'confidence_scores', 'top_condition', 'scored_at']
+
+
+def resume_after_id():
+    """Id of the last medical record scored so far, 0 if none"""
+    return MedicalRecordPrediction.objects.order_by('-medical_record_id').values_list(
+        'medical_record_id', flat=True
+    ).first() or 0
+
+
+def score_medical_records(chunk_size=SCORE_CHUNK_SIZE, workers=1, after_id=0, progress=None):
+    """Score the symptoms of medical records after record ``after_id``; returns the number scored.
+
+    Raises FileNotFoundError, before reading any record, if no symptom model
+    is published. Records scored before are scored again. ``progress``, if
+    given, is called after every chunk with the number of records scored so
+    far, the last record id and the rate in records per second.
+    """
+    version = load_scorer().artifact_version
+    records = MedicalRecord.objects.filter(pk__gt=after_id).order_by('pk').values_list(
+        'pk', 'symptoms'
+    ).iterator(chunk_size=chunk_size)
+    chunks = iter(lambda: list(islice(records, chunk_size)), [])
+    scored = 0
+    started = time.perf_counter()
+    for _, results in (_score_in_pool(chunks, workers, version) if workers > 1 else map(score_chunk, chunks)):
+        save_record_predictions(version, results)
+        scored += len(results)
+        if progress:
+            progress(scored, results[-1][0], scored / (time.perf_counter() - started))
+    return scored
+
+
+def _score_in_pool(chunks, workers, version):
+    # Workers only score; reading and saving stay in this process
+    with ProcessPoolExecutor(max_workers=workers, initializer=load_scorer, initargs=(version,)) as pool:
+        # Submitted one by one, as Executor.map would read every chunk up front
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(score_chunk, chunk))
+            if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def save_record_predictions(version, results):
+    """Upsert the MedicalRecordPrediction rows of ``results``, (record id, prediction) pairs"""
+    with transaction.atomic():
+        # Records deleted since they were read are left out
+        existing = set(MedicalRecord.objects.filter(pk__in=[pk for pk, _ in results]).values_list('pk', flat=True))
+        MedicalRecordPrediction.objects.bulk_create(
+            [
+                MedicalRecordPrediction(
+                    medical_record_id=pk, model_version=version,
+                    predicted_conditions=prediction['conditions'], confidence_scores=prediction['confidence'],
+                    top_condition=top_condition(prediction['conditions']),
+                )
+                for pk, prediction in results if pk in existing
+            ],
+            batch_size=500, update_conflicts=True, unique_fields=['medical_record'], update_fields=UPDATED_FIELDS,
+        )
@@ -0,0 +1,145 @@
+"""The DoctorPatient table: which patients each doctor has had appointments with.
+
+Signals on Appointment keep a row per doctor-patient pair with its first and
+last visit and visit count, so role scoping looks a doctor's patients up by
+index instead of searching the Appointment table on every request. A new
+appointment updates its pair's row in place; moving or deleting one
+recomputes the pairs involved from their appointments. Changes made without
+signals (``QuerySet.update``, ``bulk_create``, raw SQL) are not tracked, unless
+the code making them records them itself like ``record_visits``;
+``manage.py backfill_doctor_patients`` rebuilds the table from scratch.
+"""
+from functools import reduce
+from operator import or_
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Max, Min, Q, Value, When
+from django.db.models.functions import Greatest, Least
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from .models import Appointment, DoctorPatient, Patient
+
+BACKFILL_CHUNK_SIZE = 1000
+
+LINK_FIELDS = {'doctor', 'doctor_id', 'patient', 'patient_id', 'appointment_date'}
+
+
+def record_visit(doctor_id, patient_id, visited_at):
+    """Atomically count a new appointment on its pair's row, creating it if needed"""
+    links = DoctorPatient.objects.filter(doctor_id=doctor_id, patient_id=patient_id)
+    visit = Value(visited_at, output_field=models.DateTimeField())
+    changes = {
+        'visit_count': F('visit_count') + 1,
+        'first_visit': Least('first_visit', visit),
+        'last_visit': Greatest('last_visit', visit),
+    }
+    if not links.update(**changes):
+        DoctorPatient.objects.bulk_create(
+            [DoctorPatient(doctor_id=doctor_id, patient_id=patient_id, first_visit=visited_at, last_visit=visited_at)],
+            ignore_conflicts=True,
+        )
+        links.update(**changes)
+
+
+def record_visits(appointments):
+    """Count appointments created without signals (``bulk_create``) on their pairs' rows, in two queries"""
+    visits = {}
+    for appointment in appointments:
+        pair = (appointment.doctor_id, appointment.patient_id)
+        first, last, count = visits.get(pair, (appointment.appointment_date, appointment.appointment_date, 0))
+        visits[pair] = (min(first, appointment.appointment_date), max(last, appointment.appointment_date), count + 1)
+    if not visits:
+        return
+    DoctorPatient.objects.bulk_create([
+        DoctorPatient(doctor_id=doctor_id, patient_id=patient_id, first_visit=first, last_visit=last)
+        for (doctor_id, patient_id), (first, last, _) in visits.items()
+    ], ignore_conflicts=True)
+
+    def per_pair(position, output_field):
+        return Case(*(
+            When(doctor_id=doctor_id, patient_id=patient_id, then=Value(visit[position], output_field=output_field))
+            for (doctor_id, patient_id), visit in visits.items()
+        ), output_field=output_field)
+
+    DoctorPatient.objects.filter(
+        reduce(or_, (Q(doctor_id=doctor_id, patient_id=patient_id) for doctor_id, patient_id in visits))
+    ).update(
+        visit_count=F('visit_count') + per_pair(2, models.PositiveIntegerField()),
+        first_visit=Least('first_visit', per_pair(0, models.DateTimeField())),
+        last_visit=Greatest('last_visit', per_pair(1, models.DateTimeField())),
+    )
+
+
+def refresh_link(doctor_id, patient_id):
+    """Recompute a pair's row from its appointments, deleting it if there are none"""
+    visits = Appointment.objects.filter(doctor_id=doctor_id, patient_id=patient_id).aggregate(
+        first_visit=Min('appointment_date'), last_visit=Max('appointment_date'), visit_count=Count('id'),
+    )
+    if visits['visit_count']:
+        DoctorPatient.objects.update_or_create(doctor_id=doctor_id, patient_id=patient_id, defaults=visits)
+    else:
+        DoctorPatient.objects.filter(doctor_id=doctor_id, patient_id=patient_id).delete()
+
+
+def _appointment_link(instance):
+    # From __dict__ so that deferred fields are not loaded
+    fields = instance.__dict__
+    if not {'doctor_id', 'patient_id', 'appointment_date'} <= fields.keys():
+        return None
+    return fields['doctor_id'], fields['patient_id'], fields['appointment_date']
+
+
+@receiver(post_init, sender=Appointment)
+def remember_appointment_link(sender, instance, **kwargs):
+    instance._link_state = _appointment_link(instance)
+
+
+@receiver(post_save, sender=Appointment)
+def link_saved_appointment(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not LINK_FIELDS & set(update_fields):
+        return
+    new_state = _appointment_link(instance)
+    old_state = None if created else getattr(instance, '_link_state', None)
+    if created:
+        record_visit(*new_state)
+    elif old_state != new_state:
+        # The previous pair is unknown if loaded with deferred fields
+        pairs = {new_state[:2]} | ({old_state[:2]} if old_state else set())
+        for doctor_id, patient_id in pairs:
+            refresh_link(doctor_id, patient_id)
+    instance._link_state = new_state
+
+
+@receiver(post_delete, sender=Appointment)
+def unlink_deleted_appointment(sender, instance, **kwargs):
+    state = getattr(instance, '_link_state', None) or _appointment_link(instance)
+    if state is not None:
+        refresh_link(*state[:2])
+
+
+def backfill_links(chunk_size=BACKFILL_CHUNK_SIZE, progress=None):
+    """Rebuild the table from Appointment, ``chunk_size`` patients per transaction; returns the number of rows.
+
+    ``progress``, if given, is called after every chunk with the numbers of
+    patients and rows done so far.
+    """
+    patients = links = 0
+    last_id = 0
+    while True:
+        ids = list(Patient.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return links
+        chunk = {'patient_id__gte': ids[0], 'patient_id__lte': ids[-1]}
+        with transaction.atomic():
+            rows = [
+                DoctorPatient(**row)
+                for row in Appointment.objects.filter(**chunk).order_by().values('doctor_id', 'patient_id').annotate(
+                    first_visit=Min('appointment_date'), last_visit=Max('appointment_date'), visit_count=Count('id'),
+                )
+            ]
+            DoctorPatient.objects.filter(**chunk).delete()
+            DoctorPatient.objects.bulk_create(rows)
+        patients += len(ids)
+        links += len(rows)
+        last_id = ids[-1]
+        if progress:
+            progress(patients, links)
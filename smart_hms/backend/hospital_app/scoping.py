@@ -0,0 +1,59 @@
+"""Role-based scoping: which rows of each model a user may see.
+
+Viewsets declare ``role_scopes``, mapping a role to a function of the user that
+returns a filter condition; roles without an entry see nothing. A doctor sees
+a patient once they have had an appointment together, which is looked up in
+the DoctorPatient table: it has one row per pair, so the join needs no
+``DISTINCT`` and reads only the doctor's own patients.
+"""
+from django.db.models import Q
+
+
+def everything(user):
+    """Scope of roles that see every row"""
+    return Q()
+
+
+def own(lookup):
+    """Scope of rows whose ``lookup`` is the user, e.g. ``own('patient__user')``"""
+    return lambda user: Q(**{lookup: user})
+
+
+def own_user(user):
+    """Scope of User rows that sees only the user themselves"""
+    return Q(pk=user.pk)
+
+
+def matching(**filters):
+    """Scope of rows matching fixed ``filters``, whoever the user"""
+    return lambda user: Q(**filters)
+
+
+def seen_by_doctor(patient=None):
+    """Scope of rows whose patient has had an appointment with the doctor.
+
+    ``patient`` is the lookup from the scoped model to its Patient, or None
+    when scoping Patient itself.
+    """
+    lookup = f'{patient}__doctor_links__doctor__user' if patient else 'doctor_links__doctor__user'
+    return lambda user: Q(**{lookup: user})
+
+
+def scope_queryset(queryset, user, role_scopes):
+    """``queryset`` restricted to what ``user`` may see under ``role_scopes``"""
+    scope = role_scopes.get(user.role)
+    if scope is None:
+        return queryset.none()
+    return queryset.filter(scope(user))
+
+
+class RoleScopedMixin:
+    """Scope a viewset's ``get_queryset`` by the requesting user's role"""
+    role_scopes = {}
+
+    def get_queryset(self):
+        return self.scope_queryset(super().get_queryset(), self.request.user)
+
+    @classmethod
+    def scope_queryset(cls, queryset, user):
+        return scope_queryset(queryset, user, cls.role_scopes)
@@ -1,7 +1,14 @@
+from datetime import datetime, timedelta
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.utils import timezone
 from django.contrib.auth.password_validation import validate_password
-from .models import User, Patient, Doctor, Admin, Appointment, MedicalRecord, Prescription, SymptomChecker
+from .models import (
+    User, Patient, Doctor, Admin, Appointment, MedicalRecord, Prescription, SymptomChecker,
+    DoctorSchedule, DoctorTimeOff,
+)
+
+MAX_BULK_APPOINTMENTS = 500
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -42,6 +49,44 @@ class AdminSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class DoctorScheduleSerializer(serializers.ModelSerializer):
+    """Doctor working hours serializer"""
+    class Meta:
+        model = DoctorSchedule
+        fields = ['id', 'doctor', 'weekday', 'start_time', 'end_time', 'slot_minutes']
+        read_only_fields = ['id']
+        extra_kwargs = {'doctor': {'required': False}}
+    
+    def validate(self, attrs):
+        start_time = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time and end_time and start_time >= end_time:
+            raise serializers.ValidationError("Working hours must end after they start")
+        return attrs
+
+
+class DoctorTimeOffSerializer(serializers.ModelSerializer):
+    """Doctor time off serializer"""
+    class Meta:
+        model = DoctorTimeOff
+        fields = ['id', 'doctor', 'start', 'end', 'reason']
+        read_only_fields = ['id']
+        extra_kwargs = {'doctor': {'required': False}}
+    
+    def validate(self, attrs):
+        start = attrs.get('start', getattr(self.instance, 'start', None))
+        end = attrs.get('end', getattr(self.instance, 'end', None))
+        if start and end and start >= end:
+            raise serializers.ValidationError("Time off must end after it starts")
+        return attrs
+
+
+class SlotSerializer(serializers.Serializer):
+    """Free appointment slot"""
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+
 class AppointmentSerializer(serializers.ModelSerializer):
     """Appointment serializer"""
     patient_name = serializers.CharField(source='patient.user.get_full_name', read_only=True)
@@ -60,6 +105,61 @@ class AppointmentSerializer(serializers.ModelSerializer):
         return None
 
 
+class AppointmentItemSerializer(serializers.Serializer):
+    """One appointment of a bulk request; doctors and patients are looked up for the whole batch"""
+    doctor = serializers.IntegerField(required=False)
+    patient = serializers.IntegerField(required=False)
+    appointment_date = serializers.DateTimeField()
+    reason = serializers.CharField()
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class BulkAppointmentSerializer(serializers.Serializer):
+    """Appointments to create at once; each item is validated on its own"""
+    appointments = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_BULK_APPOINTMENTS
+    )
+    
+    def to_items(self):
+        return self.validated_data['appointments']
+
+
+class AppointmentSeriesSerializer(AppointmentItemSerializer):
+    """Recurring appointments every ``interval`` days or weeks from ``start``, ``count`` of them or until ``until``"""
+    appointment_date = None
+    start = serializers.DateTimeField()
+    frequency = serializers.ChoiceField(choices=['daily', 'weekly'], default='weekly')
+    interval = serializers.IntegerField(min_value=1, default=1)
+    count = serializers.IntegerField(min_value=1, max_value=MAX_BULK_APPOINTMENTS, required=False)
+    until = serializers.DateTimeField(required=False)
+    
+    def validate(self, attrs):
+        if ('count' in attrs) == ('until' in attrs):
+            raise serializers.ValidationError("Give either 'count' or 'until'")
+        # Repeat the local time of day, across daylight saving changes
+        start = timezone.localtime(attrs['start'])
+        step = timedelta(days=attrs['interval'] * (7 if attrs['frequency'] == 'weekly' else 1))
+        dates = []
+        while len(dates) < attrs.get('count', MAX_BULK_APPOINTMENTS + 1):
+            moment = timezone.make_aware(datetime.combine(start.date() + step * len(dates), start.time()))
+            if 'until' in attrs and moment > attrs['until']:
+                break
+            if len(dates) == MAX_BULK_APPOINTMENTS:
+                raise serializers.ValidationError(f"A series has at most {MAX_BULK_APPOINTMENTS} appointments")
+            dates.append(moment)
+        if not dates:
+            raise serializers.ValidationError("'until' is before 'start'")
+        attrs['dates'] = dates
+        return attrs
+    
+    def to_items(self):
+        template = {
+            name: self.validated_data[name] for name in ('doctor', 'patient', 'reason', 'notes')
+            if name in self.validated_data
+        }
+        return [{**template, 'appointment_date': moment} for moment in self.validated_data['dates']]
+
+
 class MedicalRecordSerializer(serializers.ModelSerializer):
     """Medical record serializer"""
     patient_name = serializers.CharField(source='patient.user.get_full_name', read_only=True)
@@ -86,8 +186,8 @@ class SymptomCheckerSerializer(serializers.ModelSerializer):
     """Symptom checker serializer"""
     class Meta:
         model = SymptomChecker
-        fields = ['id', 'patient', 'symptoms', 'predicted_conditions', 'confidence_scores', 'recommendations', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'patient', 'symptoms', 'predicted_conditions', 'confidence_scores', 'recommendations', 'top_condition', 'created_at']
+        read_only_fields = ['id', 'top_condition', 'created_at']
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -0,0 +1,191 @@
+"""Incrementally maintained hospital statistics (the HospitalStats table).
+
+Signals on User, Doctor, Patient and Appointment adjust the counters on every
+save and delete, so the admin dashboard reads a dozen rows instead of counting
+whole tables. Changes made without signals (``QuerySet.update``,
+``bulk_create``, raw SQL) are not counted, unless the code making them counts
+them itself like ``count_new_appointments``; ``manage.py rebuild_stats``
+recomputes everything from scratch.
+"""
+from collections import Counter
+from functools import reduce
+from operator import or_
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Count, F, Q, Value, When
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import User, Patient, Doctor, Appointment, HospitalStats
+
+USERS_BY_ROLE = 'users_by_role'
+PROFILES = 'profiles'
+APPOINTMENTS_BY_STATUS = 'appointments_by_status'
+APPOINTMENTS_BY_DAY = 'appointments_by_day'
+
+PENDING_STATUSES = ('scheduled', 'confirmed')
+
+
+def increment(metric, key, delta=1):
+    """Atomically add ``delta`` to a counter, creating it if needed"""
+    if not delta or key is None:
+        return
+    counters = HospitalStats.objects.filter(metric=metric, key=key)
+    if not counters.update(count=F('count') + delta):
+        HospitalStats.objects.bulk_create([HospitalStats(metric=metric, key=key)], ignore_conflicts=True)
+        counters.update(count=F('count') + delta)
+
+
+def count_new_appointments(appointments):
+    """Count appointments created without signals (``bulk_create``), in two queries"""
+    deltas = Counter()
+    for appointment in appointments:
+        deltas[APPOINTMENTS_BY_STATUS, appointment.status] += 1
+        deltas[APPOINTMENTS_BY_DAY, appointment_day(appointment.appointment_date)] += 1
+    if not deltas:
+        return
+    HospitalStats.objects.bulk_create(
+        [HospitalStats(metric=metric, key=key) for metric, key in deltas], ignore_conflicts=True
+    )
+    HospitalStats.objects.filter(reduce(or_, (Q(metric=metric, key=key) for metric, key in deltas))).update(
+        count=F('count') + Case(
+            *(When(metric=metric, key=key, then=Value(delta)) for (metric, key), delta in deltas.items()),
+            output_field=BigIntegerField(),
+        )
+    )
+
+
+def appointment_day(value):
+    """ISO date of an appointment in the current time zone, as the dashboard counts days"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = Appointment._meta.get_field('appointment_date').to_python(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return timezone.localtime(value).date().isoformat()
+
+
+def _appointment_state(instance):
+    # From __dict__ so that deferred fields are not loaded
+    fields = instance.__dict__
+    if 'status' not in fields or 'appointment_date' not in fields:
+        return None
+    return fields['status'], appointment_day(fields['appointment_date'])
+
+
+@receiver(post_init, sender=Appointment)
+def remember_appointment_state(sender, instance, **kwargs):
+    instance._stats_state = _appointment_state(instance)
+
+
+@receiver(post_save, sender=Appointment)
+def count_saved_appointment(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'status', 'appointment_date'} & set(update_fields):
+        return
+    new_state = _appointment_state(instance)
+    old_state = None if created else getattr(instance, '_stats_state', None)
+    if old_state == new_state:
+        return
+    if not created and old_state is None:
+        # Loaded with deferred fields; the previous values are unknown
+        return
+    if old_state is not None:
+        increment(APPOINTMENTS_BY_STATUS, old_state[0], -1)
+        increment(APPOINTMENTS_BY_DAY, old_state[1], -1)
+    increment(APPOINTMENTS_BY_STATUS, new_state[0])
+    increment(APPOINTMENTS_BY_DAY, new_state[1])
+    instance._stats_state = new_state
+
+
+@receiver(post_delete, sender=Appointment)
+def count_deleted_appointment(sender, instance, **kwargs):
+    state = getattr(instance, '_stats_state', None) or _appointment_state(instance)
+    if state is not None:
+        increment(APPOINTMENTS_BY_STATUS, state[0], -1)
+        increment(APPOINTMENTS_BY_DAY, state[1], -1)
+
+
+@receiver(post_init, sender=User)
+def remember_user_role(sender, instance, **kwargs):
+    instance._stats_role = instance.__dict__.get('role')
+
+
+@receiver(post_save, sender=User)
+def count_saved_user(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'role' not in update_fields:
+        return
+    role = instance.__dict__.get('role')
+    old_role = getattr(instance, '_stats_role', None)
+    if created:
+        increment(USERS_BY_ROLE, role)
+    elif role != old_role and old_role is not None and role is not None:
+        increment(USERS_BY_ROLE, old_role, -1)
+        increment(USERS_BY_ROLE, role)
+    instance._stats_role = role
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_user(sender, instance, **kwargs):
+    increment(USERS_BY_ROLE, getattr(instance, '_stats_role', None) or instance.__dict__.get('role'), -1)
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_save, sender=Patient)
+def count_saved_profile(sender, instance, created, **kwargs):
+    if created:
+        increment(PROFILES, sender._meta.model_name)
+
+
+@receiver(post_delete, sender=Doctor)
+@receiver(post_delete, sender=Patient)
+def count_deleted_profile(sender, instance, **kwargs):
+    increment(PROFILES, sender._meta.model_name, -1)
+
+
+def rebuild_stats():
+    """Recompute every counter from the source tables; returns the number of counters"""
+    counters = [
+        HospitalStats(metric=USERS_BY_ROLE, key=row['role'], count=row['count'])
+        for row in User.objects.order_by().values('role').annotate(count=Count('id'))
+    ]
+    counters += [
+        HospitalStats(metric=PROFILES, key='doctor', count=Doctor.objects.count()),
+        HospitalStats(metric=PROFILES, key='patient', count=Patient.objects.count()),
+    ]
+    counters += [
+        HospitalStats(metric=APPOINTMENTS_BY_STATUS, key=row['status'], count=row['count'])
+        for row in Appointment.objects.order_by().values('status').annotate(count=Count('id'))
+    ]
+    counters += [
+        HospitalStats(metric=APPOINTMENTS_BY_DAY, key=row['day'].isoformat(), count=row['count'])
+        for row in Appointment.objects.order_by().annotate(
+            day=TruncDate('appointment_date')
+        ).values('day').annotate(count=Count('id'))
+    ]
+    with transaction.atomic():
+        HospitalStats.objects.all().delete()
+        HospitalStats.objects.bulk_create(counters)
+    return len(counters)
+
+
+def read_stats():
+    """Dashboard totals from the counters, in one query"""
+    today = timezone.localdate().isoformat()
+    rows = HospitalStats.objects.filter(
+        Q(metric__in=[USERS_BY_ROLE, PROFILES, APPOINTMENTS_BY_STATUS]) | Q(metric=APPOINTMENTS_BY_DAY, key=today)
+    ).values_list('metric', 'key', 'count')
+    counts = {}
+    for metric, key, count in rows:
+        counts.setdefault(metric, {})[key] = count
+    by_status = counts.get(APPOINTMENTS_BY_STATUS, {})
+    profiles = counts.get(PROFILES, {})
+    return {
+        'total_users': sum(counts.get(USERS_BY_ROLE, {}).values()),
+        'total_appointments': sum(by_status.values()),
+        'total_doctors': profiles.get('doctor', 0),
+        'total_patients': profiles.get('patient', 0),
+        'today_appointments': counts.get(APPOINTMENTS_BY_DAY, {}).get(today, 0),
+        'pending_appointments': sum(by_status.get(status, 0) for status in PENDING_STATUSES),
+        'completed_appointments': by_status.get('completed', 0),
+    }
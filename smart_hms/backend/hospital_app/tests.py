@@ -7,6 +7,7 @@ from rest_framework import status
 from unittest.mock import patch, MagicMock
 import json
 from .models import Patient, Doctor, Admin, Appointment, MedicalRecord, Prescription, SymptomChecker
+from .dashboard import admin_snapshot_cache
 
 User = get_user_model()
 
@@ -422,6 +423,7 @@ class DashboardAPITest(APITestCase):
     
     def setUp(self):
         self.client = APIClient()
+        admin_snapshot_cache().clear()
     
     def test_dashboard_patient(self):
         user = User.objects.create_user(
@@ -1137,15 +1139,15 @@ class SymptomCheckerViewSetTest(APITestCase):
         response = self.client.get('/api/symptom-checker/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
     
-    @patch('hospital_app.views.SymptomCheckerAI')
-    def test_analyze_symptoms(self, mock_ai_class):
+    @patch('hospital_app.views.get_symptom_checker')
+    def test_analyze_symptoms(self, mock_get_checker):
         mock_ai = MagicMock()
         mock_ai.predict.return_value = {
             'conditions': ['flu', 'cold'],
             'confidence': {'flu': 0.8, 'cold': 0.2},
             'recommendations': 'Rest and fluids'
         }
-        mock_ai_class.return_value = mock_ai
+        mock_get_checker.return_value = mock_ai
         
         data = {'symptoms': 'fever headache'}
         response = self.client.post('/api/symptom-checker/analyze/', data, format='json')
@@ -1157,18 +1159,18 @@ class SymptomCheckerViewSetTest(APITestCase):
         response = self.client.post('/api/symptom-checker/analyze/', data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
-    @patch('hospital_app.views.SymptomCheckerAI')
-    def test_analyze_symptoms_exception(self, mock_ai_class):
+    @patch('hospital_app.views.get_symptom_checker')
+    def test_analyze_symptoms_exception(self, mock_get_checker):
         mock_ai = MagicMock()
         mock_ai.predict.side_effect = Exception('AI Error')
-        mock_ai_class.return_value = mock_ai
+        mock_get_checker.return_value = mock_ai
         
         data = {'symptoms': 'fever'}
         response = self.client.post('/api/symptom-checker/analyze/', data, format='json')
         self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
     
-    @patch('hospital_app.views.SymptomCheckerAI')
-    def test_analyze_symptoms_no_patient_profile(self, mock_ai_class):
+    @patch('hospital_app.views.get_symptom_checker')
+    def test_analyze_symptoms_no_patient_profile(self, mock_get_checker):
         user_no_profile = User.objects.create_user(
             username='noprofile',
             role='patient'
@@ -1181,7 +1183,7 @@ class SymptomCheckerViewSetTest(APITestCase):
             'confidence': {'flu': 0.8},
             'recommendations': 'Rest'
         }
-        mock_ai_class.return_value = mock_ai
+        mock_get_checker.return_value = mock_ai
         
         data = {'symptoms': 'fever'}
         response = self.client.post('/api/symptom-checker/analyze/', data, format='json')
@@ -1200,15 +1202,15 @@ class AISymptomCheckerViewTest(APITestCase):
         self.patient = Patient.objects.create(user=self.patient_user)
         self.client.force_authenticate(user=self.patient_user)
     
-    @patch('hospital_app.views.SymptomCheckerAI')
-    def test_ai_symptom_checker_success(self, mock_ai_class):
+    @patch('hospital_app.views.get_symptom_checker')
+    def test_ai_symptom_checker_success(self, mock_get_checker):
         mock_ai = MagicMock()
         mock_ai.predict.return_value = {
             'conditions': ['flu', 'cold'],
             'confidence': {'flu': 0.8, 'cold': 0.2},
             'recommendations': 'Rest. Drink fluids. See doctor if worse.'
         }
-        mock_ai_class.return_value = mock_ai
+        mock_get_checker.return_value = mock_ai
         
         data = {'symptoms': 'fever headache fatigue'}
         response = self.client.post('/api/ai/symptom-checker/', data, format='json')
@@ -1218,23 +1220,23 @@ class AISymptomCheckerViewTest(APITestCase):
         self.assertIn('recommendations', response.data)
         self.assertIn('all_conditions', response.data)
     
-    @patch('hospital_app.views.SymptomCheckerAI')
-    def test_ai_symptom_checker_no_conditions(self, mock_ai_class):
+    @patch('hospital_app.views.get_symptom_checker')
+    def test_ai_symptom_checker_no_conditions(self, mock_get_checker):
         mock_ai = MagicMock()
         mock_ai.predict.return_value = {
             'conditions': [],
             'confidence': {},
             'recommendations': ''
         }
-        mock_ai_class.return_value = mock_ai
+        mock_get_checker.return_value = mock_ai
         
         data = {'symptoms': 'unknown symptoms'}
         response = self.client.post('/api/ai/symptom-checker/', data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['predicted_disease'], 'General Consultation')
     
-    @patch('hospital_app.views.SymptomCheckerAI')
-    def test_ai_symptom_checker_no_patient_profile(self, mock_ai_class):
+    @patch('hospital_app.views.get_symptom_checker')
+    def test_ai_symptom_checker_no_patient_profile(self, mock_get_checker):
         user_no_profile = User.objects.create_user(
             username='noprofile',
             role='patient'
@@ -1247,7 +1249,7 @@ class AISymptomCheckerViewTest(APITestCase):
             'confidence': {'flu': 0.8},
             'recommendations': 'Rest'
         }
-        mock_ai_class.return_value = mock_ai
+        mock_get_checker.return_value = mock_ai
         
         data = {'symptoms': 'fever'}
         response = self.client.post('/api/ai/symptom-checker/', data, format='json')
@@ -1258,17 +1260,114 @@ class AISymptomCheckerViewTest(APITestCase):
         response = self.client.post('/api/ai/symptom-checker/', data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
-    @patch('hospital_app.views.SymptomCheckerAI')
-    def test_ai_symptom_checker_exception(self, mock_ai_class):
+    @patch('hospital_app.views.get_symptom_checker')
+    def test_ai_symptom_checker_exception(self, mock_get_checker):
         mock_ai = MagicMock()
         mock_ai.predict.side_effect = Exception('AI Error')
-        mock_ai_class.return_value = mock_ai
+        mock_get_checker.return_value = mock_ai
         
         data = {'symptoms': 'fever'}
         response = self.client.post('/api/ai/symptom-checker/', data, format='json')
         self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class AISymptomCheckerBatchViewTest(APITestCase):
+    """Test AISymptomCheckerBatchView"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.patient_user = User.objects.create_user(
+            username='patient1',
+            role='patient'
+        )
+        self.patient = Patient.objects.create(user=self.patient_user)
+        self.client.force_authenticate(user=self.patient_user)
+    
+    @patch('hospital_app.views.get_symptom_checker')
+    def test_batch_success(self, mock_get_checker):
+        mock_ai = MagicMock()
+        mock_ai.predict_batch.return_value = [
+            {'conditions': ['flu'], 'confidence': {'flu': 0.8}, 'recommendations': 'Rest'},
+            {'conditions': ['migraine'], 'confidence': {'migraine': 0.6}, 'recommendations': 'Dark room'},
+        ]
+        mock_get_checker.return_value = mock_ai
+        
+        data = {'symptoms': ['fever headache', 'throbbing headache']}
+        # One INSERT for the checks and one for their prediction rows
+        with self.assertNumQueries(2):
+            response = self.client.post('/api/ai/symptom-checker/batch/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['results'][0]['predicted_disease'], 'Flu')
+        self.assertEqual(response.data['results'][1]['predicted_disease'], 'Migraine')
+        mock_ai.predict_batch.assert_called_once_with(['fever headache', 'throbbing headache'])
+        self.assertEqual(SymptomChecker.objects.filter(patient=self.patient).count(), 2)
+    
+    def test_batch_requires_list(self):
+        response = self.client.post('/api/ai/symptom-checker/batch/', {'symptoms': 'fever'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/ai/symptom-checker/batch/', {'symptoms': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_batch_rejects_blank_items(self):
+        data = {'symptoms': ['fever', '  ']}
+        response = self.client.post('/api/ai/symptom-checker/batch/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_batch_too_large(self):
+        data = {'symptoms': ['fever'] * 501}
+        response = self.client.post('/api/ai/symptom-checker/batch/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    @patch('hospital_app.views.get_symptom_checker')
+    def test_batch_exception(self, mock_get_checker):
+        mock_ai = MagicMock()
+        mock_ai.predict_batch.side_effect = Exception('AI Error')
+        mock_get_checker.return_value = mock_ai
+        
+        response = self.client.post('/api/ai/symptom-checker/batch/', {'symptoms': ['fever']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @patch('hospital_app.views.get_symptom_checker')
+    def test_batch_not_saved_for_non_patients(self, mock_get_checker):
+        mock_ai = MagicMock()
+        mock_ai.predict_batch.return_value = [{'conditions': ['flu'], 'confidence': {'flu': 0.8}, 'recommendations': 'Rest'}]
+        mock_get_checker.return_value = mock_ai
+        self.client.force_authenticate(user=User.objects.create_user(username='doctor1', role='doctor'))
+        
+        # The patient profile lookup only
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/ai/symptom-checker/batch/', {'symptoms': ['fever']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['predicted_disease'], 'Flu')
+        self.assertFalse(SymptomChecker.objects.exists())
+
+
+class AISymptomCheckerCacheStatsViewTest(APITestCase):
+    """Test AISymptomCheckerCacheStatsView"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(username='admin1', role='admin')
+        self.patient_user = User.objects.create_user(username='patient1', role='patient')
+    
+    @patch('hospital_app.views.get_symptom_checker')
+    def test_admin_gets_stats(self, mock_get_checker):
+        mock_ai = MagicMock()
+        mock_ai.cache_stats.return_value = {'local_hits': 3, 'shared_hits': 1, 'misses': 2}
+        mock_get_checker.return_value = mock_ai
+        
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get('/api/ai/symptom-checker/cache-stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['local_hits'], 3)
+    
+    def test_non_admin_forbidden(self):
+        self.client.force_authenticate(user=self.patient_user)
+        response = self.client.get('/api/ai/symptom-checker/cache-stats/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
 class SerializerTest(TestCase):
     """Test serializers - 100% coverage"""
     
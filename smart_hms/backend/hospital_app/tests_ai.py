@@ -47,11 +47,13 @@ class SymptomCheckerAITest(TestCase):
         mock_train.assert_called_once()
     
     @patch('hospital_app.ai_model.symptom_checker.os.path.exists')
+    @patch('hospital_app.ai_model.symptom_checker.load_artifact')
     @patch('hospital_app.ai_model.symptom_checker.pickle.load')
     @patch.object(SymptomCheckerAI, '_train_model')
-    def test_init_with_load_error(self, mock_train, mock_pickle_load, mock_exists):
+    def test_init_with_load_error(self, mock_train, mock_pickle_load, mock_load_artifact, mock_exists):
         """Test initialization when model loading fails"""
         mock_exists.return_value = True
+        mock_load_artifact.side_effect = Exception('Load error')
         mock_pickle_load.side_effect = Exception('Load error')
         ai = SymptomCheckerAI()
         mock_train.assert_called_once()
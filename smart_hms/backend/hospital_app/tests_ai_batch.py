@@ -0,0 +1,58 @@
+"""Tests for SymptomCheckerAI.predict_batch"""
+import copy
+from unittest.mock import MagicMock
+import numpy as np
+from django.test import SimpleTestCase
+from .ai_model.inference import NaiveBayesInference
+from .ai_model.symptom_checker import SymptomCheckerAI
+
+
+class PredictBatchTest(SimpleTestCase):
+    """Test batch prediction against single predictions"""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ai = SymptomCheckerAI()
+    
+    def test_matches_single_predictions(self):
+        symptoms_list = [
+            'fever headache fatigue',
+            'cough chest pain shortness of breath',
+            'Nausea Vomiting Diarrhea',
+            'completely unknown symptoms xyz',
+            'runny nose sneezing sore throat',
+        ]
+        batch = self.ai.predict_batch(symptoms_list)
+        self.assertEqual(batch, [self.ai.predict(symptoms) for symptoms in symptoms_list])
+    
+    def test_empty_items_and_empty_batch(self):
+        self.assertEqual(self.ai.predict_batch([]), [])
+        batch = self.ai.predict_batch(['', 'fever headache'])
+        self.assertEqual(batch[0]['conditions'], ['general_consultation'])
+        self.assertEqual(batch[1], self.ai.predict('fever headache'))
+    
+    def test_single_vectorizer_and_model_call(self):
+        self.assertIsNotNone(self.ai._get_inference_engine())
+        texts = ['fever headache fatigue', 'itchy red rash', 'wheezing at night', 'unknown words xyz']
+        expected = self.ai.model.predict_proba(self.ai.vectorizer.transform(texts))
+        
+        vectorizer = copy.copy(self.ai.vectorizer)
+        vectorizer.transform = MagicMock(wraps=self.ai.vectorizer.transform)
+        engine = NaiveBayesInference(vectorizer, self.ai.model)
+        engine.predict_proba = MagicMock(side_effect=AssertionError('scored one text at a time'))
+        probabilities = engine.predict_proba_batch(texts)
+        
+        engine.vectorizer.transform.assert_called_once_with(texts)
+        np.testing.assert_allclose(probabilities, expected, rtol=1e-12)
+        self.assertEqual(probabilities.shape, (len(texts), len(engine.classes)))
+    
+    def test_model_error_falls_back_to_keywords(self):
+        ai = SymptomCheckerAI.__new__(SymptomCheckerAI)
+        ai._create_fallback_model()
+        ai.vectorizer = MagicMock()
+        ai.model = MagicMock()
+        ai.model.predict_proba.side_effect = Exception('Prediction error')
+        
+        batch = ai.predict_batch(['fever headache fatigue'])
+        self.assertEqual(batch[0], ai._predict_keyword_matching('fever headache fatigue'))
@@ -43,10 +43,12 @@ class SymptomCheckerAITest(TestCase):
         self.assertEqual(ai.conditions, ['flu', 'cold'])
     
     @patch('hospital_app.ai_model.symptom_checker.os.path.exists')
+    @patch('hospital_app.ai_model.symptom_checker.load_artifact')
     @patch('hospital_app.ai_model.symptom_checker.pickle.load')
-    def test_init_load_model_exception(self, mock_pickle_load, mock_exists):
+    def test_init_load_model_exception(self, mock_pickle_load, mock_load_artifact, mock_exists):
         """Test initialization when model loading fails"""
         mock_exists.return_value = True
+        mock_load_artifact.side_effect = Exception('Load error')
         mock_pickle_load.side_effect = Exception('Load error')
         
         with patch.object(SymptomCheckerAI, '_train_model') as mock_train:
@@ -92,6 +94,7 @@ class SymptomCheckerAITest(TestCase):
         with patch('hospital_app.ai_model.symptom_checker.pickle.dump'), \
              patch('hospital_app.ai_model.symptom_checker.open', mock_open()), \
              patch('hospital_app.ai_model.symptom_checker.os.path.join', return_value='test.pkl'), \
+             patch.object(SymptomCheckerAI, '_save_artifact'), \
              patch.object(SymptomCheckerAI, '_initialize_model'): # Prevent init from running
             
             ai = SymptomCheckerAI()
@@ -112,6 +115,7 @@ class SymptomCheckerAITest(TestCase):
              patch('hospital_app.ai_model.symptom_checker.pickle.dump'), \
              patch('builtins.open', mock_open()), \
              patch('hospital_app.ai_model.symptom_checker.os.path.join', return_value='test.pkl'), \
+             patch.object(SymptomCheckerAI, '_save_artifact'), \
              patch.object(SymptomCheckerAI, '_initialize_model'): # Prevent init from running
             
             mock_df = pd.DataFrame({
@@ -0,0 +1,99 @@
+"""Tests for the shared symptom checker registry"""
+import threading
+import time
+from unittest.mock import patch, MagicMock
+from django.apps import apps
+from django.test import SimpleTestCase, override_settings
+from .ai_model import registry
+from .ai_model.symptom_checker import SymptomCheckerAI, KEYWORD_CONDITIONS
+
+
+class SymptomCheckerRegistryTest(SimpleTestCase):
+    """Test get_symptom_checker / reset_symptom_checker"""
+    
+    def setUp(self):
+        registry.reset_symptom_checker()
+    
+    def tearDown(self):
+        registry.reset_symptom_checker()
+    
+    @patch('hospital_app.ai_model.registry.SymptomCheckerAI')
+    def test_returns_same_instance(self, mock_ai_class):
+        first = registry.get_symptom_checker()
+        second = registry.get_symptom_checker()
+        self.assertIs(first, second)
+        mock_ai_class.assert_called_once()
+    
+    @patch('hospital_app.ai_model.registry.SymptomCheckerAI')
+    def test_concurrent_access_loads_once(self, mock_ai_class):
+        def slow_load():
+            time.sleep(0.05)
+            return MagicMock()
+        mock_ai_class.side_effect = slow_load
+        
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.get_symptom_checker()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(mock_ai_class.call_count, 1)
+        self.assertEqual(len({id(result) for result in results}), 1)
+    
+    @patch('hospital_app.ai_model.registry.SymptomCheckerAI')
+    def test_reset_forces_reload(self, mock_ai_class):
+        mock_ai_class.side_effect = lambda: MagicMock()
+        first = registry.get_symptom_checker()
+        registry.reset_symptom_checker()
+        second = registry.get_symptom_checker()
+        self.assertIsNot(first, second)
+        self.assertEqual(mock_ai_class.call_count, 2)
+    
+    def test_keyword_catalog_is_shared_and_read_only(self):
+        with patch.object(SymptomCheckerAI, '_initialize_model'):
+            first = SymptomCheckerAI()
+            second = SymptomCheckerAI()
+        self.assertIs(first.keyword_conditions, second.keyword_conditions)
+        self.assertIs(first.keyword_conditions, KEYWORD_CONDITIONS)
+        with self.assertRaises(TypeError):
+            KEYWORD_CONDITIONS['flu'] = {}
+        with self.assertRaises(TypeError):
+            KEYWORD_CONDITIONS['flu']['weight'] = 2.0
+
+
+class SymptomCheckerWarmupTest(SimpleTestCase):
+    """Test pre-fork warmup of the shared symptom checker"""
+    
+    def setUp(self):
+        registry.reset_symptom_checker()
+    
+    def tearDown(self):
+        registry.reset_symptom_checker()
+    
+    @patch('hospital_app.ai_model.registry.SymptomCheckerAI')
+    def test_warmup_loads_predicts_and_clears_cache(self, mock_ai_class):
+        checker = registry.warm_up_symptom_checker()
+        self.assertIs(checker, registry.get_symptom_checker())
+        checker.predict_batch.assert_called_once_with(list(registry.WARMUP_SYMPTOMS))
+        self.assertEqual(checker.predict.call_count, len(registry.WARMUP_SYMPTOMS))
+        checker._get_prediction_cache.return_value.clear.assert_called_once()
+    
+    @patch('hospital_app.ai_model.registry.warm_up_symptom_checker')
+    def test_ready_warms_up_only_when_preloading(self, mock_warm_up):
+        app_config = apps.get_app_config('hospital_app')
+        with override_settings(SYMPTOM_CHECKER_PRELOAD=False):
+            app_config.ready()
+        mock_warm_up.assert_not_called()
+        with override_settings(SYMPTOM_CHECKER_PRELOAD=True):
+            app_config.ready()
+        mock_warm_up.assert_called_once()
+    
+    @patch('hospital_app.ai_model.registry.warm_up_symptom_checker', side_effect=Exception('Load error'))
+    def test_ready_survives_warmup_error(self, mock_warm_up):
+        with override_settings(SYMPTOM_CHECKER_PRELOAD=True):
+            apps.get_app_config('hospital_app').ready()
+        mock_warm_up.assert_called_once()
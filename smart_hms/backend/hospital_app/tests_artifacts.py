@@ -0,0 +1,82 @@
+"""Tests for the memory-mappable model artifact format"""
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from .ai_model.artifacts import MANIFEST_NAME, load_artifact, save_artifact
+from .ai_model.model_store import current_artifact_path
+from .ai_model.symptom_checker import SymptomCheckerAI
+
+
+class ModelArtifactTest(SimpleTestCase):
+    """Test saving, memory-mapped loading and pickle migration"""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ai = SymptomCheckerAI()
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.artifact_dir = os.path.join(self.test_dir, 'artifact')
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_round_trip_is_memory_mapped(self):
+        save_artifact(self.artifact_dir, self.ai.vectorizer, self.ai.model, self.ai.conditions, accuracy=0.9)
+        artifact = load_artifact(self.artifact_dir)
+        
+        self.assertIsInstance(artifact.feature_log_prob, np.memmap)
+        self.assertIsInstance(artifact.vocabulary, np.memmap)
+        self.assertEqual(artifact.conditions, self.ai.conditions)
+        self.assertEqual(artifact.manifest['metadata'], {'accuracy': 0.9})
+        
+        vectorizer = artifact.build_vectorizer()
+        model = artifact.build_model()
+        self.assertTrue(np.shares_memory(model.feature_log_prob_, artifact.feature_log_prob))
+        for text in ['fever headache fatigue', 'rash itching', 'xyz']:
+            np.testing.assert_array_equal(
+                model.predict_proba(vectorizer.transform([text])),
+                self.ai.model.predict_proba(self.ai.vectorizer.transform([text])),
+            )
+    
+    def test_model_version_is_content_digest(self):
+        first = save_artifact(self.artifact_dir, self.ai.vectorizer, self.ai.model, self.ai.conditions)
+        second = save_artifact(os.path.join(self.test_dir, 'copy'), self.ai.vectorizer, self.ai.model, self.ai.conditions)
+        self.assertEqual(first['model_version'], second['model_version'])
+        self.assertEqual(load_artifact(self.artifact_dir).model_version, first['model_version'])
+    
+    def test_unsupported_format_version(self):
+        save_artifact(self.artifact_dir, self.ai.vectorizer, self.ai.model, self.ai.conditions)
+        manifest_path = os.path.join(self.artifact_dir, MANIFEST_NAME)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        manifest['format_version'] = 999
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        with self.assertRaises(ValueError):
+            load_artifact(self.artifact_dir)
+    
+    def test_legacy_pickle_is_migrated(self):
+        model_dir = os.path.join(self.test_dir, 'hospital_app', 'ai_model')
+        os.makedirs(model_dir)
+        with open(os.path.join(model_dir, 'symptom_model.pkl'), 'wb') as f:
+            pickle.dump({
+                'model': self.ai.model,
+                'vectorizer': self.ai.vectorizer,
+                'conditions': self.ai.conditions,
+            }, f)
+        
+        with override_settings(BASE_DIR=self.test_dir):
+            migrated = SymptomCheckerAI()
+            artifact_dir = current_artifact_path(os.path.join(model_dir, 'symptom_model'))
+            self.assertTrue(os.path.exists(os.path.join(artifact_dir, MANIFEST_NAME)))
+            reloaded = SymptomCheckerAI()
+        
+        self.assertIsInstance(reloaded.model.feature_log_prob_.base, np.memmap)
+        self.assertEqual(reloaded.conditions, migrated.conditions)
+        self.assertEqual(reloaded.predict('fever headache fatigue'), migrated.predict('fever headache fatigue'))
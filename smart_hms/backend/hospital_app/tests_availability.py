@@ -0,0 +1,186 @@
+"""Tests for doctor schedules and the free-slot search"""
+from datetime import datetime, time, timedelta
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from .models import Patient, Doctor, Appointment, DoctorSchedule, DoctorTimeOff
+
+User = get_user_model()
+
+
+class FreeSlotTest(APITestCase):
+    """Test free slots swept from schedules, time off and bookings"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.patient_user = User.objects.create_user(username='patient1', role='patient')
+        self.patient = Patient.objects.create(user=self.patient_user)
+        self.client.force_authenticate(user=self.patient_user)
+        self.doctor = self.create_doctor('doctor1', 'cardiology')
+        # Next Monday, 9:00 to 12:00 in half hours
+        today = timezone.localdate()
+        self.monday = today + timedelta(days=7 - today.weekday())
+        DoctorSchedule.objects.create(doctor=self.doctor, weekday=0, start_time=time(9), end_time=time(12))
+
+    def create_doctor(self, username, specialization, is_available=True):
+        return Doctor.objects.create(
+            user=User.objects.create_user(username=username, role='doctor', first_name=username.title()),
+            license_number=username.upper(), specialization=specialization, is_available=is_available
+        )
+
+    def at(self, hour, minute=0, days=0):
+        return timezone.make_aware(datetime.combine(self.monday + timedelta(days=days), time(hour, minute)))
+
+    def book(self, doctor, moment, appointment_status='scheduled'):
+        return Appointment.objects.create(
+            patient=self.patient, doctor=doctor, appointment_date=moment, reason='Checkup', status=appointment_status
+        )
+
+    def slot_starts(self, doctor, days=1):
+        response = self.client.get(
+            f'/api/doctors/{doctor.id}/slots/', {'from': self.monday.isoformat(), 'to': (self.monday + timedelta(days=days)).isoformat()}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [timezone.localtime(datetime.fromisoformat(slot['start'].replace('Z', '+00:00'))).strftime('%H:%M')
+                for slot in response.data['slots']]
+
+    def test_bookings_and_time_off_take_slots(self):
+        self.assertEqual(self.slot_starts(self.doctor), ['09:00', '09:30', '10:00', '10:30', '11:00', '11:30'])
+        self.book(self.doctor, self.at(10))
+        self.book(self.doctor, self.at(11), appointment_status='cancelled')
+        DoctorTimeOff.objects.create(doctor=self.doctor, start=self.at(11, 30), end=self.at(13))
+        self.assertEqual(self.slot_starts(self.doctor), ['09:00', '09:30', '10:30', '11:00'])
+
+    def test_off_grid_booking_takes_both_slots_it_overlaps(self):
+        self.book(self.doctor, self.at(9, 10))
+        self.assertEqual(self.slot_starts(self.doctor)[:2], ['10:00', '10:30'])
+
+    def test_week_of_slots(self):
+        DoctorSchedule.objects.create(doctor=self.doctor, weekday=2, start_time=time(14), end_time=time(15), slot_minutes=20)
+        starts = self.slot_starts(self.doctor, days=7)
+        self.assertEqual(starts, ['09:00', '09:30', '10:00', '10:30', '11:00', '11:30', '14:00', '14:20', '14:40'])
+
+    def test_slots_in_constant_queries(self):
+        url = f'/api/doctors/{self.doctor.id}/slots/?from={self.monday.isoformat()}'
+        for hour in (9, 10, 11):
+            self.book(self.doctor, self.at(hour))
+        # The doctor, their schedule, bookings in range and time off
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+    def test_unavailable_doctor(self):
+        self.doctor.is_available = False
+        self.doctor.save()
+        self.assertEqual(self.client.get(f'/api/doctors/{self.doctor.id}/slots/').status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(user=self.doctor.user)
+        self.assertEqual(self.slot_starts(self.doctor), [])
+
+    def test_invalid_windows(self):
+        url = f'/api/doctors/{self.doctor.id}/slots/'
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        for params in (
+            {'from': 'soon'},
+            {'from': tomorrow.isoformat(), 'to': tomorrow.isoformat()},
+            {'to': (tomorrow - timedelta(days=2)).isoformat()},
+            {'to': (tomorrow + timedelta(days=90)).isoformat()},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('error', response.data)
+
+    def test_earliest_slot_per_specialization(self):
+        second = self.create_doctor('doctor2', 'cardiology')
+        DoctorSchedule.objects.create(doctor=second, weekday=0, start_time=time(9, 15), end_time=time(10))
+        # Only free on Thursday, past the first search windows
+        neurologist = self.create_doctor('doctor3', 'neurology')
+        DoctorSchedule.objects.create(doctor=neurologist, weekday=3, start_time=time(16), end_time=time(17), slot_minutes=15)
+        unavailable = self.create_doctor('doctor4', 'dermatology', is_available=False)
+        DoctorSchedule.objects.create(doctor=unavailable, weekday=0, start_time=time(8), end_time=time(9))
+        self.book(self.doctor, self.at(9))
+        self.book(neurologist, self.at(16, days=3))
+
+        response = self.client.get('/api/doctors/earliest-slots/', {'from': self.monday.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        found = {row['specialization']: (row['doctor'], row['start']) for row in response.data['results']}
+        self.assertEqual(found, {
+            'cardiology': (second.id, self.at(9, 15).isoformat().replace('+00:00', 'Z')),
+            'neurology': (neurologist.id, self.at(16, 15, days=3).isoformat().replace('+00:00', 'Z')),
+        })
+
+        response = self.client.get('/api/doctors/earliest-slots/', {'from': self.monday.isoformat(), 'specialization': 'neurology'})
+        self.assertEqual([row['doctor'] for row in response.data['results']], [neurologist.id])
+        response = self.client.get('/api/doctors/earliest-slots/', {'specialization': 'astrology'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DoctorScheduleAPITest(APITestCase):
+    """Test that doctors manage their own working hours and time off"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.doctor_user = User.objects.create_user(username='doctor1', role='doctor')
+        self.doctor = Doctor.objects.create(user=self.doctor_user, license_number='DOC001')
+        self.other_doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor2', role='doctor'), license_number='DOC002'
+        )
+        self.admin_user = User.objects.create_user(username='admin1', role='admin')
+
+    def test_doctor_adds_own_hours(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        response = self.client.post('/api/doctor-schedules/', {
+            'doctor': self.other_doctor.id, 'weekday': 1, 'start_time': '08:00', 'end_time': '12:00', 'slot_minutes': 20,
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['doctor'], self.doctor.id)
+
+        DoctorSchedule.objects.create(doctor=self.other_doctor, weekday=1, start_time=time(8), end_time=time(9))
+        self.assertEqual(len(self.client.get('/api/doctor-schedules/').data['results']), 1)
+
+    def test_validation(self):
+        self.client.force_authenticate(user=self.doctor_user)
+        for data in (
+            {'weekday': 1, 'start_time': '12:00', 'end_time': '08:00'},
+            {'weekday': 7, 'start_time': '08:00', 'end_time': '12:00'},
+            {'weekday': 1, 'start_time': '08:00', 'end_time': '12:00', 'slot_minutes': 0},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.client.post('/api/doctor-schedules/', data).status_code, status.HTTP_400_BAD_REQUEST)
+        now = timezone.now()
+        response = self.client.post('/api/doctor-time-off/', {'start': now.isoformat(), 'end': (now - timedelta(hours=1)).isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_admin_names_the_doctor(self):
+        self.client.force_authenticate(user=self.admin_user)
+        now = timezone.now()
+        data = {'start': now.isoformat(), 'end': (now + timedelta(days=2)).isoformat(), 'reason': 'Conference'}
+        self.assertEqual(self.client.post('/api/doctor-time-off/', data).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/doctor-time-off/', {**data, 'doctor': self.other_doctor.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(DoctorTimeOff.objects.get().doctor, self.other_doctor)
+
+    def test_patients_cannot_change_schedules(self):
+        schedule = DoctorSchedule.objects.create(doctor=self.doctor, weekday=1, start_time=time(8), end_time=time(9))
+        time_off = DoctorTimeOff.objects.create(
+            doctor=self.doctor, start=timezone.now(), end=timezone.now() + timedelta(days=1)
+        )
+        self.client.force_authenticate(user=User.objects.create_user(username='patient1', role='patient'))
+        now = timezone.now()
+        for url, data in (
+            ('/api/doctor-schedules/', {'doctor': self.doctor.id, 'weekday': 2, 'start_time': '08:00', 'end_time': '12:00'}),
+            ('/api/doctor-time-off/', {'doctor': self.doctor.id, 'start': now.isoformat(),
+                                       'end': (now + timedelta(days=2)).isoformat()}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.post(url, data).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.patch(f'/api/doctor-schedules/{schedule.id}/', {'weekday': 3}).status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.patch(f'/api/doctor-time-off/{time_off.id}/', {'reason': 'Fake'}).status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.assertEqual((DoctorSchedule.objects.count(), DoctorTimeOff.objects.count()), (1, 1))
+
+    def test_patients_see_no_schedules(self):
+        DoctorSchedule.objects.create(doctor=self.doctor, weekday=1, start_time=time(8), end_time=time(9))
+        self.client.force_authenticate(user=User.objects.create_user(username='patient1', role='patient'))
+        self.assertEqual(self.client.get('/api/doctor-schedules/').data['results'], [])
@@ -0,0 +1,236 @@
+"""Tests for conflict-free appointment booking"""
+import threading
+from datetime import datetime, time, timedelta
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from .availability import conflicting_appointment
+from .models import Patient, Doctor, Appointment, DoctorSchedule
+from .stats import rebuild_stats, read_stats
+
+User = get_user_model()
+
+
+def create_patient(username):
+    return Patient.objects.create(user=User.objects.create_user(username=username, role='patient'))
+
+
+class BookingConflictTest(APITestCase):
+    """Test that booking an occupied time is refused with 409"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.patient = create_patient('patient1')
+        self.other_patient = create_patient('patient2')
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor1', role='doctor'), license_number='DOC001'
+        )
+        self.moment = timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=1), time(10)))
+
+    def book(self, patient, moment):
+        self.client.force_authenticate(user=patient.user)
+        return self.client.post('/api/appointments/', {
+            'doctor': self.doctor.id, 'appointment_date': moment.isoformat(), 'reason': 'Checkup',
+        }, format='json')
+
+    def test_same_time_is_refused(self):
+        self.assertEqual(self.book(self.patient, self.moment).status_code, status.HTTP_201_CREATED)
+        response = self.book(self.other_patient, self.moment)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn('error', response.data)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_overlap_follows_slot_length(self):
+        DoctorSchedule.objects.create(doctor=self.doctor, weekday=self.moment.weekday(), start_time=time(9),
+                                      end_time=time(12), slot_minutes=20)
+        self.book(self.patient, self.moment)
+        self.assertEqual(self.book(self.other_patient, self.moment + timedelta(minutes=10)).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.book(self.other_patient, self.moment - timedelta(minutes=10)).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.book(self.other_patient, self.moment + timedelta(minutes=20)).status_code, status.HTTP_201_CREATED)
+
+    def test_cancelled_time_can_be_booked_again(self):
+        appointment_id = self.book(self.patient, self.moment).data['id']
+        self.client.post(f'/api/appointments/{appointment_id}/cancel/')
+        self.assertEqual(self.book(self.other_patient, self.moment).status_code, status.HTTP_201_CREATED)
+
+        self.client.force_authenticate(user=self.patient.user)
+        response = self.client.post(f'/api/appointments/{appointment_id}/confirm/')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_confirming_a_cancelled_appointment_loses_a_race_with_409(self):
+        appointment_id = self.book(self.patient, self.moment).data['id']
+        self.client.post(f'/api/appointments/{appointment_id}/cancel/')
+        self.book(self.other_patient, self.moment)
+        # The other booking lands between the checks and the save
+        early_checks = [None, None]
+
+        def check_too_early(*args, **kwargs):
+            return early_checks.pop() if early_checks else conflicting_appointment(*args, **kwargs)
+
+        self.client.force_authenticate(user=self.patient.user)
+        with patch('hospital_app.booking.conflicting_appointment', side_effect=check_too_early), \
+                patch('hospital_app.availability.conflicting_appointment', side_effect=check_too_early):
+            response = self.client.post(f'/api/appointments/{appointment_id}/confirm/')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Appointment.objects.get(pk=appointment_id).status, 'cancelled')
+
+    def test_moving_onto_a_booked_time_is_refused(self):
+        self.book(self.patient, self.moment)
+        appointment_id = self.book(self.other_patient, self.moment + timedelta(hours=1)).data['id']
+        response = self.client.patch(f'/api/appointments/{appointment_id}/', {'appointment_date': self.moment.isoformat()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.client.patch(f'/api/appointments/{appointment_id}/', {'notes': 'Bring test results'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_database_refuses_double_booking(self):
+        Appointment.objects.create(patient=self.patient, doctor=self.doctor, appointment_date=self.moment, reason='Checkup')
+        Appointment.objects.create(patient=self.patient, doctor=self.doctor, appointment_date=self.moment, reason='Checkup', status='cancelled')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Appointment.objects.create(patient=self.other_patient, doctor=self.doctor, appointment_date=self.moment, reason='Checkup')
+
+
+class ConcurrentBookingTest(TransactionTestCase):
+    """Test that of many simultaneous bookings of one slot exactly one wins"""
+    BOOKINGS = 8
+
+    def setUp(self):
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor1', role='doctor'), license_number='DOC001'
+        )
+        self.patients = [create_patient(f'patient{i}') for i in range(self.BOOKINGS)]
+        self.moment = timezone.now() + timedelta(days=1)
+
+    def test_one_booking_wins(self):
+        barrier = threading.Barrier(self.BOOKINGS)
+        statuses = []
+
+        def book(patient):
+            client = APIClient()
+            client.force_authenticate(user=patient.user)
+            try:
+                barrier.wait()
+                response = client.post('/api/appointments/', {
+                    'doctor': self.doctor.id, 'appointment_date': self.moment.isoformat(), 'reason': 'Checkup',
+                }, format='json')
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(patient,)) for patient in self.patients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [status.HTTP_201_CREATED] + [status.HTTP_409_CONFLICT] * (self.BOOKINGS - 1))
+        self.assertEqual(Appointment.objects.filter(doctor=self.doctor).count(), 1)
+
+
+class BulkBookingTest(APITestCase):
+    """Test booking lists and recurring series of appointments in one request"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.patient = create_patient('patient1')
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor1', role='doctor'), license_number='DOC001'
+        )
+        self.client.force_authenticate(user=self.patient.user)
+        self.moment = timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=1), time(10)))
+
+    def item(self, moment, **fields):
+        return {'doctor': self.doctor.id, 'appointment_date': moment.isoformat(), 'reason': 'Follow-up', **fields}
+
+    def test_valid_items_are_created_and_the_rest_reported(self):
+        Appointment.objects.create(patient=self.patient, doctor=self.doctor, appointment_date=self.moment, reason='Checkup')
+        response = self.client.post('/api/appointments/bulk/', [
+            self.item(self.moment + timedelta(hours=1)),
+            self.item(self.moment),
+            self.item(self.moment + timedelta(hours=1, minutes=10)),
+            self.item(self.moment, doctor=0),
+            {'doctor': self.doctor.id, 'appointment_date': 'soon'},
+            self.item(self.moment + timedelta(hours=2)),
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([row['appointment_date'] for row in response.data['created']], [
+            (self.moment + timedelta(hours=hours)).isoformat().replace('+00:00', 'Z') for hours in (1, 2)
+        ])
+        errors = {row['index']: row['errors'] for row in response.data['errors']}
+        self.assertEqual(sorted(errors), [1, 2, 3, 4])
+        self.assertIn('appointment_date', errors[1])
+        self.assertIn('appointment_date', errors[2])
+        self.assertEqual(errors[3], {'doctor': ['Doctor not found']})
+        self.assertEqual(set(errors[4]), {'appointment_date', 'reason'})
+        self.assertEqual(Appointment.objects.count(), 3)
+
+    def test_weekly_series(self):
+        response = self.client.post('/api/appointments/bulk/', {
+            'doctor': self.doctor.id, 'reason': 'Physiotherapy', 'start': self.moment.isoformat(), 'count': 6,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(Appointment.objects.order_by('appointment_date').values_list('appointment_date', flat=True)),
+            [self.moment + timedelta(weeks=week) for week in range(6)],
+        )
+
+        response = self.client.post('/api/appointments/bulk/', {
+            'doctor': self.doctor.id, 'reason': 'Physiotherapy', 'start': self.moment.isoformat(),
+            'frequency': 'daily', 'interval': 2, 'until': (self.moment + timedelta(days=14)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        # Days 0 and 14 fall on weekly appointments
+        self.assertEqual(len(response.data['created']), 6)
+        self.assertEqual([row['index'] for row in response.data['errors']], [0, 7])
+
+    def test_invalid_requests(self):
+        for data in (
+            {'doctor': self.doctor.id, 'reason': 'Checkup', 'start': self.moment.isoformat()},
+            {'doctor': self.doctor.id, 'reason': 'Checkup', 'start': self.moment.isoformat(), 'count': 2,
+             'until': self.moment.isoformat()},
+            {'doctor': self.doctor.id, 'reason': 'Checkup', 'start': self.moment.isoformat(), 'frequency': 'daily',
+             'until': (self.moment + timedelta(days=600)).isoformat()},
+            {'appointments': []},
+            [self.item(self.moment, doctor=0)],
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.client.post('/api/appointments/bulk/', data, format='json').status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_admin_names_the_patient(self):
+        self.client.force_authenticate(user=User.objects.create_user(username='admin1', role='admin'))
+        response = self.client.post('/api/appointments/bulk/', [
+            self.item(self.moment), self.item(self.moment + timedelta(hours=1), patient=self.patient.id),
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['errors'], [{'index': 0, 'errors': {'patient': ['This field is required.']}}])
+        self.assertEqual(response.data['created'][0]['patient'], self.patient.id)
+
+    def test_counters_and_links_are_kept(self):
+        self.client.post('/api/appointments/bulk/', {
+            'doctor': self.doctor.id, 'reason': 'Physiotherapy', 'start': self.moment.isoformat(),
+            'frequency': 'daily', 'count': 3,
+        }, format='json')
+        counted = read_stats()
+        self.assertEqual((counted['total_appointments'], counted['pending_appointments']), (3, 3))
+        rebuild_stats()
+        self.assertEqual(read_stats(), counted)
+        link = self.doctor.patient_links.get()
+        self.assertEqual((link.visit_count, link.first_visit, link.last_visit),
+                         (3, self.moment, self.moment + timedelta(days=2)))
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        def queries(count, offset):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post('/api/appointments/bulk/', [
+                    self.item(self.moment + timedelta(days=offset + day)) for day in range(count)
+                ], format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(context)
+
+        self.assertEqual(queries(2, 0), queries(20, 10))
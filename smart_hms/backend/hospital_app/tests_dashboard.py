@@ -0,0 +1,155 @@
+"""Tests for the admin dashboard statistics and their cached snapshot"""
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from .dashboard import SnapshotCache, admin_snapshot_cache, compute_admin_stats
+from .models import Patient, Doctor, Admin, Appointment, HospitalStats
+from .stats import APPOINTMENTS_BY_DAY, read_stats
+
+User = get_user_model()
+
+
+class AdminStatsTest(TestCase):
+    """Test the admin statistics"""
+
+    def setUp(self):
+        patient = Patient.objects.create(user=User.objects.create_user(username='patient1', role='patient'))
+        doctor = Doctor.objects.create(user=User.objects.create_user(username='doctor1', role='doctor'), license_number='DOC001')
+        User.objects.create_user(username='admin1', role='admin')
+        today_start = timezone.make_aware(datetime.combine(timezone.localdate(), datetime.min.time()))
+        today_end = today_start + timedelta(days=1)
+        for appointment_date, appointment_status in (
+            (today_start, 'scheduled'),
+            (today_end - timedelta(microseconds=1), 'completed'),
+            (today_end, 'confirmed'),
+            (today_start - timedelta(days=1), 'cancelled'),
+            (today_start - timedelta(days=2), 'completed'),
+        ):
+            Appointment.objects.create(
+                patient=patient, doctor=doctor, appointment_date=appointment_date,
+                reason='Checkup', status=appointment_status
+            )
+
+    def test_counts(self):
+        self.assertEqual(read_stats(), {
+            'total_users': 3, 'total_doctors': 1, 'total_patients': 1, 'total_appointments': 5,
+            'today_appointments': 2, 'pending_appointments': 2, 'completed_appointments': 2,
+        })
+        # The first and last moments of today count, midnight tomorrow does not
+        today = timezone.localdate()
+        self.assertEqual(
+            dict(HospitalStats.objects.filter(metric=APPOINTMENTS_BY_DAY).values_list('key', 'count')),
+            {(today + timedelta(days=day)).isoformat(): 1 for day in (-2, -1, 1)} | {today.isoformat(): 2},
+        )
+
+        stats = compute_admin_stats()
+        self.assertEqual({key: value for key, value in stats.items() if key != 'recent_appointments'}, read_stats())
+        self.assertEqual(len(stats['recent_appointments']), 5)
+        self.assertEqual(stats['recent_appointments'][0]['status'], 'confirmed')
+
+    def test_query_count(self):
+        # HospitalStats counters and recent appointments
+        with self.assertNumQueries(2):
+            compute_admin_stats()
+
+
+class SnapshotCacheTest(SimpleTestCase):
+    """Test TTL expiry, stale serving and single-flight refresh"""
+
+    def setUp(self):
+        self.now = 1000.0
+        self.values = iter(range(100))
+        self.compute = MagicMock(side_effect=lambda: next(self.values))
+        self.snapshot = SnapshotCache(
+            'test', self.compute, LocMemCache('dashboard-tests', {}),
+            ttl=10, stale_ttl=60, wait=0.2, timer=lambda: self.now
+        )
+        self.snapshot.cache.clear()
+
+    def test_cached_until_ttl(self):
+        self.assertEqual(self.snapshot.get(), 0)
+        self.now += 9
+        self.assertEqual(self.snapshot.get(), 0)
+        self.now += 2
+        self.assertEqual(self.snapshot.get(), 1)
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_stale_value_served_while_refreshing(self):
+        self.snapshot.get()
+        self.now += 11
+        self.snapshot.cache.add(self.snapshot.lock_key, True)  # another caller is refreshing
+        self.assertEqual(self.snapshot.get(), 0)
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_waits_for_refresh_when_nothing_cached(self):
+        self.snapshot.cache.add(self.snapshot.lock_key, True)
+        threading.Timer(0.05, self.snapshot.refresh).start()
+        self.assertEqual(self.snapshot.get(), 0)
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_computes_after_waiting_too_long(self):
+        self.snapshot.cache.add(self.snapshot.lock_key, True)
+        with self.assertLogs('hospital_app.dashboard', 'WARNING'):
+            self.assertEqual(self.snapshot.get(), 0)
+
+    def test_concurrent_callers_compute_once(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_compute():
+            started.set()
+            release.wait(5)
+            return 'snapshot'
+
+        self.snapshot.compute = slow_compute
+        self.snapshot.wait = 5
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.snapshot.get())) for _ in range(8)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(results, ['snapshot'] * 8)
+
+    def test_lock_released_when_compute_fails(self):
+        self.compute.side_effect = ValueError('Database unavailable')
+        with self.assertRaises(ValueError):
+            self.snapshot.get()
+        self.assertIsNone(self.snapshot.cache.get(self.snapshot.lock_key))
+
+
+class AdminDashboardViewTest(APITestCase):
+    """Test that the admin dashboard is served from the snapshot"""
+
+    def setUp(self):
+        self.client = APIClient()
+        admin_snapshot_cache().clear()
+        self.admin_user = User.objects.create_user(username='admin1', role='admin')
+        Admin.objects.create(user=self.admin_user, employee_id='ADM001')
+        self.client.force_authenticate(user=self.admin_user)
+
+    def tearDown(self):
+        admin_snapshot_cache().clear()
+
+    def test_polling_uses_snapshot(self):
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_users'], 1)
+
+        User.objects.create_user(username='patient1', role='patient')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.data['total_users'], 1)
+        self.assertEqual(response.data['user']['username'], 'admin1')
+
+        admin_snapshot_cache().clear()
+        self.assertEqual(self.client.get('/api/dashboard/').data['total_users'], 2)
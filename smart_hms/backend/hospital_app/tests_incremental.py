@@ -0,0 +1,90 @@
+"""Tests for incremental symptom model updates"""
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from .ai_model import incremental, model_store
+from .ai_model.artifacts import HASHING_FORMAT_VERSION, load_artifact
+from .ai_model.symptom_checker import SymptomCheckerAI
+from .ai_model.training_store import TrainingStore
+
+
+def load_checker(root):
+    checker = SymptomCheckerAI(load_model=False)
+    checker._load_artifact(model_store.current_artifact_path(root))
+    return checker
+
+
+class IncrementalUpdateTest(SimpleTestCase):
+    """Test folding new examples into the published model with partial_fit"""
+
+    def setUp(self):
+        self.model_root = tempfile.mkdtemp()
+        self.store_root = tempfile.mkdtemp()
+        self.store = TrainingStore(self.store_root)
+
+    def tearDown(self):
+        shutil.rmtree(self.model_root, ignore_errors=True)
+        shutil.rmtree(self.store_root, ignore_errors=True)
+
+    def update(self, **kwargs):
+        return incremental.update_model(self.store_root, self.model_root, **kwargs)
+
+    def class_counts(self):
+        artifact = load_artifact(model_store.current_artifact_path(self.model_root))
+        return dict(zip(artifact.classes, artifact.class_count.tolist()))
+
+    def test_first_update_starts_from_the_built_in_examples(self):
+        self.store.append([([('fever chills aching', 'flu')], 1)])
+        folded, version = self.update()
+        self.assertEqual(model_store.current_version(self.model_root), version)
+        artifact = load_artifact(model_store.current_artifact_path(self.model_root))
+        self.assertEqual(artifact.manifest['format_version'], HASHING_FORMAT_VERSION)
+        self.assertEqual(artifact.manifest['metadata']['training_store_position'], 1)
+        self.assertEqual(folded, artifact.class_count.sum())
+
+        checker = load_checker(self.model_root)
+        self.assertEqual(checker.predict('fever headache fatigue body aches')['conditions'][0], 'flu')
+        engine = checker._get_inference_engine()
+        self.assertIsNotNone(engine)
+        np.testing.assert_allclose(
+            engine.predict_proba('chest pain shortness of breath'),
+            checker.model.predict_proba(checker.vectorizer.transform(['chest pain shortness of breath']))[0],
+        )
+
+    def test_later_updates_fold_in_new_examples_only(self):
+        self.update()
+        before = self.class_counts()
+        self.assertEqual(self.update(), (0, None))
+
+        self.store.append([([('purple spots on tongue', 'dermatitis')] * 3 + [('wheezing at night', 'asthma')], 5)])
+        self.assertEqual(self.update(min_examples=5), (4, None))
+        folded, version = self.update(batch_size=2)
+        self.assertEqual(folded, 4)
+        after = self.class_counts()
+        self.assertEqual(after['dermatitis'] - before['dermatitis'], 3)
+        self.assertEqual(after['asthma'] - before['asthma'], 1)
+        checker = load_checker(self.model_root)
+        self.assertEqual(checker.model.predict(checker.vectorizer.transform(['purple spots on tongue']))[0], 'dermatitis')
+
+    def test_full_retrain_is_followed_by_a_new_incremental_model(self):
+        self.store.append([([('wheezing at night', 'asthma')], 1)])
+        self.update()
+        checker = SymptomCheckerAI()
+        model_store.publish_artifact(self.model_root, checker.vectorizer, checker.model, checker.conditions)
+        folded, version = self.update()
+        # The built-in examples and the whole store again
+        self.assertEqual(folded, len(SymptomCheckerAI(load_model=False)._built_in_examples()) + 1)
+        self.assertTrue(load_artifact(model_store.current_artifact_path(self.model_root)).hashing)
+
+    def test_command(self):
+        out = StringIO()
+        with override_settings(SYMPTOM_TRAINING_STORE=self.store_root), \
+                patch('hospital_app.ai_model.incremental.model_store_path', return_value=self.model_root):
+            call_command('update_symptom_model', no_export=True, stdout=out)
+            call_command('update_symptom_model', no_export=True, stdout=out)
+        self.assertIn('training examples into symptom model version', out.getvalue())
+        self.assertIn('0 new training examples, the published model was not changed', out.getvalue())
@@ -0,0 +1,84 @@
+"""Tests for the NumPy Naive Bayes inference engine"""
+import random
+from unittest.mock import MagicMock
+import numpy as np
+from django.test import SimpleTestCase
+from .ai_model.inference import NaiveBayesInference, log_sum_exp, top_k_indices
+from .ai_model.symptom_checker import SymptomCheckerAI, KEYWORD_CONDITIONS
+
+
+class TopKIndicesTest(SimpleTestCase):
+    """Test top_k_indices"""
+    
+    def test_orders_highest_first(self):
+        probabilities = np.array([0.1, 0.4, 0.05, 0.3, 0.15])
+        self.assertEqual(top_k_indices(probabilities, 3).tolist(), [1, 3, 4])
+    
+    def test_k_larger_than_size(self):
+        self.assertEqual(top_k_indices([0.2, 0.5, 0.3], 10).tolist(), [1, 2, 0])
+    
+    def test_ties_ordered_by_index(self):
+        self.assertEqual(top_k_indices(np.array([0.25, 0.25, 0.5, 0.0]), 3).tolist(), [2, 0, 1])
+
+
+class NaiveBayesInferenceTest(SimpleTestCase):
+    """Test NaiveBayesInference against sklearn's predict_proba"""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ai = SymptomCheckerAI()
+        cls.engine = NaiveBayesInference(cls.ai.vectorizer, cls.ai.model)
+    
+    def sklearn_proba(self, text):
+        return self.ai.model.predict_proba(self.ai.vectorizer.transform([text]))[0]
+    
+    def test_probabilities_identical_to_sklearn(self):
+        keywords = sorted({
+            keyword
+            for config in KEYWORD_CONDITIONS.values()
+            for keyword in config['keywords']
+        })
+        rng = random.Random(7)
+        texts = ['', 'xyz', 'fever headache fatigue', 'the and of']
+        texts += [
+            ' '.join(rng.choice(keywords + ['severe', 'and', 'xyz']) for _ in range(rng.randint(1, 30)))
+            for _ in range(300)
+        ]
+        for text in texts:
+            np.testing.assert_array_equal(self.engine.predict_proba(text), self.sklearn_proba(text), err_msg=text)
+    
+    def test_log_sum_exp_matches_scipy(self):
+        from scipy.special import logsumexp
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            values = rng.normal(-20, 5, size=20)
+            self.assertEqual(log_sum_exp(values.copy()), logsumexp(values))
+        values = np.array([-1.0, -1.0, -3.0])
+        self.assertEqual(log_sum_exp(values.copy()), logsumexp(values))
+    
+    def test_batch_and_top_k(self):
+        texts = ['fever headache fatigue', 'nausea vomiting diarrhea']
+        batch = self.engine.predict_proba_batch(texts)
+        self.assertEqual(batch.shape, (2, len(self.engine.classes)))
+        np.testing.assert_array_equal(batch[1], self.sklearn_proba(texts[1]))
+        top = self.engine.top_k(texts[0], k=2)
+        self.assertEqual(len(top), 2)
+        self.assertGreaterEqual(top[0][1], top[1][1])
+    
+    def test_predict_uses_engine(self):
+        engine = self.ai._get_inference_engine()
+        self.assertIsInstance(engine, NaiveBayesInference)
+        self.assertIs(self.ai._get_inference_engine(), engine)
+    
+    def test_unsupported_model_uses_sklearn_path(self):
+        self.assertFalse(NaiveBayesInference.supports(MagicMock(), MagicMock()))
+        ai = SymptomCheckerAI.__new__(SymptomCheckerAI)
+        ai._create_fallback_model()
+        ai.vectorizer = MagicMock()
+        ai.model = MagicMock()
+        ai.conditions = ['flu', 'migraine', 'asthma']
+        ai.model.predict_proba.return_value = [np.array([0.9, 0.05, 0.05])]
+        result = ai.predict('aaa')
+        self.assertEqual(result['conditions'][0], 'flu')
+        ai.model.predict_proba.assert_called_once()
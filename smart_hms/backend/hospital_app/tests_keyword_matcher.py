@@ -0,0 +1,65 @@
+"""Tests for the compiled keyword matcher"""
+import random
+from django.test import SimpleTestCase
+from .ai_model.keyword_matcher import KeywordMatcher
+from .ai_model.symptom_checker import KEYWORD_CONDITIONS, SymptomCheckerAI
+
+
+def naive_match_counts(catalog, text):
+    """Reference implementation: the original per-condition substring scan"""
+    counts = {}
+    for condition, config in catalog.items():
+        if not all(req in text for req in config.get('required', [])):
+            continue
+        matches = sum(1 for keyword in config['keywords'] if keyword in text)
+        if matches > 0:
+            counts[condition] = matches
+    return counts
+
+
+class KeywordMatcherTest(SimpleTestCase):
+    """Test KeywordMatcher against the naive scan"""
+    
+    def setUp(self):
+        self.matchers = [
+            KeywordMatcher(KEYWORD_CONDITIONS, use_automaton=False),
+            KeywordMatcher(KEYWORD_CONDITIONS, use_automaton=True),
+        ]
+    
+    def test_overlapping_keywords(self):
+        catalog = {
+            'a': {'keywords': ['cough', 'dry cough', 'dry'], 'required': ['cough']},
+            'b': {'keywords': ['thirst', 'excessive thirst'], 'required': []},
+        }
+        for use_automaton in (False, True):
+            matcher = KeywordMatcher(catalog, use_automaton=use_automaton)
+            self.assertEqual(matcher.match_counts('dry cough and excessive thirst'), {'a': 3, 'b': 2})
+            self.assertEqual(matcher.match_counts('dry mouth'), {})
+    
+    def test_substring_semantics(self):
+        for matcher in self.matchers:
+            counts = matcher.match_counts('feverish and coughing')
+            self.assertEqual(counts, naive_match_counts(KEYWORD_CONDITIONS, 'feverish and coughing'))
+            self.assertIn('flu', counts)
+    
+    def test_matches_naive_scan(self):
+        patterns = sorted({
+            keyword
+            for config in KEYWORD_CONDITIONS.values()
+            for keyword in config['keywords'] + config['required']
+        })
+        rng = random.Random(42)
+        for _ in range(500):
+            words = [rng.choice(patterns + ['pain', 'severe', 'xyz']) for _ in range(rng.randint(0, 10))]
+            text = ' '.join(word[:rng.randint(1, len(word))] for word in words)
+            expected = naive_match_counts(KEYWORD_CONDITIONS, text)
+            for matcher in self.matchers:
+                counts = matcher.match_counts(text)
+                self.assertEqual(counts, expected, text)
+                self.assertEqual(list(counts), list(expected), text)
+    
+    def test_custom_catalog_is_recompiled(self):
+        ai = SymptomCheckerAI.__new__(SymptomCheckerAI)
+        ai.keyword_conditions = {'test': {'keywords': ['zzz'], 'required': [], 'weight': 1.0}}
+        result = ai._predict_keyword_matching('zzz')
+        self.assertEqual(result['conditions'], ['test'])
@@ -0,0 +1,41 @@
+"""Tests that heavy AI dependencies are only imported on first use"""
+import json
+import subprocess
+import sys
+from unittest.mock import patch
+from django.conf import settings
+from django.test import SimpleTestCase
+from .ai_model import symptom_checker
+
+STARTUP_CHECK = """
+import json, os, sys
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital.settings')
+import django
+django.setup()
+import hospital.urls
+from hospital_app.ai_model import model_store, registry, symptom_checker
+print(json.dumps([name for name in ('pandas', 'sklearn', 'scipy', 'numpy') if name in sys.modules]))
+"""
+
+
+class LazyImportTest(SimpleTestCase):
+    """Test lazy loading of pandas, scikit-learn and NumPy"""
+
+    def test_startup_does_not_import_heavy_libraries(self):
+        completed = subprocess.run(
+            [sys.executable, '-c', STARTUP_CHECK],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(json.loads(completed.stdout.strip().splitlines()[-1]), [])
+
+    def test_lazy_names_resolve_and_can_be_patched(self):
+        import pandas
+        self.assertIs(symptom_checker.pd, pandas)
+        with patch('hospital_app.ai_model.symptom_checker.train_test_split') as mock_split:
+            symptom_checker._require('train_test_split')
+            self.assertIs(symptom_checker.train_test_split, mock_split)
+        self.assertIsNot(symptom_checker.train_test_split, mock_split)
+
+    def test_unknown_attribute(self):
+        with self.assertRaises(AttributeError):
+            symptom_checker.not_a_dependency
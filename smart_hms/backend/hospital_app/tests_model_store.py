@@ -0,0 +1,139 @@
+"""Tests for versioned model publishing, retraining and hot model swaps"""
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+from .ai_model import model_store, registry, symptom_checker
+from .ai_model.artifacts import MANIFEST_NAME, save_artifact
+from .ai_model.symptom_checker import SymptomCheckerAI
+
+
+class ModelStoreTest(SimpleTestCase):
+    """Test publishing, pruning and locking in the model store"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ai = SymptomCheckerAI()
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def publish(self, **kwargs):
+        return model_store.publish_artifact(self.root, self.ai.vectorizer, self.ai.model, self.ai.conditions, **kwargs)
+
+    def test_publish_updates_marker(self):
+        self.assertIsNone(model_store.current_artifact_path(self.root))
+        self.assertIsNone(model_store.marker_state(self.root))
+
+        version, manifest = self.publish()
+        self.assertEqual(model_store.current_version(self.root), version)
+        self.assertTrue(version.endswith(manifest['model_version']))
+        self.assertEqual(model_store.current_artifact_path(self.root), os.path.join(self.root, version))
+        state = model_store.marker_state(self.root)
+
+        second, _ = self.publish()
+        self.assertNotEqual(second, version)
+        self.assertNotEqual(model_store.marker_state(self.root), state)
+        self.assertFalse(any(name.startswith(model_store.TEMP_PREFIX) for name in os.listdir(self.root)))
+
+    def test_prunes_old_versions(self):
+        versions = [self.publish(keep=2)[0] for _ in range(4)]
+        self.assertEqual(model_store.list_versions(self.root), versions[-2:])
+
+    def test_failed_save_leaves_no_version(self):
+        with patch('hospital_app.ai_model.artifacts.np.save', side_effect=OSError('Disk full')):
+            with self.assertRaises(OSError):
+                self.publish()
+        self.assertEqual(os.listdir(self.root), [])
+        self.assertIsNone(model_store.current_version(self.root))
+
+    def test_unversioned_artifact_is_read_then_superseded(self):
+        save_artifact(self.root, self.ai.vectorizer, self.ai.model, self.ai.conditions)
+        self.assertEqual(model_store.current_artifact_path(self.root), self.root)
+        version, _ = self.publish()
+        self.assertEqual(model_store.current_artifact_path(self.root), os.path.join(self.root, version))
+        self.assertFalse(os.path.exists(os.path.join(self.root, MANIFEST_NAME)))
+
+    def test_trainer_lock_is_exclusive(self):
+        with model_store.trainer_lock(self.root):
+            with self.assertRaises(model_store.TrainingInProgress):
+                with model_store.trainer_lock(self.root, blocking=False):
+                    pass
+        with model_store.trainer_lock(self.root, blocking=False):
+            pass
+
+
+class RetrainAndSwapTest(SimpleTestCase):
+    """Test the retrain_symptom_model command and hot swapping in the registry"""
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.base_dir, 'hospital_app', 'ai_model', 'symptom_model')
+        os.makedirs(os.path.dirname(self.root))
+        self.settings = override_settings(BASE_DIR=self.base_dir, SYMPTOM_MODEL_RELOAD_INTERVAL=0)
+        self.settings.enable()
+        registry.reset_symptom_checker()
+
+    def tearDown(self):
+        registry.reset_symptom_checker()
+        self.settings.disable()
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_command_publishes_new_version(self):
+        call_command('retrain_symptom_model', stdout=StringIO())
+        first = model_store.current_version(self.root)
+        self.assertIsNotNone(first)
+        self.assertTrue(os.path.exists(os.path.join(self.base_dir, 'hospital_app', 'ai_model', 'symptom_data.csv')))
+
+        call_command('retrain_symptom_model', stdout=StringIO())
+        self.assertNotEqual(model_store.current_version(self.root), first)
+
+    def test_published_model_loads_in_fresh_process(self):
+        call_command('retrain_symptom_model', stdout=StringIO())
+        # As in a new worker, where no lazily imported name has been resolved yet
+        with patch.dict(symptom_checker.__dict__):
+            for name in symptom_checker._LAZY_IMPORTS:
+                symptom_checker.__dict__.pop(name, None)
+            checker = SymptomCheckerAI.from_published_model()
+        self.assertEqual(checker.artifact_version, model_store.current_version(self.root))
+
+    def test_command_no_wait_fails_while_training(self):
+        with model_store.trainer_lock(self.root):
+            with self.assertRaises(CommandError):
+                call_command('retrain_symptom_model', '--no-wait', stdout=StringIO())
+
+    def test_worker_does_not_train_while_trainer_runs(self):
+        with model_store.trainer_lock(self.root):
+            with patch.object(SymptomCheckerAI, '_train_model') as mock_train:
+                checker = SymptomCheckerAI()
+        mock_train.assert_not_called()
+        self.assertIsNone(checker.model)
+        self.assertEqual(checker.predict('fever headache fatigue')['conditions'][0], 'flu')
+
+    def test_registry_swaps_in_published_model(self):
+        with model_store.trainer_lock(self.root):
+            first = registry.get_symptom_checker()
+        self.assertIsNone(first.model)
+        self.assertIs(registry.get_symptom_checker(), first)
+
+        call_command('retrain_symptom_model', stdout=StringIO())
+        second = registry.get_symptom_checker()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.artifact_version, model_store.current_version(self.root))
+        self.assertIsNotNone(second.model)
+        self.assertIs(registry.get_symptom_checker(), second)
+
+    def test_registry_keeps_model_if_new_one_fails_to_load(self):
+        call_command('retrain_symptom_model', stdout=StringIO())
+        first = registry.get_symptom_checker()
+        call_command('retrain_symptom_model', stdout=StringIO())
+        with patch.object(SymptomCheckerAI, 'from_published_model', side_effect=ValueError('Corrupt artifact')):
+            self.assertIs(registry.get_symptom_checker(), first)
@@ -0,0 +1,100 @@
+"""Tests for keyset (cursor) pagination of the list endpoints"""
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from .models import Patient, Doctor, Appointment, SymptomChecker
+
+User = get_user_model()
+
+
+class KeysetPaginationTest(APITestCase):
+    """Test walking appointment and symptom check lists by cursor"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(username='admin1', role='admin')
+        self.client.force_authenticate(user=self.admin_user)
+        self.patient = Patient.objects.create(user=User.objects.create_user(username='patient1', role='patient'))
+        self.doctors = [
+            Doctor.objects.create(
+                user=User.objects.create_user(username=f'doctor{i}', role='doctor'), license_number=f'DOC00{i}'
+            )
+            for i in range(3)
+        ]
+        self.start = timezone.now().replace(microsecond=123456)
+        # Pairs of appointments (with different doctors) share a time, so the id tiebreaker matters
+        self.appointments = [
+            self.create_appointment(self.start + timedelta(hours=i // 2), self.doctors[i % 2]) for i in range(11)
+        ]
+
+    def create_appointment(self, appointment_date, doctor):
+        return Appointment.objects.create(
+            patient=self.patient, doctor=doctor, appointment_date=appointment_date, reason='Checkup'
+        )
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def walk(self, url, link='next'):
+        """IDs on every page from ``url`` on, following ``link``"""
+        pages = []
+        while url:
+            data = self.get(url)
+            pages.append([row['id'] for row in data['results']])
+            url = data[link]
+        return pages
+
+    def expected_order(self):
+        return [a.id for a in sorted(self.appointments, key=lambda a: (a.appointment_date, a.id), reverse=True)]
+
+    def test_pages_follow_ordering_with_id_tiebreaker(self):
+        pages = self.walk('/api/appointments/?page_size=3')
+        self.assertEqual([len(page) for page in pages], [3, 3, 3, 2])
+        self.assertEqual(sum(pages, []), self.expected_order())
+
+        first = self.get('/api/appointments/?page_size=3')
+        self.assertIsNone(first['previous'])
+        self.assertNotIn('count', first)
+
+    def test_previous_links_walk_back(self):
+        data = self.get('/api/appointments/?page_size=3')
+        while data['next']:
+            data = self.get(data['next'])
+        pages = self.walk(data['previous'], link='previous')
+        self.assertEqual(sum(reversed(pages), []), self.expected_order()[:9])
+        self.assertEqual([len(page) for page in pages], [3, 3, 3])
+
+    def test_stable_under_concurrent_inserts(self):
+        data = self.get('/api/appointments/?page_size=4')
+        seen = [row['id'] for row in data['results']]
+        # New appointments at the front, and one tied with the last row served
+        self.appointments.append(self.create_appointment(self.start + timedelta(days=1), self.doctors[0]))
+        self.appointments.append(self.create_appointment(self.start + timedelta(hours=3), self.doctors[2]))
+        for page in self.walk(data['next']):
+            seen.extend(page)
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), {a.id for a in self.appointments[:11]})
+
+    def test_cursor_is_opaque_and_validated(self):
+        data = self.get('/api/appointments/?page_size=3')
+        self.assertRegex(data['next'], r'\?cursor=[A-Za-z0-9_-]+&page_size=3$')
+        for cursor in ('not-a-cursor', 'eyJrIjpbXX0'):
+            response = self.client.get(f'/api/appointments/?cursor={cursor}')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_pagination_on_request(self):
+        data = self.get('/api/appointments/?page=1')
+        self.assertEqual(data['count'], 11)
+        self.assertIsNone(data['next'])
+        self.assertEqual([row['id'] for row in data['results']], self.expected_order())
+        self.assertEqual(self.client.get('/api/appointments/?page=2').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_size_is_capped(self):
+        SymptomChecker.objects.bulk_create([SymptomChecker(symptoms=f'fever {i}') for i in range(105)])
+        data = self.get('/api/symptom-checker/?page_size=500')
+        self.assertEqual(len(data['results']), 100)
+        self.assertEqual(len(self.walk('/api/symptom-checker/')), 6)
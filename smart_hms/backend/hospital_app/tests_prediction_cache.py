@@ -0,0 +1,140 @@
+"""Tests for the symptom checker prediction cache"""
+from unittest.mock import patch
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from .ai_model.prediction_cache import LRUCache, PredictionCache, normalize_symptoms
+from .ai_model.symptom_checker import SymptomCheckerAI
+
+
+class NormalizeSymptomsTest(SimpleTestCase):
+    """Test normalize_symptoms"""
+
+    def test_phrases_sorted_deduplicated_and_collapsed(self):
+        self.assertEqual(
+            normalize_symptoms('  Headache,fever ;  HEADACHE\n\nshortness   of breath, '),
+            'fever, headache, shortness of breath',
+        )
+
+    def test_word_order_inside_phrase_kept(self):
+        self.assertEqual(normalize_symptoms('fever  headache   fatigue'), 'fever headache fatigue')
+
+    def test_only_separators(self):
+        self.assertEqual(normalize_symptoms(' , ;\n'), '')
+
+
+class LRUCacheTest(SimpleTestCase):
+    """Test LRUCache eviction and expiry"""
+
+    def setUp(self):
+        self.now = 0.0
+        self.cache = LRUCache(max_size=2, ttl=10, timer=lambda: self.now)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.cache.set('c', 3)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_entries_expire(self):
+        self.cache.set('a', 1)
+        self.now = 9.9
+        self.assertEqual(self.cache.get('a'), 1)
+        self.now = 10.0
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+
+class PredictionCacheTest(SimpleTestCase):
+    """Test the two cache tiers, versioning and counters"""
+
+    prediction = {'conditions': ['flu'], 'confidence': {'flu': 0.8}, 'recommendations': 'Rest'}
+
+    def setUp(self):
+        self.shared = caches['symptom_predictions']
+        self.shared.clear()
+
+    def test_local_hit_returns_copy(self):
+        cache = PredictionCache()
+        self.assertIsNone(cache.get('v1', 'fever'))
+        cache.set('v1', 'fever', self.prediction)
+        hit = cache.get('v1', 'fever')
+        self.assertEqual(hit, self.prediction)
+        hit['conditions'].append('cold')
+        self.assertEqual(cache.get('v1', 'fever'), self.prediction)
+        stats = cache.stats()
+        self.assertEqual((stats['local_hits'], stats['shared_hits'], stats['misses']), (2, 0, 1))
+
+    def test_version_change_invalidates(self):
+        cache = PredictionCache(shared_cache=self.shared)
+        cache.set('v1', 'fever', self.prediction)
+        self.assertIsNone(cache.get('v2', 'fever'))
+        self.assertEqual(cache.stats()['local_size'], 0)
+
+    def test_shared_tier_between_instances(self):
+        first = PredictionCache(shared_cache=self.shared)
+        second = PredictionCache(shared_cache=self.shared)
+        first.set('v1', 'fever', self.prediction)
+        self.assertEqual(second.get('v1', 'fever'), self.prediction)
+        self.assertEqual(second.get('v1', 'fever'), self.prediction)
+        stats = second.stats()
+        self.assertEqual((stats['local_hits'], stats['shared_hits'], stats['misses']), (1, 1, 0))
+
+    def test_shared_tier_errors_are_misses(self):
+        cache = PredictionCache(shared_cache=self.shared)
+        with patch.object(self.shared, 'get', side_effect=ConnectionError('down')):
+            self.assertIsNone(cache.get('v1', 'fever'))
+        self.assertEqual(cache.stats()['misses'], 1)
+
+
+class SymptomCheckerCacheTest(SimpleTestCase):
+    """Test prediction caching in SymptomCheckerAI"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.ai = SymptomCheckerAI()
+
+    def setUp(self):
+        self.ai._prediction_cache = PredictionCache()
+
+    def test_repeated_symptoms_hit_cache(self):
+        first = self.ai.predict('Fever, headache,  fatigue')
+        with patch.object(self.ai, '_predict_keyword_matching') as mock_keywords:
+            second = self.ai.predict('fatigue; fever, headache, fever')
+        mock_keywords.assert_not_called()
+        self.assertEqual(first, second)
+        stats = self.ai.cache_stats()
+        self.assertEqual((stats['local_hits'], stats['misses']), (1, 1))
+
+    def test_model_version_change_invalidates(self):
+        self.ai.predict('fever headache fatigue')
+        version = self.ai.model_version
+        try:
+            self.ai.model_version = 'retrained'
+            self.ai.predict('fever headache fatigue')
+        finally:
+            self.ai.model_version = version
+        self.assertEqual(self.ai.cache_stats()['misses'], 2)
+
+    def test_replaced_model_not_cached(self):
+        ai = SymptomCheckerAI.__new__(SymptomCheckerAI)
+        ai._create_fallback_model()
+        ai.model = self.ai.model
+        ai.vectorizer = self.ai.vectorizer
+        ai.conditions = self.ai.conditions
+        self.assertIsNone(ai._cache_version())
+        ai.model, ai.vectorizer = None, None
+        self.assertIsNotNone(ai._cache_version())
+
+    def test_batch_uses_cache(self):
+        self.ai.predict('fever headache fatigue')
+        batch = self.ai.predict_batch(['fever headache fatigue', 'rash itching', 'Rash  itching'])
+        self.assertEqual(batch[0], self.ai.predict('fever headache fatigue'))
+        self.assertEqual(batch[1], batch[2])
+        self.assertIsNot(batch[1], batch[2])
+        self.assertEqual(self.ai.predict('rash itching'), batch[1])
+        stats = self.ai.cache_stats()
+        self.assertEqual((stats['local_hits'], stats['misses']), (3, 2))
@@ -0,0 +1,109 @@
+"""Tests for the SymptomPrediction table and SymptomChecker.top_condition"""
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from .models import Patient, SymptomChecker, SymptomPrediction
+from .write_behind import save_symptom_checks
+
+User = get_user_model()
+
+
+def predictions(check):
+    return list(check.predictions.values_list('rank', 'condition', 'confidence'))
+
+
+class SymptomPredictionTest(APITestCase):
+    """Test that prediction rows and top conditions follow the predictions"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.patient_user = User.objects.create_user(username='patient1', role='patient')
+        self.patient = Patient.objects.create(user=self.patient_user)
+
+    def test_written_on_save(self):
+        check = SymptomChecker.objects.create(
+            patient=self.patient, symptoms='fever headache', predicted_conditions=['flu', 'migraine'],
+            confidence_scores={'flu': 0.9, 'migraine': 0.4},
+        )
+        self.assertEqual(check.top_condition, 'flu')
+        self.assertEqual(predictions(check), [(1, 'flu', 0.9), (2, 'migraine', 0.4)])
+
+        check.predicted_conditions = ['migraine']
+        check.save()
+        self.assertEqual(SymptomChecker.objects.get().top_condition, 'migraine')
+        self.assertEqual(predictions(check), [(1, 'migraine', 0.4)])
+
+    def test_written_by_the_ai_endpoints(self):
+        self.client.force_authenticate(user=self.patient_user)
+        self.client.post('/api/ai/symptom-checker/', {'symptoms': 'fever headache fatigue'})
+        self.client.post('/api/ai/symptom-checker/batch/', {'symptoms': ['cough', 'rash']}, format='json')
+        self.client.post('/api/symptom-checker/analyze/', {'symptoms': 'nausea vomiting'})
+        for check in SymptomChecker.objects.all():
+            with self.subTest(symptoms=check.symptoms):
+                self.assertEqual(check.top_condition, check.predicted_conditions[0])
+                self.assertEqual([condition for _, condition, _ in predictions(check)], check.predicted_conditions)
+        self.assertEqual(SymptomChecker.objects.count(), 4)
+
+    def test_malformed_predictions(self):
+        save_symptom_checks([
+            {'patient_id': None, 'symptoms': 'x', 'predicted_conditions': ['flu', 7, 'cold'],
+             'confidence_scores': {'flu': 'high'}},
+            {'patient_id': None, 'symptoms': 'y', 'predicted_conditions': {}, 'confidence_scores': []},
+        ])
+        first, second = SymptomChecker.objects.order_by('id')
+        self.assertEqual(predictions(first), [(1, 'flu', None), (2, 'cold', None)])
+        self.assertEqual((second.top_condition, predictions(second)), ('', []))
+
+    def test_backfill_command(self):
+        # Rows saved without signals, as before the table existed
+        SymptomChecker.objects.bulk_create([
+            SymptomChecker(symptoms=f'check {i}', predicted_conditions=['asthma', 'flu'][i % 2:],
+                           confidence_scores={'asthma': 0.7, 'flu': 0.3})
+            for i in range(5)
+        ])
+        checks = list(SymptomChecker.objects.order_by('id'))
+        SymptomPrediction.objects.create(symptom_check=checks[0], rank=1, condition='stale')
+
+        out = StringIO()
+        call_command('backfill_symptom_check_predictions', chunk_size=2, after_id=checks[0].id, stdout=out)
+        self.assertIn('Wrote 6 symptom check predictions', out.getvalue())
+        self.assertEqual(predictions(checks[0]), [(1, 'stale', None)])
+        self.assertEqual(predictions(checks[1]), [(1, 'flu', 0.3)])
+
+        call_command('backfill_symptom_check_predictions', stdout=StringIO())
+        self.assertEqual(SymptomPrediction.objects.count(), 8)
+        self.assertEqual(predictions(checks[0]), [(1, 'asthma', 0.7), (2, 'flu', 0.3)])
+        self.assertEqual(
+            list(SymptomChecker.objects.order_by('id').values_list('top_condition', flat=True)),
+            ['asthma', 'flu', 'asthma', 'flu', 'asthma'],
+        )
+
+    def test_filter_and_frequency(self):
+        for conditions in (['flu'], ['flu', 'cold'], ['heart_attack'], []):
+            SymptomChecker.objects.create(patient=self.patient, symptoms='x', predicted_conditions=conditions)
+        old = SymptomChecker.objects.create(patient=self.patient, symptoms='x', predicted_conditions=['flu'])
+        SymptomChecker.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=30))
+        self.client.force_authenticate(user=self.patient_user)
+
+        response = self.client.get('/api/symptom-checker/', {'top_condition': 'heart_attack'})
+        self.assertEqual([row['top_condition'] for row in response.data['results']], ['heart_attack'])
+
+        response = self.client.get('/api/symptom-checker/condition-frequency/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        today = timezone.now().date()
+        self.assertEqual(response.data['results'], [
+            {'day': today, 'condition': 'flu', 'count': 2},
+            {'day': today, 'condition': 'heart_attack', 'count': 1},
+        ])
+        self.assertEqual(len(self.client.get('/api/symptom-checker/condition-frequency/', {'days': 31}).data['results']), 3)
+        for days in ('week', 0, 1000):
+            self.assertEqual(self.client.get('/api/symptom-checker/condition-frequency/', {'days': days}).status_code,
+                             status.HTTP_400_BAD_REQUEST)
+
+        # Scoped like the list: another patient sees none of these
+        self.client.force_authenticate(user=User.objects.create_user(username='patient2', role='patient'))
+        self.assertEqual(self.client.get('/api/symptom-checker/condition-frequency/').data['results'], [])
@@ -0,0 +1,125 @@
+"""Tests that list endpoints run a constant number of queries, whatever the page size"""
+from datetime import timedelta
+from itertools import count
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from .models import Patient, Doctor, Admin, Appointment, MedicalRecord, Prescription
+
+User = get_user_model()
+
+
+class ListQueryCountTest(APITestCase):
+    """Test that every role's list requests do not issue a query per row"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.numbers = count(1)
+        self.admin_user = User.objects.create_user(username='admin', role='admin')
+        Admin.objects.create(user=self.admin_user, employee_id='ADM000')
+        self.doctor_user = User.objects.create_user(username='doctor', role='doctor', first_name='Gregory', last_name='House')
+        self.doctor = Doctor.objects.create(user=self.doctor_user, license_number='DOC000')
+        self.patient_user = User.objects.create_user(username='patient', role='patient', first_name='John', last_name='Doe')
+        self.patient = Patient.objects.create(user=self.patient_user)
+        self.users = {'admin': self.admin_user, 'doctor': self.doctor_user, 'patient': self.patient_user}
+
+    def add_rows(self, rows):
+        """Add rows visible to every role: the doctor and the patient each gain a new counterpart"""
+        for _ in range(rows):
+            number = next(self.numbers)
+            patient = Patient.objects.create(
+                user=User.objects.create_user(username=f'patient{number}', role='patient', first_name='Patient', last_name=str(number))
+            )
+            doctor = Doctor.objects.create(
+                user=User.objects.create_user(username=f'doctor{number}', role='doctor', first_name='Doctor', last_name=str(number)),
+                license_number=f'DOC{number:03d}'
+            )
+            Admin.objects.create(
+                user=User.objects.create_user(username=f'admin{number}', role='admin'),
+                employee_id=f'ADM{number:03d}'
+            )
+            for appointment_patient, appointment_doctor in ((patient, self.doctor), (self.patient, doctor)):
+                appointment = Appointment.objects.create(
+                    patient=appointment_patient,
+                    doctor=appointment_doctor,
+                    appointment_date=timezone.now() + timedelta(days=number),
+                    reason='Checkup'
+                )
+                record = MedicalRecord.objects.create(
+                    patient=appointment_patient,
+                    doctor=appointment_doctor,
+                    appointment=appointment,
+                    diagnosis='Flu',
+                    symptoms='Fever',
+                    treatment_plan='Rest'
+                )
+                Prescription.objects.create(
+                    patient=appointment_patient,
+                    doctor=appointment_doctor,
+                    medical_record=record,
+                    medication_name='Aspirin',
+                    dosage='100mg'
+                )
+
+    def count_queries(self, user, url):
+        """Number of queries and of listed rows for a GET request"""
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries), len(response.data['results'])
+
+    def assert_constant_queries(self, url, roles=('admin', 'doctor', 'patient')):
+        self.add_rows(1)
+        before = {role: self.count_queries(self.users[role], url) for role in roles}
+        self.add_rows(19)
+        for role in roles:
+            with self.subTest(role=role):
+                queries, rows = self.count_queries(self.users[role], url)
+                self.assertGreater(rows, before[role][1])
+                self.assertEqual(queries, before[role][0])
+
+    def test_appointments(self):
+        self.assert_constant_queries('/api/appointments/')
+
+    def test_medical_records(self):
+        self.assert_constant_queries('/api/medical-records/')
+
+    def test_prescriptions(self):
+        self.assert_constant_queries('/api/prescriptions/')
+
+    def test_patients(self):
+        self.assert_constant_queries('/api/patients/', roles=('admin', 'doctor'))
+
+    def test_doctors(self):
+        self.assert_constant_queries('/api/doctors/', roles=('admin', 'patient'))
+
+    def test_admins(self):
+        self.assert_constant_queries('/api/admins/', roles=('admin',))
+
+    def test_page_is_one_query(self):
+        self.add_rows(20)
+        for url in ('/api/appointments/', '/api/medical-records/', '/api/prescriptions/'):
+            with self.subTest(url=url):
+                # The page itself, joined with both users; keyset pages need no count
+                self.assertEqual(self.count_queries(self.admin_user, url), (1, 20))
+                # Page-number pagination adds the count
+                self.assertEqual(self.count_queries(self.admin_user, url + '?page=1'), (2, 20))
+
+    def test_dashboard(self):
+        self.add_rows(1)
+        self.client.force_authenticate(user=self.patient_user)
+        with CaptureQueriesContext(connection) as before:
+            self.client.get('/api/dashboard/')
+        self.add_rows(9)
+        with self.assertNumQueries(len(before)):
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(len(response.data['appointments']), 5)
+
+        self.client.force_authenticate(user=self.doctor_user)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(len(response.data['patients']), 5)
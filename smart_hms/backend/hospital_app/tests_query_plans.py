@@ -0,0 +1,122 @@
+"""Tests that hot queries are served by indexes rather than full scans and sorts"""
+import re
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from . import availability, views
+from .models import Patient, Doctor, Appointment, Prescription, SymptomPrediction
+from .pagination import KeysetPagination
+
+User = get_user_model()
+
+# Plan lines that mean a table is read in full or rows are sorted after reading
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)$', re.MULTILINE),  # "SCAN t USING INDEX i" reads in index order
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR (RIGHT PART OF |LAST TERM OF )?ORDER BY'),
+    'postgresql': re.compile(r'\bSort\b'),  # including Incremental Sort
+}
+
+
+@unittest.skipUnless(connection.vendor in FULL_SCAN_PATTERNS, 'EXPLAIN checks support SQLite and PostgreSQL')
+class HotQueryPlanTest(TestCase):
+    """Test EXPLAIN output of the role-scoped list and dashboard queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_user(username='admin', role='admin')
+        cls.doctor_user = User.objects.create_user(username='doctor', role='doctor')
+        Doctor.objects.create(user=cls.doctor_user, license_number='DOC001')
+        cls.patient_user = User.objects.create_user(username='patient', role='patient')
+        Patient.objects.create(user=cls.patient_user)
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables are cheapest to scan; make the planner show
+            # whether an index can serve the query at all
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+
+    def viewset_queryset(self, viewset_class, user, query_params=None):
+        """The queryset a viewset lists for ``user``"""
+        request = SimpleNamespace(user=user, query_params=query_params or {})
+        viewset = viewset_class(request=request, format_kwarg=None, action='list')
+        return viewset.filter_queryset(viewset.get_queryset())
+
+    def assert_indexed(self, queryset, allow_sort=False):
+        plan = queryset.explain()
+        self.assertIsNone(FULL_SCAN_PATTERNS[connection.vendor].search(plan), plan)
+        if not allow_sort:
+            self.assertIsNone(SORT_PATTERNS[connection.vendor].search(plan), plan)
+
+    def test_role_scoped_lists(self):
+        for viewset_class in (
+            views.AppointmentViewSet, views.MedicalRecordViewSet,
+            views.PrescriptionViewSet, views.SymptomCheckerViewSet,
+        ):
+            for user in (self.admin_user, self.doctor_user, self.patient_user):
+                with self.subTest(viewset=viewset_class.__name__, role=user.role):
+                    # A doctor's symptom checks span several patients, which
+                    # have to be merged by date
+                    allow_sort = viewset_class is views.SymptomCheckerViewSet and user.role == 'doctor'
+                    self.assert_indexed(self.viewset_queryset(viewset_class, user), allow_sort=allow_sort)
+
+    def test_keyset_pages(self):
+        for viewset_class in (
+            views.AppointmentViewSet, views.MedicalRecordViewSet,
+            views.PrescriptionViewSet, views.SymptomCheckerViewSet,
+        ):
+            for user in (self.admin_user, self.doctor_user, self.patient_user):
+                queryset = self.viewset_queryset(viewset_class, user)
+                paginator = KeysetPagination()
+                paginator.model = queryset.model
+                paginator.fields = paginator.get_ordering_fields(queryset)
+                values = [timezone.now(), 1000]
+                for reverse in (False, True):
+                    with self.subTest(viewset=viewset_class.__name__, role=user.role, reverse=reverse):
+                        allow_sort = viewset_class is views.SymptomCheckerViewSet and user.role == 'doctor'
+                        self.assert_indexed(paginator.keyset_queryset(queryset, values, reverse), allow_sort=allow_sort)
+
+    def test_symptom_checks_by_top_condition(self):
+        queryset = self.viewset_queryset(views.SymptomCheckerViewSet, self.admin_user, {'top_condition': 'heart_attack'})
+        self.assert_indexed(queryset.filter(created_at__gte=timezone.now() - timedelta(days=7)))
+        self.assert_indexed(SymptomPrediction.objects.filter(condition='heart_attack', confidence__gte=0.5), allow_sort=True)
+
+    def test_patient_dashboard_active_prescriptions(self):
+        self.assert_indexed(
+            Prescription.objects.filter(patient__user=self.patient_user, is_active=True).order_by('-created_at')
+        )
+
+    def test_admin_dashboard_counts(self):
+        today_start = timezone.make_aware(datetime.combine(timezone.now().date(), datetime.min.time()))
+        # count() drops the default ordering
+        for queryset in (
+            Appointment.objects.filter(status__in=['scheduled', 'confirmed']),
+            Appointment.objects.filter(status='completed'),
+            Appointment.objects.filter(appointment_date__gte=today_start, appointment_date__lt=today_start + timedelta(days=1)),
+        ):
+            with self.subTest(query=str(queryset.query)):
+                self.assert_indexed(queryset.order_by())
+
+    def test_slot_search_bookings(self):
+        start = timezone.now()
+        doctor_filter = {'doctor__is_available': True, 'doctor__specialization__in': ['cardiology', 'neurology']}
+        for queryset in (
+            # One doctor's slots
+            availability._bookings().filter(
+                doctor__user=self.doctor_user, appointment_date__gte=start, appointment_date__lt=start + timedelta(days=7)
+            ),
+            # A window of the earliest-slot search
+            availability._bookings().filter(
+                appointment_date__gte=start, appointment_date__lt=start + timedelta(days=1), **doctor_filter
+            ),
+        ):
+            with self.subTest(query=str(queryset.query)):
+                self.assert_indexed(queryset)
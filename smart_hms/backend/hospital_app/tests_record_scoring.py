@@ -0,0 +1,101 @@
+"""Tests for the backfill of AI predictions over medical records"""
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from .ai_model import model_store
+from .models import Patient, Doctor, MedicalRecord, MedicalRecordPrediction
+from .record_scoring import resume_after_id, save_record_predictions, score_medical_records
+
+User = get_user_model()
+
+SYMPTOMS = ['fever cough body aches', 'itchy red rash', 'throbbing headache sensitive to light', '']
+
+
+class RecordScoringTest(TestCase):
+    """Test scoring historical medical records in chunks"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.base_dir = tempfile.mkdtemp()
+        cls.model_root = os.path.join(cls.base_dir, 'hospital_app', 'ai_model', 'symptom_model')
+        os.makedirs(os.path.dirname(cls.model_root))
+        cls.settings = override_settings(BASE_DIR=cls.base_dir)
+        cls.settings.enable()
+        call_command('retrain_symptom_model', stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.base_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        patient = Patient.objects.create(user=User.objects.create_user(username='patient1', role='patient'))
+        doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor1', role='doctor'), license_number='DOC001'
+        )
+        self.records = MedicalRecord.objects.bulk_create([
+            MedicalRecord(patient=patient, doctor=doctor, diagnosis='Seen', symptoms=SYMPTOMS[i % len(SYMPTOMS)],
+                          treatment_plan='Rest')
+            for i in range(10)
+        ])
+
+    def scored(self):
+        return dict(MedicalRecordPrediction.objects.values_list('medical_record_id', 'top_condition'))
+
+    def test_command_scores_every_record(self):
+        out = StringIO()
+        call_command('backfill_symptom_predictions', chunk_size=3, stdout=out)
+        self.assertIn('Scored 10 medical records', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        scored = self.scored()
+        self.assertEqual(sorted(scored), [record.pk for record in self.records])
+        self.assertEqual(scored[self.records[3].pk], 'general_consultation')
+        prediction = self.records[0].ai_prediction
+        self.assertEqual(prediction.top_condition, prediction.predicted_conditions[0])
+        self.assertIn(prediction.top_condition, prediction.confidence_scores)
+        self.assertEqual(prediction.model_version, model_store.current_version(self.model_root))
+
+    def test_command_fails_without_a_published_model(self):
+        empty = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, empty, ignore_errors=True)
+        with override_settings(BASE_DIR=empty), self.assertRaisesMessage(CommandError, 'No published symptom model'):
+            call_command('backfill_symptom_predictions', stdout=StringIO())
+        self.assertEqual(self.scored(), {})
+
+    def test_resume_after_the_last_scored_record(self):
+        self.assertEqual(resume_after_id(), 0)
+        self.assertEqual(score_medical_records(chunk_size=4, after_id=self.records[5].pk), 4)
+        self.assertEqual(resume_after_id(), self.records[-1].pk)
+        self.assertEqual(score_medical_records(after_id=resume_after_id()), 0)
+
+        # Scoring again overwrites the predictions
+        MedicalRecordPrediction.objects.update(top_condition='stale')
+        progress = []
+        self.assertEqual(score_medical_records(chunk_size=4, progress=lambda *args: progress.append(args)), 10)
+        self.assertEqual(MedicalRecordPrediction.objects.count(), 10)
+        self.assertFalse(MedicalRecordPrediction.objects.filter(top_condition='stale').exists())
+        self.assertEqual([(records, last_id) for records, last_id, _ in progress],
+                         [(4, self.records[3].pk), (8, self.records[7].pk), (10, self.records[9].pk)])
+
+    def test_process_pool_scores_like_this_process(self):
+        score_medical_records(chunk_size=3)
+        expected = self.scored()
+        MedicalRecordPrediction.objects.all().delete()
+        self.assertEqual(score_medical_records(chunk_size=3, workers=2), 10)
+        self.assertEqual(self.scored(), expected)
+        self.assertEqual(
+            set(MedicalRecordPrediction.objects.values_list('model_version', flat=True)),
+            {model_store.current_version(self.model_root)},
+        )
+
+    def test_deleted_records_are_skipped(self):
+        prediction = {'conditions': ['flu'], 'confidence': {'flu': 0.9}, 'recommendations': 'Rest'}
+        save_record_predictions('v1', [(self.records[0].pk, prediction), (self.records[-1].pk + 100, prediction)])
+        self.assertEqual(self.scored(), {self.records[0].pk: 'flu'})
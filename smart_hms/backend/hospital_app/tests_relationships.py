@@ -0,0 +1,118 @@
+"""Tests for the DoctorPatient table maintained from appointments"""
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+from .models import Patient, Doctor, Appointment, DoctorPatient
+from .relationships import backfill_links
+
+User = get_user_model()
+
+
+class DoctorPatientLinkTest(APITestCase):
+    """Test that signals keep the links equal to aggregating the appointments"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.now = timezone.now()
+        self.patients = [
+            Patient.objects.create(user=User.objects.create_user(username=f'patient{i}', role='patient'))
+            for i in range(2)
+        ]
+        self.doctors = [
+            Doctor.objects.create(
+                user=User.objects.create_user(username=f'doctor{i}', role='doctor'), license_number=f'DOC00{i}'
+            )
+            for i in range(2)
+        ]
+
+    def create_appointment(self, patient, doctor, days=0):
+        return Appointment.objects.create(
+            patient=patient, doctor=doctor, appointment_date=self.now + timedelta(days=days), reason='Checkup'
+        )
+
+    def links(self):
+        return set(
+            DoctorPatient.objects.values_list('doctor_id', 'patient_id', 'first_visit', 'last_visit', 'visit_count')
+        )
+
+    def assert_matches_backfill(self):
+        """Check the links against a backfill; return them"""
+        incremental = self.links()
+        backfill_links(chunk_size=1)
+        self.assertEqual(incremental, self.links())
+        return incremental
+
+    def test_new_appointments_update_visits(self):
+        patient, doctor = self.patients[0], self.doctors[0]
+        self.create_appointment(patient, doctor, days=2)
+        self.create_appointment(patient, doctor, days=-3)
+        self.create_appointment(patient, doctor, days=1)
+        self.create_appointment(self.patients[1], doctor)
+        links = self.assert_matches_backfill()
+        self.assertIn(
+            (doctor.id, patient.id, self.now - timedelta(days=3), self.now + timedelta(days=2), 3), links
+        )
+        self.assertEqual(len(links), 2)
+
+    def test_moved_appointments_move_links(self):
+        appointment = self.create_appointment(self.patients[0], self.doctors[0])
+        self.create_appointment(self.patients[0], self.doctors[0], days=5)
+
+        appointment.appointment_date = self.now + timedelta(days=9)
+        appointment.save()
+        self.assertEqual(
+            DoctorPatient.objects.get(doctor=self.doctors[0]).first_visit, self.now + timedelta(days=5)
+        )
+
+        appointment.doctor = self.doctors[1]
+        appointment.save(update_fields=['doctor'])
+        self.assertEqual(len(self.assert_matches_backfill()), 2)
+
+        # Loaded from a form or serializer, with other fields changing
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        appointment.status = 'confirmed'
+        appointment.save(update_fields=['status'])
+        self.assertEqual(len(self.assert_matches_backfill()), 2)
+
+    def test_deletes_remove_links(self):
+        first = self.create_appointment(self.patients[0], self.doctors[0])
+        self.create_appointment(self.patients[0], self.doctors[0], days=1)
+        self.create_appointment(self.patients[1], self.doctors[1])
+
+        first.delete()
+        self.assertEqual(DoctorPatient.objects.get(doctor=self.doctors[0]).visit_count, 1)
+        Appointment.objects.filter(doctor=self.doctors[0]).delete()
+        self.assertFalse(DoctorPatient.objects.filter(doctor=self.doctors[0]).exists())
+        self.patients[1].delete()
+        self.assertFalse(DoctorPatient.objects.exists())
+
+    def test_api_booking_shows_patient_to_doctor(self):
+        self.client.force_authenticate(user=self.doctors[0].user)
+        self.assertEqual(self.client.get('/api/patients/').data['results'], [])
+
+        self.client.force_authenticate(user=self.patients[0].user)
+        response = self.client.post('/api/appointments/', {
+            'patient': self.patients[0].id,
+            'doctor': self.doctors[0].id,
+            'appointment_date': (self.now + timedelta(days=1)).isoformat(),
+            'reason': 'Checkup',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        self.client.force_authenticate(user=self.doctors[0].user)
+        ids = [row['id'] for row in self.client.get('/api/patients/').data['results']]
+        self.assertEqual(ids, [self.patients[0].id])
+
+    def test_backfill_command_repairs_bulk_changes(self):
+        Appointment.objects.bulk_create([
+            Appointment(patient=patient, doctor=doctor, appointment_date=self.now + timedelta(hours=hour), reason='Imported')
+            for hour, patient in enumerate(self.patients) for doctor in self.doctors
+        ])
+        self.assertFalse(DoctorPatient.objects.exists())
+        out = StringIO()
+        call_command('backfill_doctor_patients', chunk_size=1, stdout=out)
+        self.assertIn('Wrote 4 doctor-patient links', out.getvalue())
+        self.assertEqual(DoctorPatient.objects.filter(visit_count=1).count(), 4)
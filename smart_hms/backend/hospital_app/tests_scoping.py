@@ -0,0 +1,76 @@
+"""Tests for role scoping of the list endpoints"""
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from .models import Patient, Doctor, Appointment, SymptomChecker
+from .views import PatientViewSet, SymptomCheckerViewSet, UserViewSet
+
+User = get_user_model()
+
+
+class RoleScopingTest(APITestCase):
+    """Test what a doctor sees of patients through their appointments"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.doctor_user = User.objects.create_user(username='doctor1', role='doctor')
+        self.doctor = Doctor.objects.create(user=self.doctor_user, license_number='DOC001')
+        self.other_doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='doctor2', role='doctor'), license_number='DOC002'
+        )
+        self.patients = [
+            Patient.objects.create(user=User.objects.create_user(username=f'patient{i}', role='patient'))
+            for i in range(3)
+        ]
+        seen, other, _ = self.patients
+        # Many appointments with one patient must not list them many times
+        for days in range(5):
+            self.create_appointment(seen, self.doctor, days)
+        self.create_appointment(other, self.other_doctor, 0)
+        for patient in self.patients:
+            SymptomChecker.objects.create(patient=patient, symptoms='fever')
+
+    def create_appointment(self, patient, doctor, days):
+        return Appointment.objects.create(
+            patient=patient, doctor=doctor, appointment_date=timezone.now() + timedelta(days=days), reason='Checkup'
+        )
+
+    def list_ids(self, user, url):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data['results']]
+
+    def test_doctor_sees_each_patient_once(self):
+        self.assertEqual(self.list_ids(self.doctor_user, '/api/patients/'), [self.patients[0].id])
+        self.assertEqual(self.list_ids(self.doctor_user, '/api/users/'), [self.patients[0].user.id])
+
+    def test_doctor_sees_symptom_checks_of_their_patients(self):
+        checks = self.list_ids(self.doctor_user, '/api/symptom-checker/')
+        self.assertEqual(checks, list(SymptomChecker.objects.filter(patient=self.patients[0]).values_list('id', flat=True)))
+
+        self.create_appointment(self.patients[2], self.doctor, 1)
+        self.assertEqual(len(self.list_ids(self.doctor_user, '/api/symptom-checker/')), 2)
+
+    def test_patient_sees_own_rows(self):
+        patient_user = self.patients[0].user
+        self.assertEqual(self.list_ids(patient_user, '/api/users/'), [patient_user.id])
+        self.assertEqual(len(self.list_ids(patient_user, '/api/appointments/')), 5)
+
+    def test_unknown_role_sees_nothing(self):
+        user = User.objects.create_user(username='visitor', role='visitor')
+        for url in ('/api/users/', '/api/patients/', '/api/appointments/', '/api/symptom-checker/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.list_ids(user, url), [])
+
+    def test_doctor_scopes_use_link_table(self):
+        for viewset_class, model in (
+            (PatientViewSet, Patient), (UserViewSet, User), (SymptomCheckerViewSet, SymptomChecker),
+        ):
+            with self.subTest(viewset=viewset_class.__name__):
+                sql = str(viewset_class.scope_queryset(model.objects.all(), self.doctor_user).query).upper()
+                self.assertIn('HOSPITAL_APP_DOCTORPATIENT', sql)
+                self.assertNotIn('HOSPITAL_APP_APPOINTMENT', sql)
+                self.assertNotIn('DISTINCT', sql)
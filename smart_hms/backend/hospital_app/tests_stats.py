@@ -0,0 +1,109 @@
+"""Tests for the incrementally maintained HospitalStats counters"""
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+from .models import Patient, Doctor, Admin, Appointment, HospitalStats
+from .stats import rebuild_stats, read_stats
+
+User = get_user_model()
+
+
+class HospitalStatsTest(APITestCase):
+    """Test that signals keep the counters equal to counting the tables"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.patient_user = User.objects.create_user(username='patient1', role='patient')
+        self.patient = Patient.objects.create(user=self.patient_user)
+        self.doctor_user = User.objects.create_user(username='doctor1', role='doctor')
+        self.doctor = Doctor.objects.create(user=self.doctor_user, license_number='DOC001')
+        self.admin_user = User.objects.create_user(username='admin1', role='admin')
+        Admin.objects.create(user=self.admin_user, employee_id='ADM001')
+
+    def create_appointment(self, days=0, appointment_status='scheduled'):
+        return Appointment.objects.create(
+            patient=self.patient,
+            doctor=self.doctor,
+            appointment_date=timezone.now() + timedelta(days=days),
+            reason='Checkup',
+            status=appointment_status
+        )
+
+    def counters(self):
+        # Counters that dropped to zero are kept by signals but not recreated by a rebuild
+        return set(HospitalStats.objects.exclude(count=0).values_list('metric', 'key', 'count'))
+
+    def assert_matches_rebuild(self):
+        """Check the counters against a rebuild; return the dashboard stats"""
+        incremental = self.counters()
+        rebuild_stats()
+        self.assertEqual(incremental, self.counters())
+        return read_stats()
+
+    def test_counts_new_rows(self):
+        self.create_appointment()
+        self.create_appointment(days=1, appointment_status='completed')
+        stats = self.assert_matches_rebuild()
+        self.assertEqual(stats['total_users'], 3)
+        self.assertEqual(stats['total_doctors'], 1)
+        self.assertEqual(stats['total_patients'], 1)
+        self.assertEqual(stats['total_appointments'], 2)
+        self.assertEqual(stats['today_appointments'], 1)
+        self.assertEqual(stats['pending_appointments'], 1)
+        self.assertEqual(stats['completed_appointments'], 1)
+
+    def test_confirm_and_cancel_move_status_counts(self):
+        appointment = self.create_appointment()
+        self.client.force_authenticate(user=self.patient_user)
+
+        self.client.post(f'/api/appointments/{appointment.id}/confirm/')
+        self.assertEqual(read_stats()['pending_appointments'], 1)
+        self.client.post(f'/api/appointments/{appointment.id}/cancel/')
+        stats = self.assert_matches_rebuild()
+        self.assertEqual(stats['pending_appointments'], 0)
+        self.assertEqual(stats['total_appointments'], 1)
+
+    def test_rescheduling_moves_day_count(self):
+        appointment = self.create_appointment()
+        self.assertEqual(read_stats()['today_appointments'], 1)
+        appointment = Appointment.objects.get(id=appointment.id)
+        appointment.appointment_date += timedelta(days=2)
+        appointment.save()
+        self.assertEqual(self.assert_matches_rebuild()['today_appointments'], 0)
+
+    def test_update_fields_without_counted_fields(self):
+        appointment = self.create_appointment()
+        appointment.status = 'completed'
+        appointment.notes = 'Notes only'
+        appointment.save(update_fields=['notes'])
+        self.assertEqual(read_stats()['completed_appointments'], 0)
+        appointment.save()
+        self.assertEqual(self.assert_matches_rebuild()['completed_appointments'], 1)
+
+    def test_role_change(self):
+        self.patient_user.role = 'doctor'
+        self.patient_user.save()
+        self.assertEqual(HospitalStats.objects.get(metric='users_by_role', key='patient').count, 0)
+        self.assertEqual(HospitalStats.objects.get(metric='users_by_role', key='doctor').count, 2)
+        self.assert_matches_rebuild()
+
+    def test_cascading_delete(self):
+        self.create_appointment()
+        self.create_appointment(days=3)
+        self.patient_user.delete()
+        stats = self.assert_matches_rebuild()
+        self.assertEqual(stats['total_users'], 2)
+        self.assertEqual(stats['total_patients'], 0)
+        self.assertEqual(stats['total_appointments'], 0)
+
+    def test_rebuild_command(self):
+        self.create_appointment()
+        HospitalStats.objects.update(count=0)
+        out = StringIO()
+        call_command('rebuild_stats', stdout=out)
+        self.assertIn('Rebuilt', out.getvalue())
+        self.assertEqual(read_stats()['total_appointments'], 1)
+        self.assertEqual(read_stats()['total_users'], 3)
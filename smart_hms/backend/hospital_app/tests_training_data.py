@@ -0,0 +1,149 @@
+"""Tests for the training data pipeline: condition codes, de-identification, the training store and the export"""
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from .ai_model.symptom_checker import SymptomCheckerAI
+from .ai_model.training_data import condition_code, deidentify
+from .ai_model.training_store import TrainingStore
+from .models import Patient, Doctor, MedicalRecord
+from .training_export import export_training_data
+
+User = get_user_model()
+
+
+class TrainingDataTest(SimpleTestCase):
+    """Test mapping diagnoses to condition codes and de-identifying symptoms"""
+
+    def test_condition_codes(self):
+        for diagnosis, code in [
+            ('Influenza A, advised rest', 'flu'), ('COVID-19', 'covid_19'), ('Acute MI', 'heart_attack'),
+            ('Type 2 Diabetes', 'diabetes'), ('Migraine - chronic', 'migraine'), ('common cold', 'common_cold'),
+            ('Broken leg', None), ('', None),
+        ]:
+            with self.subTest(diagnosis=diagnosis):
+                self.assertEqual(condition_code(diagnosis), code)
+
+    def test_deidentify(self):
+        text = deidentify(
+            'Jane Doe (MRN 00123456, jane@example.com, +1 555-123-4567) since 12/03/2024:\n'
+            'Fever 102.5, took 500mg paracetamol; seen by Dr House',
+            ['Jane', 'Doe', 'jdoe', 'Gregory', 'House', ''],
+        )
+        self.assertEqual(text, '[name] [name] (mrn [id], [email], [phone]) since [date]: '
+                               'fever 102.5, took 500mg paracetamol; seen by dr [name]')
+
+
+class TrainingStoreTest(SimpleTestCase):
+    """Test appending to and reading from the training store"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = TrainingStore(self.root, segment_rows=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_incremental_reads(self):
+        examples, position = self.store.read()
+        self.assertEqual((list(examples), position), ([], 0))
+        self.assertEqual(self.store.append([([('fever chills', 'flu')], 3), ([('rash', 'dermatitis'), ('wheezing', 'asthma')], 5)]), 3)
+        examples, position = self.store.read()
+        self.assertEqual(list(examples), [('fever chills', 'flu'), ('rash', 'dermatitis'), ('wheezing', 'asthma')])
+        self.assertEqual(position, 1)
+
+        self.store.append([([], 7), ([('back pain', 'back_problems')], 8), ([], 9)])
+        examples, position = self.store.read(after=position)
+        self.assertEqual((list(examples), position), ([('back pain', 'back_problems')], 2))
+        manifest = self.store.manifest()
+        self.assertEqual((manifest['rows'], manifest['high_water']), (4, 9))
+
+    def test_interrupted_append_keeps_finished_segments(self):
+        def chunks():
+            yield [('fever', 'flu'), ('cough', 'flu')], 2
+            yield [('rash', 'dermatitis')], 3
+            raise RuntimeError('interrupted')
+
+        with self.assertRaises(RuntimeError):
+            self.store.append(chunks())
+        self.assertEqual(self.store.high_water(), 2)
+        self.assertEqual(sorted(os.listdir(self.root)), ['000001.tsv.gz', 'append.lock', 'manifest.json'])
+
+    def test_chunk_factory_continues_from_the_locked_high_water(self):
+        self.store.append([([('fever', 'flu')], 4)])
+        marks = []
+
+        def chunks(high_water):
+            marks.append(high_water)
+            return [([('rash', 'dermatitis')], high_water + 1)]
+
+        self.assertEqual(self.store.append(chunks), 1)
+        self.assertEqual((marks, self.store.high_water()), ([4], 5))
+
+
+class TrainingExportTest(TestCase):
+    """Test exporting labeled examples from medical records"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.patient = Patient.objects.create(
+            user=User.objects.create_user(username='jdoe', role='patient', first_name='Jane', last_name='Doe')
+        )
+        self.doctor = Doctor.objects.create(
+            user=User.objects.create_user(username='ghouse', role='doctor', first_name='Gregory', last_name='House'),
+            license_number='DOC001',
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def record(self, symptoms, diagnosis):
+        return MedicalRecord.objects.create(patient=self.patient, doctor=self.doctor, symptoms=symptoms,
+                                            diagnosis=diagnosis, treatment_plan='Rest')
+
+    def test_export_appends_new_records_only(self):
+        self.record('Jane has fever and chills', 'Influenza')
+        self.record('Twisted ankle', 'Sprain')
+        last = self.record('Itchy rash, says Dr House', 'Eczema')
+        with override_settings(SYMPTOM_TRAINING_STORE=self.root):
+            out = StringIO()
+            call_command('export_training_data', chunk_size=2, stdout=out)
+            self.assertIn('Exported 2 training examples from 3 medical records', out.getvalue())
+            store = TrainingStore(self.root)
+            examples, position = store.read()
+            self.assertEqual(list(examples), [('[name] has fever and chills', 'flu'),
+                                              ('itchy rash, says dr [name]', 'dermatitis')])
+            self.assertEqual(store.high_water(), [last.labeled_at.isoformat(), last.pk])
+
+            self.assertEqual(export_training_data(store), (0, 0))
+            self.record('Wheezing at night', 'Bronchial asthma')
+            self.assertEqual(export_training_data(store), (1, 1))
+            examples, _ = store.read(after=position)
+            self.assertEqual(list(examples), [('wheezing at night', 'asthma')])
+
+            texts, labels = ['fever'], ['flu']
+            self.assertEqual(SymptomCheckerAI(load_model=False)._read_training_store(texts, labels), 3)
+            self.assertEqual(labels, ['flu', 'flu', 'dermatitis', 'asthma'])
+
+    def test_changed_diagnoses_are_exported_again(self):
+        pending = self.record('Fever and aching', 'Pending tests')
+        flu = self.record('Runny nose', 'Influenza')
+        store = TrainingStore(self.root)
+        self.assertEqual(export_training_data(store), (1, 2))
+
+        flu.treatment_plan = 'Fluids'
+        flu.save()
+        self.assertEqual(export_training_data(store), (0, 0))
+
+        pending = MedicalRecord.objects.get(pk=pending.pk)
+        pending.diagnosis = 'Influenza B'
+        pending.save()
+        flu.diagnosis = 'Common cold'
+        flu.save(update_fields=['diagnosis'])
+        self.assertEqual(export_training_data(store), (2, 2))
+        examples, _ = store.read()
+        self.assertEqual(list(examples), [('runny nose', 'flu'), ('fever and aching', 'flu'),
+                                          ('runny nose', 'common_cold')])
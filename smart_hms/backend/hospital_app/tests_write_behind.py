@@ -0,0 +1,184 @@
+"""Tests for write-behind persistence of symptom checks"""
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, OperationalError
+from django.test import TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from . import write_behind
+from .models import Patient, SymptomChecker
+from .write_behind import SymptomCheckWriter, fcntl
+
+User = get_user_model()
+
+
+def record(symptoms, patient_id=None):
+    return {
+        'patient_id': patient_id, 'symptoms': symptoms, 'predicted_conditions': ['flu'],
+        'confidence_scores': {'flu': 0.9}, 'recommendations': 'Rest',
+    }
+
+
+def spill_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.jsonl'))
+
+
+class SymptomCheckWriterTest(TransactionTestCase):
+    """Test the queue, its spill files and crash recovery"""
+
+    def setUp(self):
+        self.spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spill_dir)
+        # Flushed by the tests, not the thread
+        self.writer = SymptomCheckWriter(self.spill_dir, flush_interval=60, batch_size=1000)
+        self.addCleanup(self.writer.close)
+
+    def test_queued_checks_are_spilled_until_flushed(self):
+        for i in range(3):
+            self.assertTrue(self.writer.submit(record(f'fever {i}')))
+        self.assertFalse(SymptomChecker.objects.exists())
+        [spilled] = spill_files(self.spill_dir)
+        with open(os.path.join(self.spill_dir, spilled)) as f:
+            self.assertEqual([json.loads(line)['symptoms'] for line in f], ['fever 0', 'fever 1', 'fever 2'])
+        self.assertEqual(self.writer.stats()['queue_depth'], 3)
+
+        self.assertEqual(self.writer.flush(), 3)
+        self.assertEqual(SymptomChecker.objects.count(), 3)
+        # Only the (empty) file for new arrivals is left
+        [current] = spill_files(self.spill_dir)
+        self.assertNotEqual(current, spilled)
+        self.assertEqual(os.path.getsize(os.path.join(self.spill_dir, current)), 0)
+        stats = self.writer.stats()
+        self.assertEqual((stats['queue_depth'], stats['flushed']), (0, 3))
+
+    def test_batch_size_wakes_the_flusher(self):
+        writer = SymptomCheckWriter(self.spill_dir, flush_interval=60, batch_size=5)
+        self.addCleanup(writer.close)
+        for i in range(5):
+            writer.submit(record(f'cough {i}'))
+        deadline = time.monotonic() + 5
+        while SymptomChecker.objects.count() < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(SymptomChecker.objects.count(), 5)
+
+    def test_full_queue_refuses(self):
+        writer = SymptomCheckWriter(self.spill_dir, flush_interval=60, batch_size=1000, max_queue=2)
+        self.addCleanup(writer.close)
+        self.assertEqual([writer.submit(record('rash')) for _ in range(3)], [True, True, False])
+        self.assertEqual(writer.stats()['overflows'], 1)
+
+    def test_failed_flush_keeps_the_checks(self):
+        self.writer.submit(record('headache'))
+        with patch.object(SymptomChecker.objects, 'bulk_create', side_effect=Exception('database is down')):
+            with self.assertRaises(Exception):
+                self.writer.flush()
+        self.writer.submit(record('nausea'))
+        self.assertEqual(self.writer.stats()['queue_depth'], 2)
+        self.assertEqual(len(spill_files(self.spill_dir)), 2)
+        self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(sorted(SymptomChecker.objects.values_list('symptoms', flat=True)), ['headache', 'nausea'])
+
+    def test_bad_check_is_rejected_after_max_attempts(self):
+        writer = SymptomCheckWriter(self.spill_dir, flush_interval=60, batch_size=1000, max_attempts=2)
+        self.addCleanup(writer.close)
+        writer.submit(record('fever'))
+        writer.submit(record(None))
+        with self.assertRaises(IntegrityError):
+            writer.flush()
+        writer.submit(record('cough'))
+        self.assertEqual(writer.flush(), 3)
+        self.assertEqual(sorted(SymptomChecker.objects.values_list('symptoms', flat=True)), ['cough', 'fever'])
+        [rejected] = [name for name in os.listdir(self.spill_dir) if name.startswith(write_behind.REJECTED_PREFIX)]
+        with open(os.path.join(self.spill_dir, rejected)) as f:
+            self.assertEqual([json.loads(line) for line in f], [record(None)])
+        stats = writer.stats()
+        self.assertEqual((stats['queue_depth'], stats['flushed'], stats['rejected']), (0, 2, 1))
+        # Rejected checks are not replayed
+        self.assertEqual(writer.recover(), 0)
+
+    def test_unavailable_database_rejects_nothing(self):
+        writer = SymptomCheckWriter(self.spill_dir, flush_interval=60, batch_size=1000, max_attempts=1)
+        self.addCleanup(writer.close)
+        writer.submit(record('headache'))
+        writer.submit(record('nausea'))
+        with patch.object(SymptomChecker.objects, 'bulk_create', side_effect=OperationalError('database is down')):
+            with self.assertRaises(OperationalError):
+                writer.flush()
+        self.assertEqual(writer.stats()['queue_depth'], 2)
+        self.assertEqual(writer.stats()['rejected'], 0)
+        self.assertEqual(writer.flush(), 2)
+
+    def test_checks_of_deleted_patients_are_dropped(self):
+        patient = Patient.objects.create(user=User.objects.create_user(username='patient1', role='patient'))
+        self.writer.submit(record('fever', patient.id))
+        self.writer.submit(record('cough'))
+        patient.delete()
+        self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(list(SymptomChecker.objects.values_list('symptoms', flat=True)), ['cough'])
+
+    def test_close_saves_the_queue(self):
+        self.writer.submit(record('fatigue'))
+        self.writer.close()
+        self.assertEqual(SymptomChecker.objects.count(), 1)
+        self.assertEqual(spill_files(self.spill_dir), [])
+        self.assertFalse(self.writer.submit(record('fatigue')))
+
+    def test_recovers_files_of_dead_processes_only(self):
+        if fcntl is None:
+            self.skipTest('needs fcntl')
+        # Left by a crashed process, with a torn last line
+        with open(os.path.join(self.spill_dir, 'symptom-checks-99999-1.jsonl'), 'w') as f:
+            f.write(json.dumps(record('chills')) + '\n' + json.dumps(record('sweats')) + '\n{"patient_id": nu')
+        # Still in use: this writer holds the lock of its own file
+        self.writer.submit(record('dizziness'))
+
+        recovery = SymptomCheckWriter(self.spill_dir)
+        self.assertEqual(recovery.recover(), 2)
+        self.assertEqual(sorted(SymptomChecker.objects.values_list('symptoms', flat=True)), ['chills', 'sweats'])
+        self.assertEqual(len(spill_files(self.spill_dir)), 1)
+        self.assertEqual(recovery.stats()['recovered'], 2)
+
+
+class WriteBehindAPITest(TransactionTestCase):
+    """Test symptom checks queued by the API when write-behind is enabled"""
+
+    def setUp(self):
+        self.spill_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spill_dir)
+        settings_patch = override_settings(SYMPTOM_CHECK_WRITE_BEHIND={
+            'ENABLED': True, 'FLUSH_INTERVAL': 60, 'BATCH_SIZE': 1000, 'SPILL_DIR': self.spill_dir,
+        })
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+        write_behind.reset_writer()
+        self.addCleanup(write_behind.reset_writer)
+        self.client = APIClient()
+        self.patient_user = User.objects.create_user(username='patient1', role='patient')
+        Patient.objects.create(user=self.patient_user)
+
+    def test_response_does_not_wait_for_the_insert(self):
+        self.client.force_authenticate(user=self.patient_user)
+        response = self.client.post('/api/ai/symptom-checker/', {'symptoms': 'fever headache fatigue'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post('/api/ai/symptom-checker/batch/', {'symptoms': ['cough', 'rash']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(SymptomChecker.objects.exists())
+
+        self.assertEqual(write_behind.get_writer().flush(), 3)
+        self.assertEqual(SymptomChecker.objects.filter(patient__user=self.patient_user).count(), 3)
+
+    def test_stats_are_for_admins(self):
+        url = '/api/ai/symptom-checker/write-behind-stats/'
+        self.client.force_authenticate(user=self.patient_user)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=User.objects.create_user(username='admin1', role='admin'))
+        stats = self.client.get(url).data
+        self.assertEqual((stats['enabled'], stats['queue_depth']), (True, 0))
+
+        with override_settings(SYMPTOM_CHECK_WRITE_BEHIND={'ENABLED': False}):
+            self.assertEqual(self.client.get(url).data, {'enabled': False})
@@ -0,0 +1,107 @@
+"""Export of labeled symptom model training examples from medical records.
+
+Signals on MedicalRecord set ``labeled_at`` whenever a record's symptoms or
+diagnosis change, so a diagnosis entered or corrected after the record was
+created is exported again; edits to other fields are not. Records past the
+training store's high-water mark, a ``[labeled_at, id]`` pair, are streamed
+in that order with ``.iterator()``. A record whose diagnosis names a condition
+the model knows becomes a (symptoms, condition) example, its symptoms
+de-identified with the names of its patient and doctor; no ids or names are
+exported. Examples are appended to the store a chunk at a time, so memory
+stays flat however many records there are.
+
+The store only ever grows, like the counts of the incremental model
+(ai_model/incremental.py) that reads it, so a corrected diagnosis adds the
+corrected example without taking back the earlier one. One stale example
+among the many of its condition barely moves the model, and deleting the
+store and exporting again rebuilds it from the current diagnoses. Changes made without signals
+(``QuerySet.update``, raw SQL) are not exported unless they set
+``labeled_at`` themselves.
+"""
+from itertools import islice
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .ai_model.training_data import condition_code, deidentify
+from .ai_model.training_store import TrainingStore
+from .models import MedicalRecord
+
+EXPORT_CHUNK_SIZE = 2000
+
+NAME_FIELDS = [
+    f'{person}__user__{field}' for person in ('patient', 'doctor') for field in ('first_name', 'last_name', 'username')
+]
+
+
+def training_store():
+    """The training store at settings.SYMPTOM_TRAINING_STORE"""
+    return TrainingStore(settings.SYMPTOM_TRAINING_STORE)
+
+
+def _label_state(instance):
+    # From __dict__ so that deferred fields are not loaded
+    fields = instance.__dict__
+    if 'symptoms' not in fields or 'diagnosis' not in fields:
+        return None
+    return fields['symptoms'], fields['diagnosis']
+
+
+@receiver(post_init, sender=MedicalRecord)
+def remember_label_state(sender, instance, **kwargs):
+    instance._label_state = _label_state(instance)
+
+
+@receiver(post_save, sender=MedicalRecord)
+def mark_relabeled_record(sender, instance, created, **kwargs):
+    state = _label_state(instance)
+    old_state = getattr(instance, '_label_state', None)
+    instance._label_state = state
+    if created or old_state is None or state is None or state == old_state:
+        return
+    instance.labeled_at = timezone.now()
+    MedicalRecord.objects.filter(pk=instance.pk).update(labeled_at=instance.labeled_at)
+
+
+def records_after(high_water):
+    """MedicalRecords past the store's high-water mark, in export order"""
+    records = MedicalRecord.objects.order_by('labeled_at', 'pk')
+    if not high_water:
+        return records
+    labeled_at, pk = parse_datetime(high_water[0]), high_water[1]
+    return records.filter(Q(labeled_at__gt=labeled_at) | Q(labeled_at=labeled_at, pk__gt=pk))
+
+
+def export_training_data(store=None, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """Append the examples of new and relabeled records to ``store``; returns (examples, records examined).
+
+    ``progress``, if given, is called after every chunk with the numbers of
+    examples and records so far and the last record id.
+    """
+    store = store or training_store()
+    examples = records = 0
+
+    def chunks(high_water):
+        # Called by the store with the append lock held
+        nonlocal examples, records
+        rows = records_after(high_water).values_list(
+            'pk', 'labeled_at', 'symptoms', 'diagnosis', *NAME_FIELDS
+        ).iterator(chunk_size=chunk_size)
+        for chunk in iter(lambda: list(islice(rows, chunk_size)), []):
+            labeled = []
+            for _, _, symptoms, diagnosis, *names in chunk:
+                condition = condition_code(diagnosis)
+                text = deidentify(symptoms, names) if condition else ''
+                if text:
+                    labeled.append((text, condition))
+            last_id, last_labeled_at = chunk[-1][:2]
+            yield labeled, [last_labeled_at.isoformat(), last_id]
+            examples += len(labeled)
+            records += len(chunk)
+            if progress:
+                progress(examples, records, last_id)
+
+    store.append(chunks)
+    return examples, records
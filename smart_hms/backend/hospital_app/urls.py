@@ -7,6 +7,8 @@ router = DefaultRouter()
 router.register(r'users', views.UserViewSet)
 router.register(r'patients', views.PatientViewSet)
 router.register(r'doctors', views.DoctorViewSet)
+router.register(r'doctor-schedules', views.DoctorScheduleViewSet)
+router.register(r'doctor-time-off', views.DoctorTimeOffViewSet)
 router.register(r'admins', views.AdminViewSet)
 router.register(r'appointments', views.AppointmentViewSet)
 router.register(r'medical-records', views.MedicalRecordViewSet)
@@ -25,6 +27,9 @@ urlpatterns = [
     
     # AI endpoints
     path('ai/symptom-checker/', views.AISymptomCheckerView.as_view(), name='ai_symptom_checker'),
+    path('ai/symptom-checker/batch/', views.AISymptomCheckerBatchView.as_view(), name='ai_symptom_checker_batch'),
+    path('ai/symptom-checker/cache-stats/', views.AISymptomCheckerCacheStatsView.as_view(), name='ai_symptom_checker_cache_stats'),
+    path('ai/symptom-checker/write-behind-stats/', views.AISymptomCheckerWriteBehindStatsView.as_view(), name='ai_symptom_checker_write_behind_stats'),
     
     # Include router URLs
     path('', include(router.urls)),
@@ -1,3 +1,4 @@
+from datetime import timedelta
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -5,100 +6,201 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from django.db.models import Q
-from .models import User, Patient, Doctor, Admin, Appointment, MedicalRecord, Prescription, SymptomChecker
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .models import (
+    User, Patient, Doctor, Admin, Appointment, MedicalRecord, Prescription, SymptomChecker,
+    DoctorSchedule, DoctorTimeOff,
+)
 from .serializers import (
     UserSerializer, PatientSerializer, DoctorSerializer, AdminSerializer,
     AppointmentSerializer, MedicalRecordSerializer, PrescriptionSerializer,
-    SymptomCheckerSerializer, UserRegistrationSerializer, LoginSerializer
+    SymptomCheckerSerializer, UserRegistrationSerializer, LoginSerializer,
+    DoctorScheduleSerializer, DoctorTimeOffSerializer, SlotSerializer,
+    BulkAppointmentSerializer, AppointmentSeriesSerializer,
 )
-from .ai_model.symptom_checker import SymptomCheckerAI
+from .ai_model.registry import get_symptom_checker
+from .dashboard import get_admin_stats
+from .pagination import KeysetPagination
+from .write_behind import save_symptom_checks, write_behind_stats
+from . import availability, booking, scoping
+from .scoping import RoleScopedMixin
+
 
+class RelatedQuerysetMixin:
+    """Apply a viewset's ``select_related_fields`` to every queryset it serves.
+    
+    Relations are joined in ``filter_queryset``, which DRF runs for list and
+    detail requests after ``get_queryset``, so every role branch gets them.
+    """
+    select_related_fields = ()
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        return queryset
 
-class UserViewSet(viewsets.ModelViewSet):
+
+class UserViewSet(RoleScopedMixin, viewsets.ModelViewSet):
     """User management viewset"""
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
-    
-    def get_queryset(self):
-        user = self.request.user
-        if user.role == 'admin':
-            return User.objects.all()
-        elif user.role == 'doctor':
-            # Doctors can see patients they have appointments with
-            patient_ids = Appointment.objects.filter(doctor__user=user).values_list('patient__user_id', flat=True)
-            return User.objects.filter(id__in=patient_ids)
-        else:
-            # Patients can only see their own profile
-            return User.objects.filter(id=user.id)
+    role_scopes = {
+        'admin': scoping.everything,
+        # Doctors can see patients they have appointments with
+        'doctor': scoping.seen_by_doctor(patient='patient_profile'),
+        # Patients can only see their own profile
+        'patient': scoping.own_user,
+    }
 
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(RoleScopedMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """Patient management viewset"""
     queryset = Patient.objects.all()
     serializer_class = PatientSerializer
+    select_related_fields = ('user',)
     permission_classes = [permissions.IsAuthenticated]
-    
-    def get_queryset(self):
-        user = self.request.user
-        if user.role == 'admin':
-            return Patient.objects.all()
-        elif user.role == 'doctor':
-            # Doctors can see patients they have appointments with
-            return Patient.objects.filter(appointments__doctor__user=user).distinct()
-        else:
-            # Patients can only see their own profile
-            return Patient.objects.filter(user=user)
+    role_scopes = {
+        'admin': scoping.everything,
+        # Doctors can see patients they have appointments with
+        'doctor': scoping.seen_by_doctor(),
+        # Patients can only see their own profile
+        'patient': scoping.own('user'),
+    }
 
 
-class DoctorViewSet(viewsets.ModelViewSet):
+class DoctorViewSet(RoleScopedMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """Doctor management viewset"""
     queryset = Doctor.objects.all()
     serializer_class = DoctorSerializer
+    select_related_fields = ('user',)
     permission_classes = [permissions.IsAuthenticated]
+    role_scopes = {
+        'admin': scoping.everything,
+        # Doctors can only see their own profile
+        'doctor': scoping.own('user'),
+        # Patients can see all available doctors
+        'patient': scoping.matching(is_available=True),
+    }
+    
+    @action(detail=True, methods=['get'])
+    def slots(self, request, pk=None):
+        """Free appointment slots of a doctor between ?from= and ?to="""
+        doctor = self.get_object()
+        try:
+            start, end = availability.parse_window(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        slots = availability.doctor_free_slots(doctor, start, end)
+        return Response({
+            'doctor': doctor.id,
+            'from': start,
+            'to': end,
+            'slots': SlotSerializer(slots, many=True).data,
+        })
+    
+    @action(detail=False, methods=['get'], url_path='earliest-slots')
+    def earliest_slots(self, request):
+        """Earliest free slot of each specialization (or ?specialization=) between ?from= and ?to="""
+        specialization = request.query_params.get('specialization')
+        if specialization and specialization not in dict(Doctor.SPECIALIZATION_CHOICES):
+            return Response({'error': f'Unknown specialization: {specialization}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start, end = availability.parse_window(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        found = availability.earliest_slots(start, end, specialization=specialization)
+        results = [
+            {
+                'specialization': name,
+                'doctor': doctor.id,
+                'doctor_name': doctor.user.get_full_name(),
+                **SlotSerializer(slot).data,
+            }
+            for name, (doctor, slot) in sorted(found.items())
+        ]
+        return Response({'from': start, 'to': end, 'results': results})
+
+
+class DoctorOwnedMixin:
+    """Doctors create and move rows for themselves only; admins name the doctor; others may not write"""
+    writer_roles = ('doctor', 'admin')
+    
+    def check_permissions(self, request):
+        super().check_permissions(request)
+        # Before the object lookup, so that other roles get 403 on updates too
+        if request.method not in permissions.SAFE_METHODS and request.user.role not in self.writer_roles:
+            self.permission_denied(request, message='Only doctors and admins can change doctor schedules')
+    
+    def perform_create(self, serializer):
+        self.save_for_doctor(serializer)
     
-    def get_queryset(self):
+    def perform_update(self, serializer):
+        self.save_for_doctor(serializer)
+    
+    def save_for_doctor(self, serializer):
         user = self.request.user
-        if user.role == 'admin':
-            return Doctor.objects.all()
-        elif user.role == 'doctor':
-            # Doctors can only see their own profile
-            return Doctor.objects.filter(user=user)
+        if user.role == 'doctor':
+            serializer.save(doctor=user.doctor_profile)
+        elif serializer.instance is None and 'doctor' not in serializer.validated_data:
+            raise ValidationError({'doctor': ['This field is required.']})
         else:
-            # Patients can see all available doctors
-            return Doctor.objects.filter(is_available=True)
+            serializer.save()
 
 
-class AdminViewSet(viewsets.ModelViewSet):
+class DoctorScheduleViewSet(RoleScopedMixin, DoctorOwnedMixin, viewsets.ModelViewSet):
+    """Doctor working hours viewset"""
+    queryset = DoctorSchedule.objects.all()
+    serializer_class = DoctorScheduleSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    role_scopes = {
+        'admin': scoping.everything,
+        # Patients look for free slots instead
+        'doctor': scoping.own('doctor__user'),
+    }
+
+
+class DoctorTimeOffViewSet(RoleScopedMixin, DoctorOwnedMixin, viewsets.ModelViewSet):
+    """Doctor time off viewset"""
+    queryset = DoctorTimeOff.objects.all()
+    serializer_class = DoctorTimeOffSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    role_scopes = {
+        'admin': scoping.everything,
+        'doctor': scoping.own('doctor__user'),
+    }
+
+
+class AdminViewSet(RoleScopedMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """Admin management viewset"""
     queryset = Admin.objects.all()
     serializer_class = AdminSerializer
+    select_related_fields = ('user',)
     permission_classes = [permissions.IsAuthenticated]
-    
-    def get_queryset(self):
-        user = self.request.user
-        if user.role == 'admin':
-            return Admin.objects.all()
-        else:
-            return Admin.objects.none()
+    role_scopes = {
+        'admin': scoping.everything,
+    }
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(RoleScopedMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """Appointment management viewset"""
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
+    select_related_fields = ('patient__user', 'doctor__user')
     permission_classes = [permissions.IsAuthenticated]
-    
-    def get_queryset(self):
-        user = self.request.user
-        if user.role == 'admin':
-            return Appointment.objects.all()
-        elif user.role == 'doctor':
-            return Appointment.objects.filter(doctor__user=user)
-        else:
-            # Patients can only see their own appointments
-            return Appointment.objects.filter(patient__user=user)
+    pagination_class = KeysetPagination
+    role_scopes = {
+        'admin': scoping.everything,
+        'doctor': scoping.own('doctor__user'),
+        # Patients can only see their own appointments
+        'patient': scoping.own('patient__user'),
+    }
     
     def create(self, request, *args, **kwargs):
         """Create a new appointment"""
@@ -140,23 +242,70 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             # Validate the data
             serializer = self.get_serializer(data=appointment_data)
             if serializer.is_valid():
-                appointment = serializer.save()
+                appointment = booking.save_appointment(serializer)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
                 
+        except booking.SlotTaken as e:
+            return Response(e.detail, status=e.status_code)
         except Exception as e:
             return Response(
                 {'error': str(e)}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create many appointments, or a recurring series, at once.
+        
+        Takes a list of appointments (``{"appointments": [...]}`` or the bare
+        list) or a series rule (``doctor``, ``reason``, ``start``, ``frequency``,
+        ``interval`` and ``count`` or ``until``). Patients book for themselves
+        and doctors for themselves; admins name both. The valid appointments
+        are created together and the others reported by index: 201 if all
+        were created, 207 if some, 400 if none.
+        """
+        data = {'appointments': request.data} if isinstance(request.data, list) else request.data
+        serializer_class = BulkAppointmentSerializer if 'appointments' in data else AppointmentSeriesSerializer
+        serializer = serializer_class(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        profiles = {}
+        if request.user.role in ('patient', 'doctor'):
+            profile = getattr(request.user, f'{request.user.role}_profile', None)
+            if profile is None:
+                return Response(
+                    {'error': f'User does not have a {request.user.role} profile'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            profiles[request.user.role] = profile
+        
+        created, errors = booking.create_appointments(serializer.to_items(), **profiles)
+        if not created:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({
+            'created': self.get_serializer(created, many=True).data,
+            'errors': [{'index': index, 'errors': item_errors} for index, item_errors in errors.items()],
+        }, status=response_status)
+    
+    def perform_update(self, serializer):
+        # Moving an appointment must not double-book the doctor either
+        booking.save_appointment(serializer)
+    
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
         """Confirm an appointment"""
         appointment = self.get_object()
-        appointment.status = 'confirmed'
-        appointment.save()
+        # Reactivating a cancelled appointment books its slot again (409 if taken since)
+        serializer = self.get_serializer(appointment, data={'status': 'confirmed'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        booking.save_appointment(serializer)
         return Response({'status': 'Appointment confirmed'})
     
     @action(detail=True, methods=['post'])
@@ -168,57 +317,74 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         return Response({'status': 'Appointment cancelled'})
 
 
-class MedicalRecordViewSet(viewsets.ModelViewSet):
+class MedicalRecordViewSet(RoleScopedMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """Medical record management viewset"""
     queryset = MedicalRecord.objects.all()
     serializer_class = MedicalRecordSerializer
+    select_related_fields = ('patient__user', 'doctor__user')
     permission_classes = [permissions.IsAuthenticated]
-    
-    def get_queryset(self):
-        user = self.request.user
-        if user.role == 'admin':
-            return MedicalRecord.objects.all()
-        elif user.role == 'doctor':
-            return MedicalRecord.objects.filter(doctor__user=user)
-        else:
-            # Patients can only see their own medical records
-            return MedicalRecord.objects.filter(patient__user=user)
+    pagination_class = KeysetPagination
+    role_scopes = {
+        'admin': scoping.everything,
+        'doctor': scoping.own('doctor__user'),
+        # Patients can only see their own medical records
+        'patient': scoping.own('patient__user'),
+    }
 
 
-class PrescriptionViewSet(viewsets.ModelViewSet):
+class PrescriptionViewSet(RoleScopedMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
     """Prescription management viewset"""
     queryset = Prescription.objects.all()
     serializer_class = PrescriptionSerializer
+    select_related_fields = ('patient__user', 'doctor__user')
     permission_classes = [permissions.IsAuthenticated]
-    
-    def get_queryset(self):
-        user = self.request.user
-        if user.role == 'admin':
-            return Prescription.objects.all()
-        elif user.role == 'doctor':
-            return Prescription.objects.filter(doctor__user=user)
-        else:
-            # Patients can only see their own prescriptions
-            return Prescription.objects.filter(patient__user=user)
+    pagination_class = KeysetPagination
+    role_scopes = {
+        'admin': scoping.everything,
+        'doctor': scoping.own('doctor__user'),
+        # Patients can only see their own prescriptions
+        'patient': scoping.own('patient__user'),
+    }
 
 
-class SymptomCheckerViewSet(viewsets.ModelViewSet):
+class SymptomCheckerViewSet(RoleScopedMixin, viewsets.ModelViewSet):
     """Symptom checker viewset"""
     queryset = SymptomChecker.objects.all()
     serializer_class = SymptomCheckerSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    role_scopes = {
+        'admin': scoping.everything,
+        # Symptom checks of patients who have appointments with this doctor
+        'doctor': scoping.seen_by_doctor(patient='patient'),
+        # Patients can only see their own symptom checks
+        'patient': scoping.own('patient__user'),
+    }
+    max_frequency_days = 366
     
-    def get_queryset(self):
-        user = self.request.user
-        if user.role == 'admin':
-            return SymptomChecker.objects.all()
-        elif user.role == 'doctor':
-            # Get patients who have appointments with this doctor
-            patient_ids = Appointment.objects.filter(doctor__user=user).values_list('patient__user_id', flat=True)
-            return SymptomChecker.objects.filter(patient__user_id__in=patient_ids)
-        else:
-            # Patients can only see their own symptom checks
-            return SymptomChecker.objects.filter(patient__user=user)
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        top_condition = self.request.query_params.get('top_condition')
+        if top_condition:
+            queryset = queryset.filter(top_condition=top_condition)
+        return queryset
+    
+    @action(detail=False, methods=['get'], url_path='condition-frequency')
+    def condition_frequency(self, request):
+        """Symptom checks per day and top predicted condition over the last ``days`` days"""
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            return Response({'error': "'days' must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= self.max_frequency_days:
+            return Response(
+                {'error': f"'days' must be between 1 and {self.max_frequency_days}"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        since = timezone.now() - timedelta(days=days)
+        rows = self.get_queryset().filter(created_at__gte=since).exclude(top_condition='').order_by().values(
+            day=TruncDate('created_at'), condition=F('top_condition')
+        ).annotate(count=Count('id')).order_by('day', '-count', 'condition')
+        return Response({'results': list(rows)})
     
     @action(detail=False, methods=['post'])
     def analyze(self, request):
@@ -228,8 +394,8 @@ class SymptomCheckerViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Symptoms are required'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Initialize AI model
-            ai_model = SymptomCheckerAI()
+            # Shared, lazily loaded AI model
+            ai_model = get_symptom_checker()
             
             # Get predictions
             predictions = ai_model.predict(symptoms)
@@ -316,9 +482,9 @@ class DashboardView(APIView):
         
         if user.role == 'patient':
             # Patient dashboard data
-            appointments = Appointment.objects.filter(patient__user=user).order_by('-appointment_date')[:5]
-            prescriptions = Prescription.objects.filter(patient__user=user, is_active=True).order_by('-created_at')[:5]
-            medical_records = MedicalRecord.objects.filter(patient__user=user).order_by('-created_at')[:5]
+            appointments = AppointmentViewSet.scope_queryset(Appointment.objects.all(), user).select_related(*AppointmentViewSet.select_related_fields).order_by('-appointment_date')[:5]
+            prescriptions = PrescriptionViewSet.scope_queryset(Prescription.objects.filter(is_active=True), user).select_related(*PrescriptionViewSet.select_related_fields).order_by('-created_at')[:5]
+            medical_records = MedicalRecordViewSet.scope_queryset(MedicalRecord.objects.all(), user).select_related(*MedicalRecordViewSet.select_related_fields).order_by('-created_at')[:5]
             
             data.update({
                 'appointments': AppointmentSerializer(appointments, many=True).data,
@@ -328,8 +494,8 @@ class DashboardView(APIView):
             
         elif user.role == 'doctor':
             # Doctor dashboard data
-            appointments = Appointment.objects.filter(doctor__user=user).order_by('-appointment_date')[:5]
-            patients = Patient.objects.filter(appointments__doctor__user=user).distinct()[:5]
+            appointments = AppointmentViewSet.scope_queryset(Appointment.objects.all(), user).select_related(*AppointmentViewSet.select_related_fields).order_by('-appointment_date')[:5]
+            patients = PatientViewSet.scope_queryset(Patient.objects.all(), user).select_related(*PatientViewSet.select_related_fields)[:5]
             
             data.update({
                 'appointments': AppointmentSerializer(appointments, many=True).data,
@@ -337,50 +503,39 @@ class DashboardView(APIView):
             })
             
         elif user.role == 'admin':
-            # Admin dashboard data
-            from django.utils import timezone
-            from datetime import datetime, timedelta
-            
-            total_users = User.objects.count()
-            total_appointments = Appointment.objects.count()
-            total_doctors = Doctor.objects.count()
-            total_patients = Patient.objects.count()
-            
-            # Calculate today's appointments
-            today = timezone.now().date()
-            today_appointments = Appointment.objects.filter(
-                appointment_date__date=today
-            ).count()
-            
-            # Calculate pending appointments (scheduled + confirmed)
-            pending_appointments = Appointment.objects.filter(
-                status__in=['scheduled', 'confirmed']
-            ).count()
-            
-            # Calculate completed appointments
-            completed_appointments = Appointment.objects.filter(
-                status='completed'
-            ).count()
-            
-            # Get recent appointments for display
-            recent_appointments = Appointment.objects.select_related(
-                'patient__user', 'doctor__user'
-            ).order_by('-appointment_date')[:5]
-            
-            data.update({
-                'total_users': total_users,
-                'total_appointments': total_appointments,
-                'total_doctors': total_doctors,
-                'total_patients': total_patients,
-                'today_appointments': today_appointments,
-                'pending_appointments': pending_appointments,
-                'completed_appointments': completed_appointments,
-                'recent_appointments': AppointmentSerializer(recent_appointments, many=True).data,
-            })
+            # Admin dashboard data, from a briefly cached snapshot
+            data.update(get_admin_stats())
         
         return Response(data)
 
 
+def format_symptom_prediction(predictions):
+    """Format a SymptomCheckerAI prediction for the frontend"""
+    conditions = predictions.get('conditions', [])
+    confidence_scores = predictions.get('confidence', {})
+    
+    # Get the top prediction
+    predicted_disease = conditions[0] if conditions else 'general_consultation'
+    confidence = confidence_scores.get(predicted_disease, 0.5)
+    
+    # Format recommendations
+    recommendations_text = predictions.get('recommendations', '')
+    recommendations = recommendations_text.split('. ') if recommendations_text else []
+    
+    return {
+        'predicted_disease': predicted_disease.replace('_', ' ').title(),
+        'confidence': confidence,
+        'recommendations': recommendations,
+        'all_conditions': [
+            {
+                'condition': condition.replace('_', ' ').title(),
+                'confidence': confidence_scores.get(condition, 0)
+            }
+            for condition in conditions
+        ]
+    }
+
+
 class AISymptomCheckerView(APIView):
     """AI Symptom Checker API view"""
     permission_classes = [permissions.IsAuthenticated]
@@ -392,48 +547,92 @@ class AISymptomCheckerView(APIView):
             return Response({'error': 'Symptoms are required'}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Initialize AI model
-            ai_model = SymptomCheckerAI()
+            # Shared, lazily loaded AI model
+            ai_model = get_symptom_checker()
             
             # Get predictions
             predictions = ai_model.predict(symptoms)
             
             # Create symptom check record if user has patient profile
+            # (queued for the background writer in write-behind mode)
             if hasattr(request.user, 'patient_profile'):
-                symptom_check = SymptomChecker.objects.create(
-                    patient=request.user.patient_profile,
-                    symptoms=symptoms,
-                    predicted_conditions=predictions.get('conditions', []),
-                    confidence_scores=predictions.get('confidence', {}),
-                    recommendations=predictions.get('recommendations', '')
-                )
+                save_symptom_checks([{
+                    'patient_id': request.user.patient_profile.id,
+                    'symptoms': symptoms,
+                    'predicted_conditions': predictions.get('conditions', []),
+                    'confidence_scores': predictions.get('confidence', {}),
+                    'recommendations': predictions.get('recommendations', '')
+                }])
             
             # Format response for frontend
-            conditions = predictions.get('conditions', [])
-            confidence_scores = predictions.get('confidence', {})
+            response_data = format_symptom_prediction(predictions)
             
-            # Get the top prediction
-            predicted_disease = conditions[0] if conditions else 'general_consultation'
-            confidence = confidence_scores.get(predicted_disease, 0.5)
+            return Response(response_data, status=status.HTTP_200_OK)
             
-            # Format recommendations
-            recommendations_text = predictions.get('recommendations', '')
-            recommendations = recommendations_text.split('. ') if recommendations_text else []
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AISymptomCheckerBatchView(APIView):
+    """Batch AI Symptom Checker API view for kiosks and partner integrations"""
+    permission_classes = [permissions.IsAuthenticated]
+    max_batch_size = 500
+    
+    def post(self, request):
+        """Analyze a list of symptom descriptions in one request"""
+        symptoms_list = request.data.get('symptoms')
+        if not isinstance(symptoms_list, list) or not symptoms_list:
+            return Response({'error': 'Symptoms must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(symptoms_list) > self.max_batch_size:
+            return Response(
+                {'error': f'At most {self.max_batch_size} symptom descriptions per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not all(isinstance(symptoms, str) and symptoms.strip() for symptoms in symptoms_list):
+            return Response({'error': 'Every item must be a non-empty string'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            # One vectorize + predict_proba call for the whole batch
+            predictions_list = get_symptom_checker().predict_batch(symptoms_list)
             
-            response_data = {
-                'predicted_disease': predicted_disease.replace('_', ' ').title(),
-                'confidence': confidence,
-                'recommendations': recommendations,
-                'all_conditions': [
+            # Persist every check with a single INSERT if user has patient profile
+            # (queued for the background writer in write-behind mode)
+            if hasattr(request.user, 'patient_profile'):
+                save_symptom_checks([
                     {
-                        'condition': condition.replace('_', ' ').title(),
-                        'confidence': confidence_scores.get(condition, 0)
+                        'patient_id': request.user.patient_profile.id,
+                        'symptoms': symptoms,
+                        'predicted_conditions': predictions.get('conditions', []),
+                        'confidence_scores': predictions.get('confidence', {}),
+                        'recommendations': predictions.get('recommendations', '')
                     }
-                    for condition in conditions
-                ]
-            }
+                    for symptoms, predictions in zip(symptoms_list, predictions_list)
+                ])
             
-            return Response(response_data, status=status.HTTP_200_OK)
+            return Response(
+                {'results': [format_symptom_prediction(predictions) for predictions in predictions_list]},
+                status=status.HTTP_200_OK
+            )
             
         except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AISymptomCheckerCacheStatsView(APIView):
+    """Prediction cache counters of the AI symptom checker (admin only)"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        if request.user.role != 'admin':
+            return Response({'error': 'Only admins can view cache statistics'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(get_symptom_checker().cache_stats(), status=status.HTTP_200_OK)
+
+
+class AISymptomCheckerWriteBehindStatsView(APIView):
+    """Queue depth and flush lag of this worker's symptom check writer (admin only)"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        if request.user.role != 'admin':
+            return Response({'error': 'Only admins can view write-behind statistics'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(write_behind_stats(), status=status.HTTP_200_OK)
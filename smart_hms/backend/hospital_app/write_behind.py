@@ -0,0 +1,347 @@
+"""Write-behind persistence of AI symptom checks (settings.SYMPTOM_CHECK_WRITE_BEHIND).
+
+Off by default, when symptom checks are saved before the response. When
+enabled, the symptom checker views hand their records to a bounded in-process
+queue and respond as soon as inference is done. A background thread saves the
+queue with one ``bulk_create`` every ``FLUSH_INTERVAL`` seconds, or as soon as
+``BATCH_SIZE`` records are waiting. When the queue is full, requests save their
+records themselves.
+
+Every queued record is first appended to a spill file in ``SPILL_DIR``, which
+the process holds an exclusive lock on. The flusher starts a new file for the
+records arriving while it saves, and deletes the old one once its records are
+committed. Files of processes that died are replayed when a writer starts, so
+a crash loses nothing (a record saved just before a crash may be saved twice).
+``FSYNC`` also makes the spill files survive a power failure. Spill file
+locking needs ``fcntl``; without it (Windows) nothing is replayed.
+
+Batches are saved oldest first. A batch that fails ``MAX_ATTEMPTS`` times in a
+row is saved one record at a time instead, and the records that still fail
+are appended to a rejected file in ``SPILL_DIR`` (never replayed) and logged,
+so one bad record cannot hold up the queue behind it. Connection errors stop
+that pass and keep the rest queued, as they are the database's fault, not the
+records'.
+
+``created_at`` of a write-behind record is the time it was saved.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from glob import glob
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, close_old_connections
+from django.utils import timezone
+from .models import Patient, SymptomChecker
+from .predictions import create_symptom_checks
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SPILL_PREFIX = 'symptom-checks-'
+REJECTED_PREFIX = 'rejected-symptom-checks-'
+
+_writer_lock = threading.Lock()
+_writer = None
+
+
+class SymptomCheckWriter:
+    """Queue of symptom checks saved in batches by a background thread, spilled to disk until saved"""
+
+    def __init__(self, spill_dir, flush_interval=0.2, batch_size=200, max_queue=10000, fsync=False, max_attempts=3):
+        self.spill_dir = spill_dir
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.fsync = fsync
+        self.max_attempts = max_attempts
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._closed = False
+        self._segment = None  # (file, path) of the spill file of the queued records
+        self._sequence = 0
+        self._records = []  # (queued at, record), in self._segment
+        self._pending = deque()  # (spill file, records) being or yet to be saved, oldest first
+        self._failed_attempts = 0  # of the oldest pending batch
+        self.flushed = self.recovered = self.overflows = self.flush_failures = self.rejected = 0
+        self.last_flush_at = None
+        self.last_flush_lag = None
+
+    def submit(self, record):
+        """Queue ``record`` (SymptomChecker field values); returns False if the queue is full or closed"""
+        line = json.dumps(record) + '\n'
+        with self._cond:
+            if self._closed:
+                return False
+            self._start()
+            if self._depth() >= self.max_queue:
+                self.overflows += 1
+                return False
+            spill = self._segment[0]
+            spill.write(line)
+            spill.flush()
+            if self.fsync:
+                os.fsync(spill.fileno())
+            self._records.append((time.monotonic(), record))
+            if len(self._records) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def flush(self):
+        """Save every record queued so far; returns their number, rejected ones included.
+
+        Raises if saving fails, keeping the batch that failed and those after
+        it queued, unless the batch has now failed ``max_attempts`` times and
+        its records are saved or rejected one at a time.
+        """
+        with self._flush_lock:
+            with self._cond:
+                if self._records:
+                    # New arrivals go to a new spill file while these are saved
+                    self._pending.append((self._segment, self._records))
+                    self._segment = self._open_segment()
+                    self._records = []
+                pending = list(self._pending)
+            saved = 0
+            for (spill, path), records in pending:
+                try:
+                    _save([record for _, record in records])
+                    rejected = 0
+                except Exception:
+                    self._failed_attempts += 1
+                    if self._failed_attempts < self.max_attempts:
+                        raise
+                    rejected = self._save_one_by_one(records)
+                self._failed_attempts = 0
+                with self._cond:
+                    self._pending.popleft()
+                    self.flushed += len(records) - rejected
+                    self.last_flush_at = timezone.now()
+                    self.last_flush_lag = time.monotonic() - records[0][0]
+                # Unlink before unlocking, so no one replays saved records
+                os.unlink(path)
+                spill.close()
+                saved += len(records)
+            return saved
+
+    def _save_one_by_one(self, records):
+        # Of a batch that keeps failing; returns the number of records rejected
+        rejected = []
+        for index, (_, record) in enumerate(records):
+            try:
+                _save([record])
+            except (OperationalError, InterfaceError):
+                # The database is unavailable; keep the records not saved yet queued
+                del records[:index]
+                self._reject(rejected)
+                raise
+            except Exception as e:
+                logger.error(f"Rejected a symptom check that could not be saved: {e}")
+                rejected.append(record)
+        self._reject(rejected)
+        return len(rejected)
+
+    def _reject(self, records):
+        if not records:
+            return
+        path = os.path.join(self.spill_dir, f'{REJECTED_PREFIX}{os.getpid()}.jsonl')
+        with open(path, 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(record) + '\n' for record in records)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        with self._cond:
+            self.rejected += len(records)
+        logger.error(f"Moved {len(records)} symptom checks that could not be saved to {path}")
+
+    def recover(self):
+        """Save the records of spill files left behind by dead processes; returns their number"""
+        if fcntl is None:
+            logger.warning("Cannot tell abandoned symptom check spill files without fcntl; not replaying them")
+            return 0
+        recovered = 0
+        for path in sorted(glob(os.path.join(self.spill_dir, f'{SPILL_PREFIX}*.jsonl'))):
+            try:
+                spill = open(path, encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with spill:
+                # Locked by a live process, or saved and deleted since it was listed
+                if not _try_lock(spill) or os.fstat(spill.fileno()).st_nlink == 0:
+                    continue
+                records = []
+                for line in spill:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Torn by the crash; its request never got a response
+                        logger.warning(f"Skipping an unreadable symptom check in {path}")
+                _save(records)
+                os.unlink(path)
+            recovered += len(records)
+        if recovered:
+            logger.info(f"Recovered {recovered} spilled symptom checks")
+        with self._cond:
+            self.recovered += recovered
+        return recovered
+
+    def stats(self):
+        """Queue depth and flush lag of this process's writer"""
+        with self._cond:
+            oldest = self._pending[0][1][0][0] if self._pending else self._records[0][0] if self._records else None
+            return {
+                'enabled': True,
+                'queue_depth': self._depth(),
+                'max_queue': self.max_queue,
+                # Age of the oldest record not saved yet
+                'flush_lag_seconds': time.monotonic() - oldest if oldest is not None else 0.0,
+                'last_flush_lag_seconds': self.last_flush_lag,
+                'last_flush_at': self.last_flush_at,
+                'flushed': self.flushed,
+                'recovered': self.recovered,
+                'overflows': self.overflows,
+                'flush_failures': self.flush_failures,
+                'rejected': self.rejected,
+            }
+
+    def close(self):
+        """Stop the flusher and save what is left"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        if self._pid == os.getpid():
+            self.flush()
+            with self._cond:
+                if self._segment is not None:
+                    spill, path = self._segment
+                    os.unlink(path)
+                    spill.close()
+                    self._segment = None
+
+    def _depth(self):
+        return len(self._records) + sum(len(records) for _, records in self._pending)
+
+    def _start(self):
+        # Called with self._cond held; (re)starts in a process forked from one that had started
+        if self._pid == os.getpid():
+            return
+        # A forked child's copies belong to its parent, which saves them. Its
+        # spill file descriptors share the parent's locks, so close them.
+        inherited = [segment for segment, _ in self._pending]
+        if self._segment is not None:
+            inherited.append(self._segment)
+        for spill, _ in inherited:
+            spill.close()
+        self._pid = os.getpid()
+        self._records, self._pending = [], deque()
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._segment = self._open_segment()
+        self._thread = threading.Thread(target=self._run, name='symptom-check-writer', daemon=True)
+        self._thread.start()
+
+    def _open_segment(self):
+        self._sequence += 1
+        path = os.path.join(self.spill_dir, f'{SPILL_PREFIX}{os.getpid()}-{self._sequence}.jsonl')
+        # Locked under a temporary name, so recovery never sees it unlocked
+        spill = open(path + '.tmp', 'w', encoding='utf-8')
+        _try_lock(spill)
+        os.rename(path + '.tmp', path)
+        return spill, path
+
+    def _run(self):
+        try:
+            self.recover()
+        except Exception as e:
+            logger.error(f"Could not recover spilled symptom checks: {e}")
+        while True:
+            with self._cond:
+                if not self._closed and len(self._records) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                with self._cond:
+                    self.flush_failures += 1
+                logger.error(f"Could not save queued symptom checks: {e}")
+                time.sleep(self.flush_interval)
+            finally:
+                close_old_connections()
+
+
+def _try_lock(spill):
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(spill.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _save(records):
+    patient_ids = {record['patient_id'] for record in records} - {None}
+    if patient_ids:
+        existing = set(Patient.objects.filter(pk__in=patient_ids).values_list('pk', flat=True))
+        # Checks of patients deleted meanwhile would have been deleted with them
+        records = [record for record in records if record['patient_id'] in existing or record['patient_id'] is None]
+    create_symptom_checks([SymptomChecker(**record) for record in records])
+
+
+def get_writer():
+    """This process's symptom check writer, or None if write-behind is disabled"""
+    global _writer
+    options = getattr(settings, 'SYMPTOM_CHECK_WRITE_BEHIND', {})
+    if not options.get('ENABLED'):
+        return None
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = SymptomCheckWriter(
+                    options['SPILL_DIR'], flush_interval=options.get('FLUSH_INTERVAL', 0.2),
+                    batch_size=options.get('BATCH_SIZE', 200), max_queue=options.get('MAX_QUEUE', 10000),
+                    fsync=options.get('FSYNC', False), max_attempts=options.get('MAX_ATTEMPTS', 3),
+                )
+                atexit.register(_writer.close)
+    return _writer
+
+
+def reset_writer():
+    """Close the shared writer, saving its queue, so the next access reads the settings again"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        atexit.unregister(writer.close)
+        writer.close()
+
+
+def save_symptom_checks(records):
+    """Save symptom checks (dicts of SymptomChecker field values), or queue them if write-behind is enabled"""
+    writer = get_writer()
+    if writer is not None:
+        # Those that do not fit in the queue are saved now
+        records = [record for record in records if not writer.submit(record)]
+    if records:
+        create_symptom_checks([SymptomChecker(**record) for record in records])
+
+
+def write_behind_stats():
+    """Queue depth and flush lag of this process's writer"""
+    writer = get_writer()
+    return writer.stats() if writer is not None else {'enabled': False}
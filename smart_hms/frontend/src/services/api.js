@@ -87,6 +87,8 @@ export const doctorAPI = {
   getDoctor: (id) => api.get(`/doctors/${id}/`),
   createDoctor: (data) => api.post('/doctors/', data),
   updateDoctor: (id, data) => api.patch(`/doctors/${id}/`, data),
+  getDoctorSlots: (id, params) => api.get(`/doctors/${id}/slots/`, { params }),
+  getEarliestSlots: (params) => api.get('/doctors/earliest-slots/', { params }),
 };
 
 // Appointment API
@@ -94,6 +96,7 @@ export const appointmentAPI = {
   getAppointments: () => api.get('/appointments/'),
   getAppointment: (id) => api.get(`/appointments/${id}/`),
   createAppointment: (data) => api.post('/appointments/', data),
+  createAppointments: (data) => api.post('/appointments/bulk/', data),
   updateAppointment: (id, data) => api.patch(`/appointments/${id}/`, data),
   confirmAppointment: (id) => api.post(`/appointments/${id}/confirm/`),
   cancelAppointment: (id) => api.post(`/appointments/${id}/cancel/`),